@@ -3,18 +3,17 @@ API роуты для аналитики и отчетов с поддержко
 """
 
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, or_
 from typing import List, Optional
 from datetime import datetime, timedelta
 
 from app.core.database import get_db
 from app.core.deps import get_current_recruiter_or_above
 from app.models.user import User, UserRole, RecruitmentStream
-from app.models.job import Job, JobApplication, JobApplicationStatus
-from app.models.interview_report import InterviewReport
-from app.models.job import InterviewInvitation
-from app.core.exceptions import AuthorizationError
+from app.core.exceptions import AuthorizationError, ValidationError
+from app.services import analytics_cache, analytics_export, hiring_funnel, recruitment_analytics
 
 router = APIRouter()
 
@@ -42,98 +41,64 @@ async def get_analytics_dashboard(
     start_date = end_date - timedelta(days=period_days)
     
     # Определяем область данных в зависимости от роли
-    if current_user.role == UserRole.RECRUITER:
-        # Рекрутер видит только свои данные
-        stream_filter = and_(User.stream_id == current_user.stream_id)
-        recruiter_filter = and_(User.id == current_user.id)
-    elif current_user.role == UserRole.SENIOR_RECRUITER:
-        # Старший рекрутер видит данные своего потока
-        owned_stream = db.query(RecruitmentStream).filter(
-            RecruitmentStream.senior_recruiter_id == current_user.id
-        ).first()
-        
-        if not owned_stream:
-            return {
-                "error": "У вас нет потока",
-                "metrics": {
-                    "total_jobs": 0,
-                    "total_applications": 0,
-                    "total_interviews": 0,
-                    "success_rate": 0,
-                    "streams_count": 0,
-                    "recruiters_count": 0,
-                }
+    owned_stream, scope = recruitment_analytics.owner_scope(db, current_user)
+    if current_user.role == UserRole.SENIOR_RECRUITER and not owned_stream:
+        return {
+            "error": "У вас нет потока",
+            "metrics": {
+                "total_jobs": 0,
+                "total_applications": 0,
+                "total_interviews": 0,
+                "success_rate": 0,
+                "streams_count": 0,
+                "recruiters_count": 0,
             }
-        
-        stream_filter = and_(User.stream_id == owned_stream.id)
-        recruiter_filter = and_(User.stream_id == owned_stream.id)
-    else:  # RECRUIT_LEAD или ADMIN
-        # Главный рекрутер видит данные всех потоков
-        stream_filter = None
-        recruiter_filter = None
-    
-    # Общие метрики
-    total_jobs_query = db.query(Job)
-    total_applications_query = db.query(JobApplication)
-    total_interviews_query = db.query(InterviewInvitation)
-    
-    # Применяем фильтры по потокам если нужно
-    if stream_filter:
-        # Фильтруем по рекрутерам в потоке
-        recruiters_in_stream = db.query(User.id).filter(stream_filter).subquery()
-        # Здесь нужно добавить логику фильтрации по рекрутерам
-        # Пока возвращаем общие данные
-    
-    total_jobs = total_jobs_query.count()
-    total_applications = total_applications_query.count()
-    total_interviews = total_interviews_query.count()
+        }
     
-    # Вычисляем успешность
-    successful_applications = total_applications_query.filter(
-        JobApplication.status == JobApplicationStatus.ACCEPTED
-    ).count()
+    def compute() -> dict:
+        # Общие метрики области одним агрегатным запросом
+        summary = recruitment_analytics.get_summary(db, scope, since=start_date)
     
-    success_rate = (successful_applications / total_applications * 100) if total_applications > 0 else 0
+        # Метрики по потокам
+        if current_user.role == UserRole.RECRUIT_LEAD:
+            streams_count = db.query(RecruitmentStream).count()
+            recruiters_count = db.query(User).filter(
+                User.role.in_([UserRole.RECRUITER, UserRole.SENIOR_RECRUITER])
+            ).count()
+        elif current_user.role == UserRole.SENIOR_RECRUITER:
+            streams_count = 1
+            recruiters_count = db.query(User).filter(
+                User.stream_id == owned_stream.id,
+                User.role == UserRole.RECRUITER
+            ).count()
+        else:
+            streams_count = 1 if current_user.stream_id else 0
+            recruiters_count = 0
     
-    # Метрики по потокам
-    if current_user.role == UserRole.RECRUIT_LEAD:
-        streams_count = db.query(RecruitmentStream).count()
-        recruiters_count = db.query(User).filter(
-            User.role.in_([UserRole.RECRUITER, UserRole.SENIOR_RECRUITER])
-        ).count()
-    elif current_user.role == UserRole.SENIOR_RECRUITER:
-        owned_stream = db.query(RecruitmentStream).filter(
-            RecruitmentStream.senior_recruiter_id == current_user.id
-        ).first()
-        streams_count = 1 if owned_stream else 0
-        recruiters_count = db.query(User).filter(
-            User.stream_id == owned_stream.id,
-            User.role == UserRole.RECRUITER
-        ).count() if owned_stream else 0
-    else:
-        streams_count = 1 if current_user.stream_id else 0
-        recruiters_count = 0
+        return {
+            "metrics": {
+                "total_jobs": summary["total_jobs"],
+                "total_applications": summary["total_applications"],
+                "total_interviews": summary["total_interviews"],
+                "success_rate": summary["success_rate"],
+                "streams_count": streams_count,
+                "recruiters_count": recruiters_count,
+            },
+            "period": {
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "days": period_days,
+            },
+            "user_role": current_user.role.value,
+            "user_stream": {
+                "id": current_user.stream_id,
+                "name": current_user.stream.name if current_user.stream else None,
+            } if current_user.role == UserRole.RECRUITER else None,
+        }
     
-    return {
-        "metrics": {
-            "total_jobs": total_jobs,
-            "total_applications": total_applications,
-            "total_interviews": total_interviews,
-            "success_rate": round(success_rate, 2),
-            "streams_count": streams_count,
-            "recruiters_count": recruiters_count,
-        },
-        "period": {
-            "start_date": start_date.isoformat(),
-            "end_date": end_date.isoformat(),
-            "days": period_days,
-        },
-        "user_role": current_user.role.value,
-        "user_stream": {
-            "id": current_user.stream_id,
-            "name": current_user.stream.name if current_user.stream else None,
-        } if current_user.role == UserRole.RECRUITER else None,
-    }
+    # Результат кэшируется по области данных и периоду
+    key = analytics_cache.scope_key("dashboard", current_user, owned_stream.id if owned_stream else None, period_days)
+    return await analytics_cache.cached(key, compute)
 
 @router.get("/streams")
 async def get_streams_analytics(
@@ -155,12 +120,11 @@ async def get_streams_analytics(
     
     streams = streams_query.all()
     
+    # Метрики всех потоков одним сгруппированным запросом
+    metrics_by_stream = recruitment_analytics.get_metrics_by_stream(db, [stream.id for stream in streams])
+    
     result = []
     for stream in streams:
-        # Считаем метрики для каждого потока
-        recruiters_in_stream = [r.id for r in stream.recruiters]
-        
-        # Здесь можно добавить более детальную аналитику по каждому потоку
         stream_metrics = {
             "stream_id": stream.id,
             "stream_name": stream.name,
@@ -176,11 +140,7 @@ async def get_streams_analytics(
                     "email": r.email,
                 } for r in stream.recruiters
             ],
-            "metrics": {
-                "total_jobs": 0,  # TODO: Реализовать подсчет
-                "total_applications": 0,  # TODO: Реализовать подсчет
-                "success_rate": 0,  # TODO: Реализовать подсчет
-            }
+            "metrics": metrics_by_stream.get(stream.id, recruitment_analytics.EMPTY_METRICS)
         }
         
         result.append(stream_metrics)
@@ -222,6 +182,9 @@ async def get_recruiters_analytics(
     
     recruiters = recruiters_query.all()
     
+    # Метрики всех рекрутеров одним сгруппированным запросом
+    metrics_by_recruiter = recruitment_analytics.get_metrics_by_owner(db, [recruiter.id for recruiter in recruiters])
+    
     result = []
     for recruiter in recruiters:
         recruiter_metrics = {
@@ -235,9 +198,7 @@ async def get_recruiters_analytics(
             } if recruiter.stream else None,
             "is_active": recruiter.is_active,
             "metrics": {
-                "total_jobs": 0,  # TODO: Реализовать подсчет
-                "total_applications": 0,  # TODO: Реализовать подсчет
-                "success_rate": 0,  # TODO: Реализовать подсчет
+                **metrics_by_recruiter.get(recruiter.id, recruitment_analytics.EMPTY_METRICS),
                 "last_activity": recruiter.updated_at.isoformat() if recruiter.updated_at else None,
             }
         }
@@ -259,85 +220,108 @@ async def get_performance_analytics(
     start_date = end_date - timedelta(days=period_days)
     
     # Определяем область данных в зависимости от роли
-    if current_user.role == UserRole.RECRUITER:
-        # Рекрутер видит только свои данные
-        user_filter = [current_user.id]
-    elif current_user.role == UserRole.SENIOR_RECRUITER:
-        # Старший рекрутер видит данные своего потока
-        owned_stream = db.query(RecruitmentStream).filter(
-            RecruitmentStream.senior_recruiter_id == current_user.id
-        ).first()
-        
-        if owned_stream:
-            user_filter = [r.id for r in owned_stream.recruiters] + [current_user.id]
-        else:
-            user_filter = [current_user.id]
-    else:  # RECRUIT_LEAD или ADMIN
-        # Главный рекрутер видит данные всех потоков
-        if stream_id:
-            stream_recruiters = db.query(User).filter(
-                User.stream_id == stream_id,
-                User.role == UserRole.RECRUITER
-            ).all()
-            user_filter = [r.id for r in stream_recruiters]
-        else:
-            all_recruiters = db.query(User).filter(
-                User.role.in_([UserRole.RECRUITER, UserRole.SENIOR_RECRUITER])
-            ).all()
-            user_filter = [r.id for r in all_recruiters]
+    if current_user.role != UserRole.RECRUIT_LEAD:
+        stream_id = None
+    stream, scope = recruitment_analytics.owner_scope(db, current_user, stream_id)
     
-    # Здесь можно добавить детальную аналитику производительности
-    # Пока возвращаем базовые метрики
+    def compute() -> dict:
+        users_query = db.query(func.count(User.id)).filter(User.role.in_(recruitment_analytics.RECRUITER_ROLES))
+        if scope is not None:
+            users_query = users_query.filter(scope)
     
-    performance_data = {
-        "period": {
-            "start_date": start_date.isoformat(),
-            "end_date": end_date.isoformat(),
-            "days": period_days,
-        },
-        "scope": {
-            "users_count": len(user_filter),
-            "stream_id": stream_id,
-            "user_role": current_user.role.value,
-        },
-        "metrics": {
-            "total_applications": 0,  # TODO: Реализовать подсчет
-            "successful_hires": 0,  # TODO: Реализовать подсчет
-            "average_time_to_hire": 0,  # TODO: Реализовать подсчет
-            "conversion_rate": 0,  # TODO: Реализовать подсчет
-        },
-        "trends": {
-            "applications_over_time": [],  # TODO: Реализовать тренды
-            "hires_over_time": [],  # TODO: Реализовать тренды
+        performance = recruitment_analytics.get_performance(db, scope, since=start_date.date(), until=end_date.date())
+    
+        return {
+            "period": {
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "days": period_days,
+            },
+            "scope": {
+                "users_count": users_query.scalar(),
+                "stream_id": stream.id if stream else stream_id,
+                "user_role": current_user.role.value,
+            },
+            "metrics": performance["metrics"],
+            "trends": performance["trends"],
         }
-    }
     
-    return performance_data
+    key = analytics_cache.scope_key("performance", current_user, stream.id if stream else stream_id, period_days)
+    return await analytics_cache.cached(key, compute)
+
+@router.get("/funnel")
+async def get_hiring_funnel(
+    current_user: User = Depends(get_current_recruiter_or_above),
+    db: Session = Depends(get_db),
+    period_days: int = Query(90, ge=1, description="Период в днях (по дате отклика)"),
+    group_by: Optional[str] = Query(None, description="Группировка: job, company, stream"),
+    stream_id: Optional[int] = Query(None, description="ID потока для фильтрации")
+) -> dict:
+    """Воронка найма: конверсии этапов и перцентили длительностей (время до найма)"""
+    if group_by is not None and group_by not in hiring_funnel.GROUP_BY:
+        raise ValidationError(f"Неизвестная группировка: {group_by}")
+
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=period_days)
+
+    if current_user.role != UserRole.RECRUIT_LEAD:
+        stream_id = None
+    stream, scope = recruitment_analytics.owner_scope(db, current_user, stream_id)
+
+    def compute() -> dict:
+        funnel = hiring_funnel.get_funnel(db, scope, since=start_date, group_by=group_by)
+        return {
+            "period": {
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "days": period_days,
+            },
+            "stream_id": stream.id if stream else stream_id,
+            "group_by": group_by,
+            **funnel,
+        }
+
+    key = analytics_cache.scope_key(
+        f"funnel:{group_by or 'total'}", current_user, stream.id if stream else stream_id, period_days
+    )
+    return await analytics_cache.cached(key, compute)
+
+@router.get("/cache")
+async def get_analytics_cache_stats(
+    current_user: User = Depends(get_current_recruit_lead)
+) -> dict:
+    """Статистика кэша аналитики (доля попаданий)"""
+    return analytics_cache.analytics_cache.stats()
 
 @router.get("/export")
 async def export_analytics(
     current_user: User = Depends(get_current_senior_or_lead),
     db: Session = Depends(get_db),
-    format: str = Query("json", description="Формат экспорта: json, csv"),
-    stream_id: Optional[int] = Query(None, description="ID потока для экспорта")
-) -> dict:
-    """Экспорт аналитических данных"""
+    format: str = Query("json", description="Формат экспорта: json, csv, ndjson, parquet"),
+    dataset: str = Query("applications", description="Данные: applications, interviews"),
+    stream_id: Optional[int] = Query(None, description="ID потока для экспорта"),
+    gzip: bool = Query(False, description="Сжатие gzip")
+) -> StreamingResponse:
+    """Потоковый экспорт истории откликов или интервью"""
+    if format not in analytics_export.EXPORT_FORMATS:
+        raise ValidationError(f"Неизвестный формат экспорта: {format}")
+    if dataset not in analytics_export.DATASETS:
+        raise ValidationError(f"Неизвестный набор данных: {dataset}")
+    if format == "parquet" and not analytics_export.is_parquet_enabled():
+        raise ValidationError("Экспорт в Parquet недоступен: не установлен pyarrow")
     
-    # Здесь можно реализовать экспорт данных в различных форматах
-    # Пока возвращаем базовую структуру
+    # Старший рекрутер выгружает только свой поток
+    if current_user.role != UserRole.RECRUIT_LEAD:
+        stream_id = None
+    _, scope = recruitment_analytics.owner_scope(db, current_user, stream_id)
     
-    export_data = {
-        "export_info": {
-            "exported_by": current_user.full_name,
-            "exported_at": datetime.utcnow().isoformat(),
-            "format": format,
-            "stream_id": stream_id,
-        },
-        "data": {
-            "streams": [],
-            "recruiters": [],
-            "metrics": {},
-        }
-    }
+    media_type = analytics_export.EXPORT_FORMATS[format][0]
+    if gzip and format != "parquet":
+        media_type = "application/gzip"
+    filename = analytics_export.export_filename(dataset, format, gzip)
     
-    return export_data
+    return StreamingResponse(
+        analytics_export.export_stream(dataset, format, scope, gzip=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
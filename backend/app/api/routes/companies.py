@@ -3,19 +3,28 @@ API роуты для компаний
 Управление вакансиями, кандидатами
 """
 
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Iterator, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.database import SessionLocal, get_db
 from app.core.deps import get_current_active_user
 from app.models.user import User, CandidateProfile
 from app.models.job import Job, JobApplication, JobApplicationStatus
+from app.services import company_stats
+from app.services.skills import split_skills
+from app.services.thumbnails import avatar_thumbnail_url
 
 router = APIRouter()
 
+MAX_PAGE_SIZE = 500
+
+# Строк из БД за одно чтение при потоковой выгрузке
+STREAM_BATCH_SIZE = 1000
+
 class CandidateApplicationResponse(BaseModel):
     id: int
     candidate_id: int
@@ -56,34 +65,107 @@ async def get_company_dashboard(
             detail="Только компании могут просматривать dashboard"
         )
     
-    # Получаем статистику
-    total_jobs = db.query(Job).filter(Job.company_id == current_user.company_profile.id).count()
-    active_jobs = db.query(Job).filter(
-        Job.company_id == current_user.company_profile.id,
-        Job.status == "active"
-    ).count()
-    
-    # Получаем отклики на все вакансии компании
-    applications = db.query(JobApplication).join(Job).filter(
-        Job.company_id == current_user.company_profile.id
-    ).all()
-    
-    total_applications = len(applications)
-    new_applications = len([app for app in applications if app.status == JobApplicationStatus.APPLIED])
-    
-    return {
-        "total_jobs": total_jobs,
-        "active_jobs": active_jobs,
-        "total_applications": total_applications,
-        "new_applications": new_applications
-    }
+    # Счетчики поддерживаются хуками записи вакансий и откликов
+    return company_stats.get_company_stats(db, current_user.company_profile.id)
+
+def _company_candidates_query(
+    db: Session,
+    company_id: int,
+    status_filter: Optional[JobApplicationStatus],
+    job_id: Optional[int],
+    order: str
+):
+    """Отклики компании одним запросом с JOIN, выбираются только нужные колонки"""
+    query = db.query(
+        JobApplication.id,
+        JobApplication.candidate_id,
+        JobApplication.job_id,
+        Job.title.label("job_title"),
+        JobApplication.status,
+        JobApplication.applied_at,
+        JobApplication.reviewed_at,
+        JobApplication.interview_scheduled_at,
+        JobApplication.interview_completed_at,
+        JobApplication.decision_at,
+        JobApplication.cover_letter,
+        JobApplication.expected_salary,
+        JobApplication.availability_date,
+        User.first_name,
+        User.last_name,
+        User.email,
+        User.phone,
+        User.avatar_url,
+        CandidateProfile.experience_years,
+        CandidateProfile.current_position,
+        CandidateProfile.skills
+    ).join(Job, JobApplication.job_id == Job.id).join(
+        CandidateProfile, JobApplication.candidate_id == CandidateProfile.id
+    ).join(User, CandidateProfile.user_id == User.id).filter(
+        Job.company_id == company_id
+    )
+
+    if status_filter is not None:
+        query = query.filter(JobApplication.status == status_filter)
+    if job_id is not None:
+        query = query.filter(JobApplication.job_id == job_id)
+
+    if order == "asc":
+        return query.order_by(JobApplication.applied_at.asc(), JobApplication.id.asc())
+    return query.order_by(JobApplication.applied_at.desc(), JobApplication.id.desc())
+
+def _candidate_application(row) -> CandidateApplicationResponse:
+    return CandidateApplicationResponse(
+        id=row.id,
+        candidate_id=row.candidate_id,
+        job_id=row.job_id,
+        job_title=row.job_title,
+        status=row.status.value,
+        applied_at=row.applied_at,
+        reviewed_at=row.reviewed_at,
+        interview_scheduled_at=row.interview_scheduled_at,
+        interview_completed_at=row.interview_completed_at,
+        decision_at=row.decision_at,
+        cover_letter=row.cover_letter,
+        expected_salary=row.expected_salary,
+        availability_date=row.availability_date,
+        candidate_name=f"{row.first_name} {row.last_name}",
+        candidate_email=row.email,
+        candidate_phone=row.phone,
+        candidate_avatar=avatar_thumbnail_url(row.avatar_url),
+        candidate_experience_years=row.experience_years,
+        candidate_current_position=row.current_position,
+        # Навыки хранятся как JSON массив, клиенту отдаются строкой через запятую
+        candidate_skills=", ".join(split_skills(row.skills)) or None
+    )
+
+def _stream_candidates(company_id: int, status_filter, job_id, order: str, skip: int) -> Iterator[bytes]:
+    """NDJSON: по одной заявке на строку, строки читаются из БД пачками"""
+    # Собственная сессия: сессия запроса закрывается до отправки тела ответа
+    db = SessionLocal()
+    try:
+        query = _company_candidates_query(db, company_id, status_filter, job_id, order)
+        for row in query.offset(skip).yield_per(STREAM_BATCH_SIZE):
+            yield _candidate_application(row).model_dump_json().encode() + b"\n"
+    finally:
+        db.close()
 
 @router.get("/candidates", response_model=List[CandidateApplicationResponse])
 async def get_company_candidates(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    status_filter: Optional[str] = Query(None, alias="status", description="Статус отклика"),
+    job_id: Optional[int] = Query(None, description="ID вакансии"),
+    order: str = Query("desc", pattern="^(asc|desc)$", description="Сортировка по дате отклика: asc, desc"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="Формат ответа: json, ndjson"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Получение списка кандидатов компании"""
+    """
+    Получение списка кандидатов компании
+
+    В формате json возвращается страница (skip/limit), в формате ndjson
+    потоком выгружаются все отклики с учетом фильтров начиная с skip.
+    """
     # Проверяем, что пользователь - компания
     if not current_user.company_profile:
         raise HTTPException(
@@ -91,38 +173,25 @@ async def get_company_candidates(
             detail="Только компании могут просматривать кандидатов"
         )
     
-    # Получаем отклики на все вакансии компании с информацией о кандидатах
-    applications = db.query(JobApplication).join(Job).join(CandidateProfile).join(User).filter(
-        Job.company_id == current_user.company_profile.id
-    ).all()
+    application_status = None
+    if status_filter:
+        try:
+            application_status = JobApplicationStatus(status_filter)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Неизвестный статус отклика: {status_filter}"
+            )
     
-    result = []
-    for app in applications:
-        candidate = app.candidate.user
-        result.append(CandidateApplicationResponse(
-            id=app.id,
-            candidate_id=app.candidate_id,
-            job_id=app.job_id,
-            job_title=app.job.title,
-            status=app.status.value,
-            applied_at=app.applied_at,
-            reviewed_at=app.reviewed_at,
-            interview_scheduled_at=app.interview_scheduled_at,
-            interview_completed_at=app.interview_completed_at,
-            decision_at=app.decision_at,
-            cover_letter=app.cover_letter,
-            expected_salary=app.expected_salary,
-            availability_date=app.availability_date,
-            candidate_name=f"{candidate.first_name} {candidate.last_name}",
-            candidate_email=candidate.email,
-            candidate_phone=candidate.phone,
-            candidate_avatar=candidate.avatar_url,
-            candidate_experience_years=app.candidate.experience_years,
-            candidate_current_position=app.candidate.current_position,
-            candidate_skills=app.candidate.skills
-        ))
+    company_id = current_user.company_profile.id
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_candidates(company_id, application_status, job_id, order, skip),
+            media_type="application/x-ndjson"
+        )
     
-    return result
+    rows = _company_candidates_query(db, company_id, application_status, job_id, order).offset(skip).limit(limit).all()
+    return [_candidate_application(row) for row in rows]
 
 
 
@@ -19,7 +19,8 @@ from app.schemas.integration import (
     ExternalCandidate, SearchCandidatesRequest, ImportCandidateRequest,
     IntegrationLog, IntegrationStats, SyncStatus
 )
-from app.services.integration_service import IntegrationService
+from app.services import integration_sync
+from app.services.integration_service import IntegrationService, platform_health
 from app.core.exceptions import ValidationError, NotFoundError
 
 router = APIRouter()
@@ -178,10 +179,12 @@ async def sync_integration(
 ) -> Any:
     """Запуск синхронизации интеграции"""
     
-    service = IntegrationService(db)
+    integration = IntegrationService(db).get_integration(integration_id)
+    if not integration.is_active:
+        raise ValidationError("Интеграция неактивна")
     
-    # Запускаем синхронизацию в фоне
-    background_tasks.add_task(service.sync_integration, integration_id)
+    # Синхронизация в фоне со своей сессией и под арендой (не дублируется с планировщиком)
+    background_tasks.add_task(integration_sync.run_sync, integration_id)
     
     return {"message": "Синхронизация запущена в фоновом режиме"}
 
@@ -286,7 +289,8 @@ async def get_integration_stats(
                 "imported_candidates": platform_imported,
                 "is_active": platform_integration.is_active,
                 "last_sync_at": platform_integration.last_sync_at,
-                "error_count": platform_integration.error_count
+                "error_count": platform_integration.error_count,
+                "health": platform_health(platform)
             }
     
     return IntegrationStats(
@@ -3,16 +3,17 @@ API роуты для вакансий
 """
 
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.core.database import get_db
 from app.core.deps import get_current_active_user
-from app.models.user import User, CandidateProfile
+from app.models.user import User, CandidateProfile, UserRole
 from app.models.job import Job, JobStatus, JobType, ExperienceLevel, JobApplication, JobApplicationStatus, InterviewInvitation, InvitationStatus
 from app.models.interview_report import InterviewReport, ReportStatus
+from app.services import job_search, matching, job_recommendations, invitations, company_stats, score_distribution
 
 router = APIRouter()
 
@@ -85,6 +86,10 @@ class JobResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class JobRecommendationResponse(JobResponse):
+    match_score: float
+    matched_skills: List[str] = []
+
 class JobApplicationCreate(BaseModel):
     cover_letter: Optional[str] = None
     expected_salary: Optional[int] = None
@@ -136,6 +141,23 @@ class InterviewInvitationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class InvitationBatchCreate(BaseModel):
+    candidate_ids: List[int] = Field(..., min_length=1, max_length=1000)  # id профилей кандидатов
+    expires_at: Optional[datetime] = None  # По умолчанию через 7 дней
+    scheduled_at: Optional[datetime] = None
+    interview_language: str = "ru"
+    custom_questions: Optional[List[str]] = None
+
+class InvitationBatchItem(BaseModel):
+    candidate_id: int
+    invitation_id: int
+
+class InvitationBatchResponse(BaseModel):
+    job_id: int
+    created: List[InvitationBatchItem]
+    skipped_existing: List[int]
+    not_found: List[int]
+
 @router.get("/", response_model=List[JobResponse])
 async def get_jobs(
     skip: int = 0,
@@ -149,47 +171,15 @@ async def get_jobs(
     db: Session = Depends(get_db)
 ):
     """Получение списка вакансий"""
-    query = db.query(Job)
-    
-    if status:
-        # Конвертируем строку в enum
-        try:
-            status_enum = JobStatus(status.lower())
-            query = query.filter(Job.status == status_enum)
-        except ValueError:
-            # Если статус не найден, игнорируем фильтр
-            pass
-    
-    if company_id:
-        query = query.filter(Job.company_id == company_id)
-    
-    if search:
-        query = query.filter(
-            Job.title.ilike(f"%{search}%") |
-            Job.description.ilike(f"%{search}%")
-        )
-    
-    if experience_level:
-        try:
-            from app.models.job import ExperienceLevel
-            exp_enum = ExperienceLevel(experience_level.lower())
-            query = query.filter(Job.experience_level == exp_enum)
-        except ValueError:
-            pass
-    
-    if job_type:
-        try:
-            from app.models.job import JobType
-            type_enum = JobType(job_type.lower())
-            query = query.filter(Job.job_type == type_enum)
-        except ValueError:
-            pass
-    
-    if location:
-        if location.lower() == 'remote':
-            query = query.filter(Job.is_remote == True)
-        else:
-            query = query.filter(Job.location.ilike(f"%{location}%"))
+    filters = job_search.normalize_job_filters(
+        status=status,
+        company_id=company_id,
+        search=search,
+        experience_level=experience_level,
+        job_type=job_type,
+        location=location
+    )
+    query = job_search.apply_job_filters(db.query(Job), filters)
     
     jobs = query.offset(skip).limit(limit).all()
     
@@ -212,6 +202,76 @@ async def get_jobs(
     
     return result
 
+@router.get("/facets")
+async def get_job_facets(
+    status: Optional[str] = None,
+    company_id: Optional[int] = None,
+    search: Optional[str] = None,
+    experience_level: Optional[str] = None,
+    job_type: Optional[str] = None,
+    location: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Счетчики вакансий по значениям фильтров для текущего поиска"""
+    filters = job_search.normalize_job_filters(
+        status=status,
+        company_id=company_id,
+        search=search,
+        experience_level=experience_level,
+        job_type=job_type,
+        location=location
+    )
+    return job_search.get_job_facets(db, filters)
+
+@router.get("/recommended", response_model=List[JobRecommendationResponse])
+async def get_recommended_jobs(
+    limit: int = 20,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Рекомендованные вакансии для текущего кандидата"""
+    profile = current_user.candidate_profile
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Только кандидаты могут получать рекомендации вакансий"
+        )
+    
+    job_recommendations.job_skill_index.ensure_built()
+    recommendations = job_recommendations.job_skill_index.recommend(
+        profile.skills,
+        experience_years=profile.experience_years,
+        expected_salary=profile.expected_salary_min or profile.preferred_salary_min,
+        limit=min(max(limit, 1), 100)
+    )
+    if not recommendations:
+        return []
+    
+    # Загружаем вакансии и компании одним запросом
+    from app.models.user import CompanyProfile
+    rows = db.query(Job, CompanyProfile).outerjoin(
+        CompanyProfile, Job.company_id == CompanyProfile.id
+    ).filter(Job.id.in_([job_id for job_id, _, _ in recommendations])).all()
+    jobs = {job.id: (job, company) for job, company in rows}
+    
+    result = []
+    for job_id, score, matched_skills in recommendations:
+        if job_id not in jobs:
+            continue
+        job, company_profile = jobs[job_id]
+        job_dict = job_to_dict(job)
+        if company_profile:
+            job_dict["company"] = {
+                "name": company_profile.company_name,
+                "industry": company_profile.industry,
+                "logo": company_profile.logo_url
+            }
+        job_dict["match_score"] = score
+        job_dict["matched_skills"] = matched_skills
+        result.append(job_dict)
+    
+    return result
+
 @router.get("/my", response_model=List[JobResponse])
 async def get_my_jobs(
     skip: int = 0,
@@ -260,6 +320,7 @@ async def create_job(
     # Создаем новую вакансию
     job = Job(
         company_id=current_user.company_profile.id,
+        created_by=current_user.id,
         title=job_data.title,
         description=job_data.description,
         requirements=job_data.requirements,
@@ -390,7 +451,8 @@ async def delete_job(
     # Удаляем приглашения на интервью
     db.query(InterviewInvitation).filter(InterviewInvitation.job_id == job_id).delete()
     
-    # Удаляем заявки на вакансию
+    # Удаляем заявки на вакансию (массовое удаление не вызывает хуки счетчиков)
+    company_stats.discount_job_applications(db, job)
     db.query(JobApplication).filter(JobApplication.job_id == job_id).delete()
     
     # Удаляем отчеты по интервью
@@ -495,6 +557,94 @@ async def get_job_applications(
     
     return applications
 
+@router.get("/{job_id}/matches")
+async def get_job_matches(
+    job_id: int,
+    limit: int = 20,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Подбор кандидатов для вакансии (ранжирование по навыкам, опыту и зарплате)"""
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Вакансия не найдена"
+        )
+    
+    # Доступ у владельца вакансии и рекрутеров
+    is_owner = current_user.company_profile and job.company_id == current_user.company_profile.id
+    is_recruiter = current_user.role in [UserRole.RECRUITER, UserRole.SENIOR_RECRUITER, UserRole.RECRUIT_LEAD]
+    if not is_owner and not is_recruiter:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="У вас нет прав для подбора кандидатов на эту вакансию"
+        )
+    
+    matches = await matching.rank_candidates(job, min(max(limit, 1), 100))
+    
+    # Загружаем данные пользователей только для top-k одним запросом
+    profile_ids = [match["candidate_id"] for match in matches]
+    users = dict(
+        db.query(CandidateProfile.id, User).join(User, CandidateProfile.user_id == User.id).filter(
+            CandidateProfile.id.in_(profile_ids)
+        ).all()
+    ) if profile_ids else {}
+    
+    result = []
+    for match in matches:
+        user = users.get(match["candidate_id"])
+        if not user or not user.is_active:
+            continue
+        match["user_id"] = user.id
+        match["candidate_name"] = user.full_name
+        match["candidate_email"] = user.email
+        result.append(match)
+    
+    return result
+
+@router.post("/{job_id}/invitations:batch", response_model=InvitationBatchResponse)
+async def create_invitations_batch(
+    job_id: int,
+    batch: InvitationBatchCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Массовое приглашение кандидатов на интервью по вакансии (только для компаний)"""
+    # Те же права, что и у одиночного приглашения: только компания - владелец вакансии
+    if not current_user.company_profile:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Только компании могут создавать приглашения на интервью"
+        )
+    
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job or job.company_id != current_user.company_profile.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Вакансия не найдена или не принадлежит вашей компании"
+        )
+    
+    result = invitations.create_invitations_batch(
+        db,
+        job,
+        batch.candidate_ids,
+        expires_at=batch.expires_at or datetime.now() + timedelta(days=7),
+        scheduled_at=batch.scheduled_at,
+        interview_language=batch.interview_language,
+        custom_questions=batch.custom_questions
+    )
+    
+    return InvitationBatchResponse(
+        job_id=job.id,
+        created=[
+            InvitationBatchItem(candidate_id=candidate_id, invitation_id=invitation_id)
+            for candidate_id, invitation_id in result.created.items()
+        ],
+        skipped_existing=result.existing,
+        not_found=result.not_found
+    )
+
 @router.patch("/applications/{application_id}/status")
 async def update_application_status(
     application_id: int,
@@ -961,3 +1111,112 @@ async def get_company_reports(
     return reports_response
 
 
+
+# ========== РАСПРЕДЕЛЕНИЕ ОЦЕНОК ==========
+
+def _score_distribution(
+    db: Session,
+    scope: str,
+    scope_id: int,
+    source: str,
+    metric: str,
+    bins: int,
+    value: Optional[float]
+) -> dict:
+    """Гистограмма оценок области и процентильный ранг value"""
+    if source not in score_distribution.METRICS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестный источник оценок: {source}"
+        )
+    if metric not in score_distribution.METRICS[source]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестная метрика: {metric}"
+        )
+    
+    index = score_distribution.score_index
+    index.ensure_built()
+    bins = min(max(bins, 1), score_distribution.MAX_BINS)
+    result = {
+        "scope": scope,
+        "scope_id": scope_id,
+        "source": source,
+        "metric": metric,
+        **index.histogram(scope, scope_id, source, metric, bins),
+    }
+    if value is not None:
+        result["value"] = value
+        result["percentile"] = index.percentile_rank(scope, scope_id, source, metric, value)
+    return result
+
+@router.get("/{job_id}/reports/distribution")
+async def get_job_score_distribution(
+    job_id: int,
+    metric: str = "overall_score",
+    source: str = "report",
+    bins: int = 10,
+    value: Optional[float] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Распределение оценок интервью по вакансии (и процентиль value)"""
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Вакансия не найдена"
+        )
+    if not current_user.company_profile or job.company_id != current_user.company_profile.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="У вас нет прав для просмотра оценок этой вакансии"
+        )
+    
+    return _score_distribution(db, "job", job_id, source, metric, bins, value)
+
+@router.get("/reports/company/distribution")
+async def get_company_score_distribution(
+    metric: str = "overall_score",
+    source: str = "report",
+    bins: int = 10,
+    value: Optional[float] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Распределение оценок интервью по всем вакансиям компании"""
+    if not current_user.company_profile:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Только компании могут просматривать отчеты"
+        )
+    
+    return _score_distribution(db, "company", current_user.company_profile.id, source, metric, bins, value)
+
+@router.get("/reports/{report_id}/percentiles")
+async def get_report_percentiles(
+    report_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Место кандидата среди кандидатов вакансии и компании по каждой оценке отчета"""
+    report = db.query(InterviewReport).join(Job).filter(InterviewReport.id == report_id).first()
+    if not report:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Отчет не найден"
+        )
+    if not current_user.company_profile or report.job.company_id != current_user.company_profile.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="У вас нет прав для просмотра этого отчета"
+        )
+    
+    index = score_distribution.score_index
+    index.ensure_built()
+    return {
+        "report_id": report.id,
+        "job_id": report.job_id,
+        "candidate_id": report.candidate_id,
+        "scores": index.subject_ranks("report", report.id) or {},
+    }
@@ -2,11 +2,13 @@
 API роуты для пользователей
 """
 
-from fastapi import APIRouter, Depends, UploadFile, File
+from fastapi import APIRouter, Depends, UploadFile, File, BackgroundTasks, Request
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session, joinedload
+from starlette.concurrency import run_in_threadpool
 from typing import Any
 import os
-import uuid
+import re
 from datetime import datetime
 
 from app.core.database import get_db
@@ -17,13 +19,17 @@ from app.core.deps import (
 )
 from app.core.config import settings
 from app.models.user import User, CandidateProfile, CompanyProfile, UserRole, RecruitmentStream
+from app.models.skill import candidate_skills
 from app.schemas.user import (
     UserUpdate, CandidateProfileUpdate, CompanyProfileUpdate,
-    CandidateWithProfile, CompanyWithProfile, UserCreate, UserBasic
+    CandidateWithProfile, CompanyWithProfile, UserCreate, UserBasic, CVExtraction
 )
 from app.schemas.stream import Stream
 from typing import List, Optional
 from app.core.exceptions import ValidationError, NotFoundError
+from app.services.skills import parse_skills, skills_subquery
+from app.services.uploads import save_upload, precompress
+from app.services import cv_extraction, thumbnails, upload_refs  # upload_refs: подсчет ссылок на файлы
 
 router = APIRouter()
 
@@ -123,6 +129,7 @@ async def update_user_profile(
 
 @router.post("/upload/cv")
 async def upload_cv(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_candidate),
     db: Session = Depends(get_db)
@@ -135,23 +142,9 @@ async def upload_cv(
             f"Неподдерживаемый тип файла. Разрешены: {', '.join(settings.ALLOWED_FILE_EXTENSIONS)}"
         )
     
-    # Проверка размера файла
-    file_content = await file.read()
-    if len(file_content) > settings.MAX_FILE_SIZE:
-        raise ValidationError(f"Файл слишком большой. Максимальный размер: {settings.MAX_FILE_SIZE // (1024*1024)} МБ")
-    
-    # Создание уникального имени файла
-    file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    
-    # Создание директории для загрузок
+    # Потоковое сохранение с проверкой размера и содержимого
     upload_dir = os.path.join(settings.UPLOAD_DIRECTORY, "cv")
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Сохранение файла
-    file_path = os.path.join(upload_dir, unique_filename)
-    with open(file_path, "wb") as f:
-        f.write(file_content)
+    saved = await save_upload(file, upload_dir, settings.MAX_FILE_SIZE)
     
     # Обновление профиля кандидата
     profile = current_user.candidate_profile
@@ -160,27 +153,46 @@ async def upload_cv(
         db.add(profile)
         db.flush()
     
-    # Удаление старого файла если существует
-    if profile.cv_url and os.path.exists(profile.cv_url):
-        try:
-            os.remove(profile.cv_url)
-        except:
-            pass
-    
     profile.cv_filename = file.filename
-    profile.cv_url = file_path
+    profile.cv_url = saved.path
+    profile.cv_sha256 = saved.sha256
     profile.cv_uploaded_at = datetime.utcnow()
     
     db.commit()
     
+    # Извлечение текста в фоне (дубликаты берутся из кеша по хешу)
+    # и gzip-вариант для раздачи через /uploads
+    background_tasks.add_task(cv_extraction.process_cv, saved.path, saved.sha256)
+    background_tasks.add_task(precompress, saved.path)
+    
     return {
         "message": "Резюме успешно загружено",
         "filename": file.filename,
         "uploaded_at": profile.cv_uploaded_at
     }
 
+@router.get("/profile/cv/extraction", response_model=CVExtraction)
+async def get_cv_extraction(
+    current_user: User = Depends(get_current_candidate),
+    db: Session = Depends(get_db)
+) -> Any:
+    """Данные, извлеченные из загруженного резюме"""
+    
+    profile = current_user.candidate_profile
+    if not profile or not profile.cv_url:
+        raise NotFoundError("Резюме не загружено")
+    
+    extraction = cv_extraction.get_extraction(db, profile.cv_sha256)
+    if not extraction:
+        return CVExtraction()
+    
+    result = CVExtraction.model_validate(extraction, from_attributes=True)
+    result.status = "failed" if extraction.error else "done"
+    return result
+
 @router.post("/upload/avatar")
 async def upload_avatar(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -194,41 +206,53 @@ async def upload_avatar(
             f"Неподдерживаемый тип файла. Разрешены: {', '.join(allowed_extensions)}"
         )
     
-    # Проверка размера файла (максимум 5 МБ для изображений)
+    # Потоковое сохранение с проверкой размера (максимум 5 МБ для изображений)
     max_image_size = 5 * 1024 * 1024
-    file_content = await file.read()
-    if len(file_content) > max_image_size:
-        raise ValidationError("Файл слишком большой. Максимальный размер: 5 МБ")
-    
-    # Создание уникального имени файла
-    file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    
-    # Создание директории для загрузок
     upload_dir = os.path.join(settings.UPLOAD_DIRECTORY, "avatars")
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Сохранение файла
-    file_path = os.path.join(upload_dir, unique_filename)
-    with open(file_path, "wb") as f:
-        f.write(file_content)
-    
-    # Удаление старого аватара если существует
-    if current_user.avatar_url and os.path.exists(current_user.avatar_url):
-        try:
-            os.remove(current_user.avatar_url)
-        except:
-            pass
+    file_path = (await save_upload(file, upload_dir, max_image_size)).path
     
-    # Обновление пользователя
+    # Обновление пользователя (старый файл не удаляется: на него могут ссылаться
+    # другие записи, файлы без ссылок удаляет cleanup_uploads.py)
     current_user.avatar_url = file_path
     db.commit()
     
+    # Миниатюры создаются в пуле потоков после ответа
+    background_tasks.add_task(thumbnails.generate_thumbnails, file_path)
+    
     return {
         "message": "Аватар успешно загружен",
-        "avatar_url": f"/uploads/avatars/{unique_filename}"
+        "avatar_url": f"/uploads/avatars/{os.path.basename(file_path)}",
+        "thumbnail_url": thumbnails.avatar_thumbnail_url(file_path)
     }
 
+@router.get("/avatars/{filename}/thumbnail")
+async def get_avatar_thumbnail(
+    filename: str,
+    request: Request,
+    size: int = thumbnails.THUMBNAIL_SIZES[0],
+    format: Optional[str] = None
+) -> Any:
+    """Миниатюра аватара (WebP, если клиент его поддерживает, иначе JPEG)"""
+    
+    if not re.fullmatch(r"[\w-]+\.(jpg|jpeg|png|gif)", filename):
+        raise NotFoundError("Аватар не найден")
+    if size not in thumbnails.THUMBNAIL_SIZES:
+        raise ValidationError(
+            f"Недопустимый размер. Доступны: {', '.join(map(str, thumbnails.THUMBNAIL_SIZES))}"
+        )
+    if format is not None and format not in thumbnails.THUMBNAIL_FORMATS:
+        raise ValidationError(f"Недопустимый формат. Доступны: {', '.join(thumbnails.THUMBNAIL_FORMATS)}")
+    
+    fmt = format or ("webp" if "image/webp" in request.headers.get("accept", "") else "jpeg")
+    path = await run_in_threadpool(thumbnails.get_thumbnail, filename, size, fmt)
+    if path is None:
+        raise NotFoundError("Аватар не найден")
+    
+    headers = {"Cache-Control": "public, max-age=31536000, immutable"}
+    if format is None:
+        headers["Vary"] = "Accept"
+    return FileResponse(path, media_type=thumbnails.THUMBNAIL_FORMATS[fmt][1], headers=headers)
+
 @router.get("/candidates", response_model=List[CandidateWithProfile])
 async def get_candidates(
     skip: int = 0,
@@ -255,14 +279,13 @@ async def get_candidates(
         )
     
     # Фильтр по навыкам - учитываем None значения
-    if skills:
-        skills_list = [skill.strip() for skill in skills.split(",")]
-        for skill in skills_list:
-            # Включаем кандидатов с навыком ИЛИ с пустыми навыками (None)
-            query = query.filter(
-                (CandidateProfile.skills.ilike(f"%{skill}%")) |
-                (CandidateProfile.skills.is_(None))
-            )
+    skills_list = parse_skills(skills)
+    if skills_list:
+        # Включаем кандидатов со всеми навыками ИЛИ с пустыми навыками (None)
+        query = query.filter(
+            (CandidateProfile.id.in_(skills_subquery(candidate_skills, "candidate_id", skills_list))) |
+            (CandidateProfile.skills.is_(None))
+        )
     
     # Фильтр по опыту - учитываем None значения
     if experience_min is not None:
@@ -396,6 +419,7 @@ async def invite_candidate(
         from app.models.job import JobStatus, JobType, ExperienceLevel
         job = Job(
             company_id=current_user.company_profile.id,
+            created_by=current_user.id,
             title="Общее приглашение",
             description="Общее приглашение на интервью",
             requirements="Общие требования",
@@ -515,6 +539,7 @@ async def invite_candidate_by_recruiter(
     # Создаем временную вакансию для приглашения от рекрутера
     job = Job(
         company_id=recruiter_company.id,
+        created_by=current_user.id,  # Приглашение засчитывается рекрутеру, а не системной компании
         title="Приглашение от рекрутера",
         description="Приглашение на собеседование от рекрутера",
         requirements="Общие требования",
@@ -0,0 +1,69 @@
+"""
+Ограничение размера тела запроса
+Проверка выполняется до разбора тела (multipart загрузки читаются Starlette
+целиком до вызова обработчика): по Content-Length запрос отклоняется сразу,
+без Content-Length (chunked) - как только прочитано больше лимита.
+Лимит применяется только к путям загрузки файлов
+"""
+
+from typing import Iterable
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+class BodySizeLimitMiddleware:
+    """ASGI middleware: ответ 413, если тело запроса к одному из paths больше max_body_size"""
+
+    def __init__(self, app: ASGIApp, max_body_size: int, paths: Iterable[str]):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.paths = frozenset(path.rstrip("/") for path in paths)
+
+    def _error_response(self) -> JSONResponse:
+        return JSONResponse(
+            status_code=413,
+            content={
+                "error": True,
+                "message": f"Тело запроса слишком большое. Максимальный размер: {self.max_body_size // (1024 * 1024)} МБ",
+                "type": "RequestTooLarge"
+            }
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].rstrip("/") not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_size:
+            await self._error_response()(scope, receive, send)
+            return
+
+        received = 0
+        rejected = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # Отвечаем 413 и прерываем чтение: приложение видит разрыв соединения
+                    rejected = True
+                    await self._error_response()(scope, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            # После ответа 413 ответ приложения уже не отправляется
+            if not rejected:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            # Ошибка разбора оборванного тела - клиенту уже отправлен 413
+            if not rejected:
+                raise
@@ -0,0 +1,180 @@
+"""
+In-memory кэш с TTL
+Используется для кэширования агрегатов (фасеты вакансий, аналитика и т.п.)
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+_MISSING = object()
+
+class _Flight:
+    """Вычисление значения, которое сейчас выполняется в другом потоке"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = _MISSING
+
+class TTLCache:
+    """Потокобезопасный кэш с ограничением времени жизни и количества записей"""
+
+    def __init__(self, ttl_seconds: float = 60, max_entries: int = 1024, wait_timeout: float = 30):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # Сколько поток ждет чужое вычисление, прежде чем вычислить сам
+        self.wait_timeout = wait_timeout
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        # Поколение увеличивается при каждой инвалидации, чтобы результат,
+        # посчитанный до инвалидации, не попал в кэш после нее
+        self._generation = 0
+        # Ключи, которые сейчас вычисляются (одновременные запросы ждут одно вычисление)
+        self._in_flight: Dict[Hashable, _Flight] = {}
+        # То же для асинхронных запросов: ожидание в event loop, а не в потоке пула
+        self._in_flight_async: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Получение значения (default если нет или истек срок)"""
+        with self._lock:
+            value = self._lookup(key)
+            return default if value is _MISSING else value
+
+    def _lookup(self, key: Hashable) -> Any:
+        """Значение или _MISSING (вызывается под блокировкой)"""
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return _MISSING
+        return value
+
+    def set(self, key: Hashable, value: Any, generation: int = None) -> None:
+        """Сохранение значения; игнорируется если кэш инвалидирован после generation"""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if len(self._data) >= self.max_entries and key not in self._data:
+                self._evict()
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Получение значения из кэша или вычисление и сохранение
+
+        Одновременные запросы одного ключа не вычисляют значение повторно:
+        первый вычисляет, остальные ждут его результат (не дольше wait_timeout).
+        Если вычисление завершилось ошибкой или не успело, ожидающие вычисляют сами.
+        """
+        while True:
+            with self._lock:
+                value = self._lookup(key)
+                if value is not _MISSING:
+                    self.hits += 1
+                    return value
+                flight = self._in_flight.get(key)
+                if flight is None:
+                    flight = self._in_flight[key] = _Flight()
+                    generation = self._generation
+                    self.misses += 1
+                    break
+                self.coalesced += 1
+
+            if not flight.done.wait(self.wait_timeout):
+                # Чужое вычисление затянулось - не держим поток дольше
+                return compute()
+            if flight.value is not _MISSING:
+                return flight.value
+
+        try:
+            value = compute()
+            flight.value = value
+            self.set(key, value, generation=generation)
+            return value
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            flight.done.set()
+
+    async def get_or_compute_async(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Асинхронный get_or_compute: в пул потоков уходит только вычисление
+
+        Одновременные запросы ключа ждут первое вычисление в event loop и не
+        занимают потоки пула (он общий с синхронными зависимостями, например
+        get_db). Если вычисление завершилось ошибкой или было отменено,
+        ожидающие пробуют вычислить сами.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                value = self._lookup(key)
+                if value is not _MISSING:
+                    self.hits += 1
+                    return value
+                future = self._in_flight_async.get(key)
+                if future is None or future.get_loop() is not loop:
+                    future = self._in_flight_async[key] = loop.create_future()
+                    generation = self._generation
+                    self.misses += 1
+                    break
+                self.coalesced += 1
+
+            # shield: отмена ожидающего запроса не отменяет общее вычисление
+            value = await asyncio.shield(future)
+            if value is not _MISSING:
+                return value
+
+        value = _MISSING
+        try:
+            value = await run_in_threadpool(compute)
+            self.set(key, value, generation=generation)
+            return value
+        finally:
+            with self._lock:
+                if self._in_flight_async.get(key) is future:
+                    del self._in_flight_async[key]
+            if not future.done():
+                future.set_result(value)
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики обращений: попадания, промахи, запросы, дождавшиеся чужого вычисления"""
+        with self._lock:
+            requests = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": round((self.hits + self.coalesced) / requests, 4) if requests else None,
+            }
+
+    def invalidate(self, key: Hashable = _MISSING) -> None:
+        """Удаление одной записи или очистка всего кэша"""
+        with self._lock:
+            self._generation += 1
+            if key is _MISSING:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def _evict(self) -> None:
+        """Удаление истекших записей, а если их нет - самой старой"""
+        now = time.monotonic()
+        expired = [k for k, (expires_at, _) in self._data.items() if expires_at < now]
+        for k in expired:
+            del self._data[k]
+        if len(self._data) >= self.max_entries:
+            oldest = min(self._data, key=lambda k: self._data[k][0])
+            del self._data[oldest]
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,161 @@
+"""
+Действия после фиксации транзакции
+In-memory кэши и индексы обновляются только после commit: изменения моделей
+отмечаются при flush и при массовых ORM запросах (query.update()/delete(),
+session.execute(insert/update/delete)), которые flush не проходят, применяются
+в after_commit и отбрасываются при rollback.
+
+Кэши и индексы живут в памяти процесса (у каждого воркера свои) и видят только
+изменения, сделанные через ORM этого процесса.
+"""
+
+import threading
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+
+# Тип изменения объекта при flush
+NEW, DIRTY, DELETED = "new", "dirty", "deleted"
+
+class _Changes:
+    """Изменения одной транзакции для одного подписчика"""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.bulk = False
+
+def on_commit_changes(
+    models: Tuple[type, ...],
+    collect: Callable[[Session, Any, str], Iterable[Any]],
+    apply: Callable[[List[Any]], None],
+    on_bulk: Optional[Callable[[], None]] = None
+) -> None:
+    """
+    Подписка на изменения моделей с применением после commit
+
+    Args:
+        models: Отслеживаемые модели
+        collect: (сессия, объект, NEW/DIRTY/DELETED) -> изменения объекта; вызывается
+            при flush, пока объект и сессия доступны
+        apply: Применение изменений зафиксированной транзакции (по порядку flush)
+        on_bulk: Вызывается вместо apply, если в транзакции был массовый запрос
+            к таблицам моделей (по отдельным объектам его не восстановить);
+            по умолчанию - apply с собранными изменениями
+    """
+    key = object()  # Ключ изменений подписчика в session.info
+    tables = frozenset(model.__tablename__ for model in models)
+
+    def changes(session: Session) -> _Changes:
+        state = session.info.get(key)
+        if state is None:
+            state = session.info[key] = _Changes()
+        return state
+
+    @event.listens_for(Session, "after_flush")
+    def _collect(session, flush_context):
+        items = []
+        for kind, objects in ((NEW, session.new), (DIRTY, session.dirty), (DELETED, session.deleted)):
+            for obj in objects:
+                if isinstance(obj, models):
+                    items.extend(collect(session, obj, kind))
+        if items:
+            changes(session).items.extend(items)
+
+    @event.listens_for(Session, "do_orm_execute")
+    def _collect_bulk(orm_execute_state):
+        if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None and getattr(table, "name", None) in tables:
+            changes(orm_execute_state.session).bulk = True
+
+    @event.listens_for(Session, "after_commit")
+    def _apply(session):
+        state = session.info.pop(key, None)
+        if state is None:
+            return
+        if state.bulk and on_bulk is not None:
+            on_bulk()
+        elif state.items or state.bulk:
+            apply(state.items)
+
+    @event.listens_for(Session, "after_rollback")
+    def _discard(session):
+        session.info.pop(key, None)
+
+def on_commit_if_changed(
+    models: Tuple[type, ...],
+    callback: Callable[[], None],
+    is_relevant: Optional[Callable[[Any], bool]] = None
+) -> None:
+    """
+    callback() после commit транзакции, изменившей объекты models
+
+    is_relevant - фильтр измененных (не новых и не удаленных) объектов,
+    например только смена определенных атрибутов.
+    """
+    def collect(session: Session, obj: Any, kind: str) -> Iterable[Any]:
+        return (True,) if kind != DIRTY or is_relevant is None or is_relevant(obj) else ()
+
+    on_commit_changes(models, collect, lambda items: callback())
+
+class IncrementalIndex:
+    """
+    In-memory индекс, который строится при первом обращении и затем
+    обновляется изменениями зафиксированных транзакций
+
+    Изменения собираются всегда, в том числе пока индекс не построен.
+    Построение и применение изменений выполняются под одной блокировкой,
+    а построение читает данные в собственной сессии, начатой под ней.
+    Поэтому транзакцию, зафиксированную до начала построения, оно прочитает
+    само, а изменения, зафиксированные во время построения, дождутся его
+    окончания и применятся следом. Массовый запрос к отслеживаемым таблицам
+    сбрасывает индекс: он будет построен заново при следующем обращении.
+
+    Подклассы реализуют _load(db) и _clear() и регистрируют отслеживание
+    через watch(); изменения - пары (имя метода, аргументы).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.is_built = False
+
+    def _load(self, db: Session) -> None:
+        raise NotImplementedError
+
+    def _clear(self) -> None:
+        raise NotImplementedError
+
+    def ensure_built(self) -> None:
+        """Построение индекса при первом обращении"""
+        with self._lock:
+            if self.is_built:
+                return
+            self._clear()
+            db = SessionLocal()
+            try:
+                self._load(db)
+            finally:
+                db.close()
+            self.is_built = True
+
+    def apply(self, changes: List[Tuple[str, tuple]]) -> None:
+        """Применение изменений зафиксированной транзакции (до построения не нужны)"""
+        with self._lock:
+            if not self.is_built:
+                return
+            for action, args in changes:
+                getattr(self, action)(*args)
+
+    def reset(self) -> None:
+        """Сброс индекса (перестроение при следующем обращении)"""
+        with self._lock:
+            self._clear()
+            self.is_built = False
+
+    def watch(self, models: Tuple[type, ...], collect: Callable[[Session, Any, str], Iterable[Any]]) -> None:
+        """Отслеживание изменений моделей: collect возвращает изменения объекта при flush"""
+        on_commit_changes(models, collect, self.apply, on_bulk=self.reset)
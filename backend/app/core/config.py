@@ -28,6 +28,9 @@ class Settings(BaseSettings):
     AWS_ACCESS_KEY_ID: str = ""
     AWS_SECRET_ACCESS_KEY: str = ""
     AWS_BUCKET_NAME: str = "recruit-ai-files"
+    AWS_REGION: str = ""
+    AWS_ENDPOINT_URL: str = ""  # Для S3-совместимых хранилищ (MinIO и т.п.)
+    PRESIGNED_URL_EXPIRE_SECONDS: int = 3600
     
     # Application
     DEBUG: bool = True
@@ -35,13 +38,45 @@ class Settings(BaseSettings):
     
     # File uploads
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
+    MAX_REQUEST_BODY_SIZE: int = 11 * 1024 * 1024  # Тело запроса целиком (файл + заголовки multipart), проверяется до разбора
     ALLOWED_FILE_EXTENSIONS: List[str] = [".pdf", ".docx", ".doc"]
     UPLOAD_DIRECTORY: str = "uploads"
+    STORAGE_BACKEND: str = "local"  # local или s3
+    CV_EXTRACTION_WORKERS: int = 2  # Процессы для разбора резюме
+    THUMBNAIL_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # 256MB на миниатюры аватаров
     
     # Interview settings
     INTERVIEW_DURATION_MINUTES: int = 10
     MAX_INTERVIEW_QUESTIONS: int = 8
     
+    # Analytics
+    ANALYTICS_ROLLUP_INTERVAL_SECONDS: int = 600  # Пересчет дневных агрегатов (0 - отключен)
+    ANALYTICS_ROLLUP_LATE_DAYS: int = 3  # Сколько последних дней пересчитывается (запоздавшие данные)
+    
+    # HTTP клиенты внешних платформ (общий пул соединений)
+    HTTP_POOL_SIZE: int = 100  # Всего соединений в пуле
+    HTTP_POOL_PER_HOST: int = 10  # Соединений к одному хосту
+    HTTP_DNS_CACHE_SECONDS: int = 300
+    HTTP_KEEPALIVE_SECONDS: int = 30
+    HTTP_TIMEOUT_SECONDS: int = 30  # Общий таймаут запроса
+    HTTP_CONNECT_TIMEOUT_SECONDS: int = 10
+    LINKEDIN_ENRICH_CONCURRENCY: int = 10  # Профилей LinkedIn, загружаемых одновременно
+    LINKEDIN_SEARCH_TIMEOUT_SECONDS: int = 60  # Дедлайн поиска вместе с загрузкой профилей
+    PLATFORM_RATE_PER_SECOND: float = 2.0  # Лимит запросов к платформе без собственной настройки
+    PLATFORM_BURST: int = 5
+    PLATFORM_MAX_RETRIES: int = 3  # Повторы при 429/5xx и сетевых ошибках
+    PLATFORM_BACKOFF_BASE_SECONDS: float = 0.5
+    PLATFORM_BACKOFF_MAX_SECONDS: float = 30.0
+    PLATFORM_BREAKER_FAILURES: int = 5  # Ошибок подряд до открытия circuit breaker
+    PLATFORM_BREAKER_RESET_SECONDS: int = 60  # Через сколько пробовать снова
+    HTTP_CACHE_ENABLED: bool = True  # Постоянный кэш ответов платформ с перепроверкой по ETag
+    HTTP_CACHE_PATH: str = "cache/http_cache.sqlite3"  # Файл общий для всех воркеров на хосте
+    HTTP_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    INTEGRATION_SYNC_POLL_SECONDS: int = 60  # Проверка интеграций с наступившим next_sync_at (0 - отключена)
+    INTEGRATION_SYNC_CONCURRENCY: int = 2  # Синхронизаций одновременно на узле
+    INTEGRATION_SYNC_LEASE_SECONDS: int = 900  # Аренда синхронизации (защита от двойного запуска на разных узлах)
+    INTEGRATION_SYNC_RETRY_MINUTES: int = 15  # Первый повтор после ошибки, далее удваивается до sync_interval_hours
+    
     class Config:
         case_sensitive = True
         extra = "ignore"
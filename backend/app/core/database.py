@@ -22,6 +22,16 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Базовый класс для моделей
 Base = declarative_base()
 
+def dialect_insert(connection, table):
+    """INSERT с поддержкой ON CONFLICT для PostgreSQL и SQLite (None для остальных СУБД)"""
+    if connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif connection.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(table)
+
 def get_db():
     """Dependency для получения сессии базы данных"""
     db = SessionLocal()
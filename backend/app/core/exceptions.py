@@ -37,6 +37,22 @@ class ValidationError(RecruitAIException):
     def __init__(self, message: str = "Некорректные данные"):
         super().__init__(message, 422)
 
+class PlatformUnavailableError(RecruitAIException):
+    """Внешняя платформа недоступна или превышена квота"""
+    def __init__(self, message: str = "Внешняя платформа недоступна"):
+        super().__init__(message, 503)
+
+class PlatformTimeoutError(PlatformUnavailableError):
+    """Внешняя платформа не ответила до дедлайна операции"""
+    def __init__(self, message: str = "Внешняя платформа не ответила вовремя"):
+        super().__init__(message)
+        self.status_code = 504
+
+class PlatformRequestError(RecruitAIException):
+    """Внешняя платформа отклонила запрос (токен доступа, права, параметры)"""
+    def __init__(self, message: str = "Внешняя платформа отклонила запрос"):
+        super().__init__(message, 502)
+
 def setup_exception_handlers(app: FastAPI):
     """Настройка обработчиков исключений"""
     
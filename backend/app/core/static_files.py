@@ -0,0 +1,75 @@
+"""
+Раздача загруженных файлов (/uploads)
+Сильные ETag и immutable-кеширование для файлов с именем из SHA-256,
+предсжатые gzip-варианты. Range-запросы и zero-copy отправка
+(http.response.pathsend) обеспечиваются FileResponse из Starlette
+"""
+
+import os
+import re
+from mimetypes import guess_type
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+# Имя файла в контентно-адресуемом хранилище: <sha256>.<расширение>
+CONTENT_HASH_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+# Суффикс предсжатого варианта файла
+PRECOMPRESSED_SUFFIX = ".gz"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+class UploadFileResponse(FileResponse):
+    """FileResponse с крупными чанками для больших PDF"""
+    chunk_size = 1024 * 1024
+
+class UploadStaticFiles(StaticFiles):
+    """StaticFiles для каталога uploads/"""
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        stem = os.path.splitext(os.path.basename(full_path))[0]
+        media_type = guess_type(full_path)[0] or "application/octet-stream"
+
+        headers = {}
+        etag = None
+        if CONTENT_HASH_PATTERN.fullmatch(stem):
+            # Содержимое не меняется, пока не меняется имя
+            etag = stem
+            headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            headers["cache-control"] = REVALIDATE_CACHE_CONTROL
+
+        path = full_path
+        compressed_path = full_path + PRECOMPRESSED_SUFFIX
+        if os.path.isfile(compressed_path):
+            headers["vary"] = "Accept-Encoding"
+            # Range относится к исходному содержимому, поэтому отдаем без сжатия
+            if "range" not in request_headers and "gzip" in request_headers.get("accept-encoding", ""):
+                path = compressed_path
+                stat_result = os.stat(compressed_path)
+                headers["content-encoding"] = "gzip"
+                if etag:
+                    etag = f"{etag}-gzip"
+
+        if etag:
+            headers["etag"] = f'"{etag}"'
+
+        response = UploadFileResponse(
+            path, status_code=status_code, headers=headers, media_type=media_type, stat_result=stat_result
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -10,6 +10,11 @@ from .integration import (
     PlatformIntegration, ExternalCandidate, IntegrationLog, CandidateImport,
     IntegrationPlatform, IntegrationStatus
 )
+from .skill import Skill, candidate_skills, external_candidate_skills, job_skills
+from .cv import CVExtraction
+from .upload import StoredFile
+from .company_stats import CompanyStats
+from .analytics import AnalyticsDailyRollup
 
 __all__ = [
     "User",
@@ -35,7 +40,15 @@ __all__ = [
     "IntegrationLog",
     "CandidateImport",
     "IntegrationPlatform",
-    "IntegrationStatus"
+    "IntegrationStatus",
+    "Skill",
+    "candidate_skills",
+    "external_candidate_skills",
+    "job_skills",
+    "CVExtraction",
+    "StoredFile",
+    "CompanyStats",
+    "AnalyticsDailyRollup"
 ]
 
 
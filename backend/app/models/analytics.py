@@ -0,0 +1,38 @@
+"""
+Модели аналитики
+Дневные агрегаты по вакансиям для временных рядов
+"""
+
+from sqlalchemy import Column, Integer, Float, Date, DateTime, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class AnalyticsDailyRollup(Base):
+    """События откликов и интервью по вакансии за день"""
+    __tablename__ = "analytics_daily_rollups"
+
+    day = Column(Date, primary_key=True)
+    job_id = Column(Integer, primary_key=True)
+
+    # Владелец вакансии на момент пересчета (для фильтров по компании и потоку)
+    company_id = Column(Integer, nullable=False)
+    owner_id = Column(Integer, nullable=False)  # jobs.created_by
+    stream_id = Column(Integer, nullable=True)
+
+    # События дня, каждое по своей временной метке
+    applications = Column(Integer, nullable=False, default=0)  # applied_at
+    reviewed = Column(Integer, nullable=False, default=0)  # reviewed_at
+    interviews_scheduled = Column(Integer, nullable=False, default=0)  # interview_scheduled_at
+    interviews_completed = Column(Integer, nullable=False, default=0)  # interview_completed_at
+    hires = Column(Integer, nullable=False, default=0)  # decision_at, статус accepted
+    rejections = Column(Integer, nullable=False, default=0)  # decision_at, статус rejected
+    hire_days_sum = Column(Float, nullable=False, default=0)  # Сумма дней от отклика до найма
+    invitations = Column(Integer, nullable=False, default=0)  # interview_invitations.invited_at
+
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_analytics_daily_rollups_company_day", "company_id", "day"),
+        Index("ix_analytics_daily_rollups_stream_day", "stream_id", "day"),
+        Index("ix_analytics_daily_rollups_owner_day", "owner_id", "day"),
+    )
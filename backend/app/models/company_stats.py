@@ -0,0 +1,19 @@
+"""
+Модель счетчиков компании
+Денормализованные показатели для dashboard, обновляются при изменении вакансий и откликов
+"""
+
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class CompanyStats(Base):
+    """Счетчики вакансий и откликов компании"""
+    __tablename__ = "company_stats"
+
+    company_id = Column(Integer, ForeignKey("company_profiles.id", ondelete="CASCADE"), primary_key=True)
+    total_jobs = Column(Integer, nullable=False, default=0)
+    active_jobs = Column(Integer, nullable=False, default=0)
+    total_applications = Column(Integer, nullable=False, default=0)
+    new_applications = Column(Integer, nullable=False, default=0)  # Статус applied
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
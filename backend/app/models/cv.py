@@ -0,0 +1,23 @@
+"""
+Модели обработки резюме
+Результаты извлечения текста из файлов резюме, кешируются по SHA-256 содержимого
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class CVExtraction(Base):
+    """Извлеченное содержимое резюме (одна запись на уникальное содержимое файла)"""
+    __tablename__ = "cv_extractions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False, unique=True, index=True)  # SHA-256 файла
+
+    text = Column(Text, nullable=True)
+    skills = Column(Text, nullable=True)  # JSON array as text
+    experience_years = Column(Integer, nullable=True)
+    positions = Column(Text, nullable=True)  # JSON array as text
+
+    error = Column(Text, nullable=True)  # Ошибка разбора, если файл не удалось обработать
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
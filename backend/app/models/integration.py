@@ -3,7 +3,7 @@
 LinkedIn, HH.ru, SuperJob и другие
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Enum, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Enum, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -74,6 +74,11 @@ class ExternalCandidate(Base):
     internal_user = relationship("User", foreign_keys=[internal_user_id])
     integration_id = Column(Integer, ForeignKey("platform_integrations.id"), nullable=True)
     integration = relationship("PlatformIntegration", back_populates="candidates")
+    
+    __table_args__ = (
+        # Ключ upsert при синхронизации: один кандидат на профиль платформы
+        Index("uq_external_candidates_platform_external_id", "platform", "external_id", unique=True),
+    )
 
 class PlatformIntegration(Base):
     """Модель для хранения настроек интеграции с платформами"""
@@ -99,6 +104,10 @@ class PlatformIntegration(Base):
     last_sync_at = Column(DateTime(timezone=True), nullable=True)
     next_sync_at = Column(DateTime(timezone=True), nullable=True)
     
+    # Аренда синхронизации: какой узел сейчас синхронизирует и до какого момента
+    sync_lease_owner = Column(String, nullable=True)
+    sync_lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    
     # Настройки поиска
     search_keywords = Column(Text, nullable=True)  # JSON array as text
     search_locations = Column(Text, nullable=True)  # JSON array as text
@@ -123,6 +132,11 @@ class PlatformIntegration(Base):
     # Relationships
     creator = relationship("User", foreign_keys=[created_by])
     candidates = relationship("ExternalCandidate", back_populates="integration")
+    
+    __table_args__ = (
+        # Выборка интеграций, которым пора синхронизироваться
+        Index("ix_platform_integrations_auto_sync_next_sync_at", "auto_sync", "next_sync_at"),
+    )
 
 class IntegrationLog(Base):
     """Лог операций интеграции"""
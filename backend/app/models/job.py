@@ -2,7 +2,7 @@
 Модели вакансий и приглашений на интервью
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Enum, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Enum, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -37,6 +37,7 @@ class Job(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     company_id = Column(Integer, ForeignKey("company_profiles.id"), nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)  # Автор: владелец компании или рекрутер
     
     # Основная информация
     title = Column(String, nullable=False, index=True)
@@ -121,6 +122,11 @@ class JobApplication(Base):
     candidate = relationship("CandidateProfile", back_populates="job_applications")
     interview_invitations = relationship("InterviewInvitation", back_populates="application")
 
+    __table_args__ = (
+        # Списки откликов по вакансиям с сортировкой по дате
+        Index("ix_job_applications_job_id_applied_at", "job_id", "applied_at"),
+    )
+
 class InterviewInvitation(Base):
     """Модель приглашения на интервью"""
     __tablename__ = "interview_invitations"
@@ -0,0 +1,40 @@
+"""
+Модели справочника навыков
+Нормализованные навыки и связи с кандидатами, внешними кандидатами и вакансиями
+"""
+
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Table
+from app.core.database import Base
+
+class Skill(Base):
+    """Справочник навыков"""
+    __tablename__ = "skills"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)  # Название как ввел пользователь: "FastAPI"
+    normalized_name = Column(String, nullable=False, unique=True, index=True)  # "fastapi"
+
+# Навыки кандидатов (CandidateProfile.skills)
+candidate_skills = Table(
+    "candidate_skills",
+    Base.metadata,
+    Column("candidate_id", Integer, ForeignKey("candidate_profiles.id", ondelete="CASCADE"), primary_key=True),
+    Column("skill_id", Integer, ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True, index=True),
+)
+
+# Навыки внешних кандидатов (ExternalCandidate.skills)
+external_candidate_skills = Table(
+    "external_candidate_skills",
+    Base.metadata,
+    Column("external_candidate_id", Integer, ForeignKey("external_candidates.id", ondelete="CASCADE"), primary_key=True),
+    Column("skill_id", Integer, ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True, index=True),
+)
+
+# Навыки вакансий (Job.required_skills / Job.nice_to_have_skills)
+job_skills = Table(
+    "job_skills",
+    Base.metadata,
+    Column("job_id", Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True),
+    Column("skill_id", Integer, ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True, index=True),
+    Column("is_required", Boolean, nullable=False, default=True),
+)
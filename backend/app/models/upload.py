@@ -0,0 +1,16 @@
+"""
+Модели загруженных файлов
+Счетчики ссылок на файлы в контентно-адресуемом хранилище uploads/
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class StoredFile(Base):
+    """Загруженный файл и количество записей, которые на него ссылаются"""
+    __tablename__ = "stored_files"
+
+    path = Column(String, primary_key=True)  # uploads/cv/<sha256>.pdf
+    ref_count = Column(Integer, nullable=False, default=0)  # CandidateProfile.cv_url + User.avatar_url
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())  # Последнее изменение счетчика
@@ -96,6 +96,7 @@ class CandidateProfile(Base):
     cv_filename = Column(String, nullable=True)
     cv_url = Column(String, nullable=True)
     cv_uploaded_at = Column(DateTime(timezone=True), nullable=True)
+    cv_sha256 = Column(String(64), nullable=True, index=True)  # Ключ в cv_extractions
     
     # Социальные сети
     linkedin_url = Column(String, nullable=True)
@@ -184,6 +184,25 @@ class CompanyProfile(CompanyProfileBase):
     class Config:
         from_attributes = True
 
+class CVExtraction(BaseModel):
+    """Содержимое резюме, извлеченное из файла"""
+    status: str = "pending"  # pending, done, failed
+    skills: List[str] = []
+    experience_years: Optional[int] = None
+    positions: List[str] = []
+    text: Optional[str] = None
+    error: Optional[str] = None
+
+    @validator('skills', 'positions', pre=True)
+    def parse_json_list(cls, v):
+        if isinstance(v, str):
+            import json
+            return json.loads(v)
+        return v or []
+
+    class Config:
+        from_attributes = True
+
 # Combined schemas
 class CandidateWithProfile(User):
     """Кандидат с профилем"""
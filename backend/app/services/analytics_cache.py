@@ -0,0 +1,49 @@
+"""
+Кэш результатов аналитики
+Ключ - эндпоинт и область данных (роль, поток, период). Кэш сбрасывается
+после commit транзакций, изменивших вакансии, отклики, приглашения, потоки
+или дневные агрегаты
+"""
+
+from typing import Any, Callable, Hashable, Optional
+
+from sqlalchemy import inspect
+
+from app.core.cache import TTLCache
+from app.core.commit_hooks import on_commit_if_changed
+from app.models.analytics import AnalyticsDailyRollup
+from app.models.job import InterviewInvitation, Job, JobApplication
+from app.models.user import RecruitmentStream, User, UserRole
+
+analytics_cache = TTLCache(ttl_seconds=120, max_entries=1024)
+
+WATCHED_MODELS = (Job, JobApplication, InterviewInvitation, RecruitmentStream, AnalyticsDailyRollup)
+
+def scope_key(
+    name: str,
+    current_user: User,
+    stream_id: Optional[int] = None,
+    period_days: Optional[int] = None
+) -> Hashable:
+    """
+    Ключ кэша для области данных пользователя
+
+    Рекрутер видит только свои данные, поэтому в его ключ входит id пользователя.
+    """
+    user_id = current_user.id if current_user.role == UserRole.RECRUITER else None
+    return (name, current_user.role.value, stream_id, user_id, period_days)
+
+async def cached(key: Hashable, compute: Callable[[], Any]) -> Any:
+    """Результат из кэша или вычисление в пуле потоков (одно на ключ, остальные ждут в event loop)"""
+    return await analytics_cache.get_or_compute_async(key, compute)
+
+# ========== ИНВАЛИДАЦИЯ ==========
+
+def _scope_changed(user: User) -> bool:
+    """Из измененных пользователей важны только переходы между потоками и смена роли"""
+    if not isinstance(user, User):
+        return True
+    attrs = inspect(user).attrs
+    return attrs.stream_id.history.has_changes() or attrs.role.history.has_changes()
+
+on_commit_if_changed(WATCHED_MODELS + (User,), analytics_cache.invalidate, is_relevant=_scope_changed)
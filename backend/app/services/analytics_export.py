@@ -0,0 +1,233 @@
+"""
+Потоковый экспорт аналитики
+История откликов и приглашений на интервью читается из БД пачками (yield_per)
+и кодируется по частям, поэтому память не зависит от объема выгрузки
+"""
+
+import csv
+import io
+import json
+import logging
+import zlib
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from app.core.database import SessionLocal
+from app.models.job import InterviewInvitation, Job, JobApplication
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    logger.warning("pyarrow не установлен, экспорт в Parquet отключен")
+
+# Строк из БД за одно чтение и строк в одной пачке Parquet
+BATCH_SIZE = 5000
+
+# Формат -> (MIME тип, расширение файла)
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "json": ("application/json", "json"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Набор данных -> столбцы (имя, выражение, тип Arrow)
+DATASETS: Dict[str, List[Tuple[str, Any, str]]] = {
+    "applications": [
+        ("application_id", JobApplication.id, "int64"),
+        ("job_id", JobApplication.job_id, "int64"),
+        ("job_title", Job.title, "string"),
+        ("company_id", Job.company_id, "int64"),
+        ("owner_id", User.id, "int64"),
+        ("owner_stream_id", User.stream_id, "int64"),
+        ("candidate_id", JobApplication.candidate_id, "int64"),
+        ("status", JobApplication.status, "string"),
+        ("applied_at", JobApplication.applied_at, "timestamp"),
+        ("reviewed_at", JobApplication.reviewed_at, "timestamp"),
+        ("interview_scheduled_at", JobApplication.interview_scheduled_at, "timestamp"),
+        ("interview_completed_at", JobApplication.interview_completed_at, "timestamp"),
+        ("decision_at", JobApplication.decision_at, "timestamp"),
+        ("expected_salary", JobApplication.expected_salary, "int64"),
+    ],
+    "interviews": [
+        ("invitation_id", InterviewInvitation.id, "int64"),
+        ("job_id", InterviewInvitation.job_id, "int64"),
+        ("job_title", Job.title, "string"),
+        ("company_id", Job.company_id, "int64"),
+        ("owner_id", User.id, "int64"),
+        ("owner_stream_id", User.stream_id, "int64"),
+        ("candidate_id", InterviewInvitation.candidate_id, "int64"),
+        ("application_id", InterviewInvitation.application_id, "int64"),
+        ("status", InterviewInvitation.status, "string"),
+        ("interview_language", InterviewInvitation.interview_language, "string"),
+        ("invited_at", InterviewInvitation.invited_at, "timestamp"),
+        ("expires_at", InterviewInvitation.expires_at, "timestamp"),
+        ("scheduled_at", InterviewInvitation.scheduled_at, "timestamp"),
+        ("started_at", InterviewInvitation.started_at, "timestamp"),
+        ("completed_at", InterviewInvitation.completed_at, "timestamp"),
+        ("reviewed_at", InterviewInvitation.reviewed_at, "timestamp"),
+    ],
+}
+
+def is_parquet_enabled() -> bool:
+    return pa is not None
+
+def _value(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+def _rows(dataset: str, scope) -> Iterator[Tuple]:
+    """
+    Строки набора данных в области scope (условие на владельца вакансии)
+
+    Собственная сессия: сессия запроса закрывается до отправки тела ответа.
+    """
+    columns = DATASETS[dataset]
+    model = JobApplication if dataset == "applications" else InterviewInvitation
+    db = SessionLocal()
+    try:
+        query = db.query(*(column for _, column, _ in columns)).select_from(model).join(
+            Job, model.job_id == Job.id
+        ).join(User, Job.created_by == User.id)
+        if scope is not None:
+            query = query.filter(scope)
+        for row in query.order_by(model.id).yield_per(BATCH_SIZE):
+            yield tuple(_value(value) for value in row)
+    finally:
+        db.close()
+
+def _batches(rows: Iterable[Tuple]) -> Iterator[List[Tuple]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# ========== КОДИРОВАНИЕ ==========
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Тип {type(value).__name__} не сериализуется в JSON")
+
+def _encode_csv(names: List[str], rows: Iterable[Tuple]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for batch in _batches(rows):
+        writer.writerows(
+            [value.isoformat() if isinstance(value, (datetime, date)) else value for value in row]
+            for row in batch
+        )
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def _encode_ndjson(names: List[str], rows: Iterable[Tuple]) -> Iterator[bytes]:
+    for batch in _batches(rows):
+        yield "".join(
+            json.dumps(dict(zip(names, row)), ensure_ascii=False, default=_json_default) + "\n"
+            for row in batch
+        ).encode("utf-8")
+
+def _encode_json(names: List[str], rows: Iterable[Tuple]) -> Iterator[bytes]:
+    yield b"["
+    separator = ""
+    for batch in _batches(rows):
+        parts = []
+        for row in batch:
+            parts.append(separator + json.dumps(dict(zip(names, row)), ensure_ascii=False, default=_json_default))
+            separator = ","
+        yield "".join(parts).encode("utf-8")
+    yield b"]"
+
+class _ChunkSink:
+    """Файлоподобный приемник для ParquetWriter, отдающий записанные байты по частям"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+_ARROW_TYPES = {
+    "int64": lambda: pa.int64(),
+    "string": lambda: pa.string(),
+    "timestamp": lambda: pa.timestamp("us"),
+}
+
+def _encode_parquet(dataset: str, rows: Iterable[Tuple], compression: str) -> Iterator[bytes]:
+    """Parquet по группам строк: каждая пачка из БД - отдельная row group"""
+    columns = DATASETS[dataset]
+    schema = pa.schema([(name, _ARROW_TYPES[kind]()) for name, _, kind in columns])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression=compression) as writer:
+        for batch in _batches(rows):
+            arrays = [
+                pa.array(
+                    [row[index].replace(tzinfo=None) if kind == "timestamp" and row[index] is not None else row[index]
+                     for row in batch],
+                    type=schema.field(index).type
+                )
+                for index, (_, _, kind) in enumerate(columns)
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+def _gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 - формат gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_stream(dataset: str, format: str, scope=None, gzip: bool = False) -> Iterator[bytes]:
+    """
+    Поток байтов выгрузки
+
+    Для Parquet gzip применяется как кодек столбцов внутри файла
+    (файл остается читаемым), для остальных форматов - ко всему потоку.
+    """
+    names = [name for name, _, _ in DATASETS[dataset]]
+    rows = _rows(dataset, scope)
+    if format == "parquet":
+        return _encode_parquet(dataset, rows, "gzip" if gzip else "snappy")
+    encoders = {"csv": _encode_csv, "ndjson": _encode_ndjson, "json": _encode_json}
+    chunks = encoders[format](names, rows)
+    return _gzip(chunks) if gzip else chunks
+
+def export_filename(dataset: str, format: str, gzip: bool = False) -> str:
+    extension = EXPORT_FORMATS[format][1]
+    suffix = ".gz" if gzip and format != "parquet" else ""
+    return f"{dataset}_{datetime.utcnow():%Y%m%d_%H%M%S}.{extension}{suffix}"
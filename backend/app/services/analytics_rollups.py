@@ -0,0 +1,186 @@
+"""
+Дневные агрегаты аналитики
+Пересчет analytics_daily_rollups по дням: фоновая задача обновляет последние
+дни (запоздавшие данные), backfill заполняет историю пачками дней
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.analytics import AnalyticsDailyRollup
+from app.models.job import InterviewInvitation, Job, JobApplication, JobApplicationStatus
+from app.models.user import User
+from app.services.recruitment_analytics import days_between, owner_stream_id
+
+logger = logging.getLogger(__name__)
+
+# Дней в одной транзакции при backfill
+BACKFILL_CHUNK_DAYS = 31
+
+# Вакансий в одном IN (...) при загрузке владельцев
+BATCH_SIZE = 500
+
+# Счетчик -> (временная метка события, столбец вакансии, дополнительное условие)
+EVENTS = {
+    "applications": (JobApplication.applied_at, JobApplication.job_id, None),
+    "reviewed": (JobApplication.reviewed_at, JobApplication.job_id, None),
+    "interviews_scheduled": (JobApplication.interview_scheduled_at, JobApplication.job_id, None),
+    "interviews_completed": (JobApplication.interview_completed_at, JobApplication.job_id, None),
+    "hires": (JobApplication.decision_at, JobApplication.job_id, JobApplication.status == JobApplicationStatus.ACCEPTED),
+    "rejections": (JobApplication.decision_at, JobApplication.job_id, JobApplication.status == JobApplicationStatus.REJECTED),
+    "invitations": (InterviewInvitation.invited_at, InterviewInvitation.job_id, None),
+}
+
+_scheduler_task: Optional[asyncio.Task] = None
+
+def utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+def _as_date(value) -> date:
+    """func.date() возвращает строку в SQLite и date в PostgreSQL"""
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def _owners(db: Session, job_ids) -> Dict[int, Tuple[int, int, Optional[int]]]:
+    """Вакансия -> (компания, автор, поток автора)"""
+    job_ids = list(job_ids)
+    owners = {}
+    for start in range(0, len(job_ids), BATCH_SIZE):
+        rows = db.query(
+            Job.id, Job.company_id, User.id, owner_stream_id()
+        ).join(
+            User, Job.created_by == User.id
+        ).filter(Job.id.in_(job_ids[start:start + BATCH_SIZE]))
+        owners.update((job_id, (company_id, owner_id, stream_id)) for job_id, company_id, owner_id, stream_id in rows)
+    return owners
+
+def _compute(db: Session, start: date, end: date) -> Dict[Tuple[date, int], Dict[str, float]]:
+    """Счетчики (день, вакансия) за дни start..end включительно, по запросу на тип события"""
+    since = datetime.combine(start, time.min)
+    until = datetime.combine(end + timedelta(days=1), time.min)
+    counters: Dict[Tuple[date, int], Dict[str, float]] = defaultdict(lambda: defaultdict(int))
+
+    for name, (timestamp, job_column, condition) in EVENTS.items():
+        day = func.date(timestamp)
+        columns = [day, job_column, func.count()]
+        if name == "hires":
+            columns.append(func.sum(days_between(db, JobApplication.applied_at, JobApplication.decision_at)))
+        query = db.query(*columns).filter(timestamp >= since, timestamp < until)
+        if condition is not None:
+            query = query.filter(condition)
+        for row in query.group_by(day, job_column):
+            key = (_as_date(row[0]), row[1])
+            counters[key][name] += row[2]
+            if name == "hires":
+                counters[key]["hire_days_sum"] += float(row[3] or 0)
+    return counters
+
+def rebuild_range(db: Session, start: date, end: date) -> int:
+    """
+    Пересчет агрегатов за дни start..end включительно в одной транзакции
+
+    Returns:
+        Количество записанных строк
+    """
+    counters = _compute(db, start, end)
+    owners = _owners(db, {job_id for _, job_id in counters})
+
+    rows = []
+    for (day, job_id), values in counters.items():
+        owner = owners.get(job_id)
+        if owner is None:
+            continue  # Вакансия удалена
+        company_id, owner_id, stream_id = owner
+        rows.append({
+            "day": day,
+            "job_id": job_id,
+            "company_id": company_id,
+            "owner_id": owner_id,
+            "stream_id": stream_id,
+            "hire_days_sum": values.get("hire_days_sum", 0),
+            **{name: values.get(name, 0) for name in EVENTS},
+        })
+
+    db.query(AnalyticsDailyRollup).filter(
+        AnalyticsDailyRollup.day >= start, AnalyticsDailyRollup.day <= end
+    ).delete(synchronize_session=False)
+    db.bulk_insert_mappings(AnalyticsDailyRollup, rows)
+    db.commit()
+    return len(rows)
+
+def remove_deleted_jobs(db: Session) -> int:
+    """Удаление строк удаленных вакансий (за пределами окна пересчета)"""
+    deleted = db.query(AnalyticsDailyRollup).filter(
+        ~AnalyticsDailyRollup.job_id.in_(select(Job.id))
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+def backfill(db: Session, days: int, end: Optional[date] = None) -> Dict[str, int]:
+    """Пересчет последних days дней пачками по BACKFILL_CHUNK_DAYS"""
+    end = end or utc_today()
+    start = end - timedelta(days=days - 1)
+    stats = {"days": days, "rows": 0}
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=BACKFILL_CHUNK_DAYS - 1), end)
+        stats["rows"] += rebuild_range(db, chunk_start, chunk_end)
+        chunk_start = chunk_end + timedelta(days=1)
+    stats["removed"] = remove_deleted_jobs(db)
+    return stats
+
+def refresh_recent(days: Optional[int] = None) -> int:
+    """Пересчет последних дней с учетом запоздавших данных (собственная сессия)"""
+    days = days or settings.ANALYTICS_ROLLUP_LATE_DAYS
+    db = SessionLocal()
+    try:
+        today = utc_today()
+        rows = rebuild_range(db, today - timedelta(days=days - 1), today)
+        remove_deleted_jobs(db)
+        return rows
+    except IntegrityError:
+        # Параллельный пересчет в другом процессе уже записал эти дни
+        db.rollback()
+        return 0
+    finally:
+        db.close()
+
+# ========== ФОНОВАЯ ЗАДАЧА ==========
+
+async def _run_scheduler(interval: int) -> None:
+    while True:
+        try:
+            await run_in_threadpool(refresh_recent)
+        except Exception as e:
+            logger.warning(f"Не удалось пересчитать дневные агрегаты: {e}")
+        await asyncio.sleep(interval)
+
+def start_scheduler() -> None:
+    """Запуск периодического пересчета (ANALYTICS_ROLLUP_INTERVAL_SECONDS, 0 - отключен)"""
+    global _scheduler_task
+    interval = settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS
+    if interval > 0 and _scheduler_task is None:
+        _scheduler_task = asyncio.create_task(_run_scheduler(interval))
+
+async def stop_scheduler() -> None:
+    global _scheduler_task
+    if _scheduler_task is not None:
+        _scheduler_task.cancel()
+        try:
+            await _scheduler_task
+        except asyncio.CancelledError:
+            pass
+        _scheduler_task = None
@@ -0,0 +1,180 @@
+"""
+Счетчики dashboard компании
+Агрегатный запрос по вакансиям и откликам и инкрементальные счетчики company_stats,
+которые обновляются в той же транзакции, что и вакансии/отклики
+"""
+
+from typing import Dict, Optional
+
+from sqlalchemy import case, event, func, inspect, select, text, update
+from sqlalchemy.orm import Session
+
+from app.core.database import dialect_insert
+from app.models.company_stats import CompanyStats
+from app.models.job import Job, JobApplication, JobApplicationStatus, JobStatus
+
+COUNTERS = ("total_jobs", "active_jobs", "total_applications", "new_applications")
+
+def _is(value, member) -> bool:
+    """Сравнение статуса (enum или строковое значение)"""
+    return value == member or value == member.value
+
+# ========== АГРЕГАТ ==========
+
+def compute_company_stats(db: Session, company_id: int) -> Dict[str, int]:
+    """Все показатели одним запросом с условными COUNT"""
+    row = db.query(
+        func.count(func.distinct(Job.id)),
+        func.count(func.distinct(case((Job.status == JobStatus.ACTIVE, Job.id)))),
+        func.count(JobApplication.id),
+        func.count(case((JobApplication.status == JobApplicationStatus.APPLIED, JobApplication.id))),
+    ).select_from(Job).outerjoin(
+        JobApplication, JobApplication.job_id == Job.id
+    ).filter(Job.company_id == company_id).one()
+    return dict(zip(COUNTERS, row))
+
+def get_company_stats(db: Session, company_id: int) -> Dict[str, int]:
+    """
+    Показатели для dashboard
+
+    Обычно читается одна строка company_stats. Если ее еще нет, она создается
+    и заполняется агрегатом, дальше ее поддерживают хуки записи.
+    """
+    stats = db.get(CompanyStats, company_id)
+    if stats is not None:
+        return {name: getattr(stats, name) for name in COUNTERS}
+    return _create_company_stats(db, company_id)
+
+def _create_company_stats(db: Session, company_id: int) -> Dict[str, int]:
+    """
+    Создание строки счетчиков и пересчет в одной транзакции
+
+    Пока строки нет, UPDATE из хуков записи ничего не меняет, поэтому пересчет
+    не должен пропустить ни одной записи вакансий и откликов: транзакция сначала
+    дожидается уже идущих записей и не пускает новые до commit (PostgreSQL -
+    LOCK TABLE ... IN SHARE MODE, SQLite - блокировка записи базы первой
+    вставкой). Записи после commit находят строку и обновляют ее хуками.
+    """
+    # Новая транзакция: снимок чтения не должен быть старше блокировки
+    db.commit()
+    table = CompanyStats.__table__
+    connection = db.connection()
+    if connection.dialect.name == "postgresql":
+        db.execute(text(f"LOCK TABLE {Job.__tablename__}, {JobApplication.__tablename__} IN SHARE MODE"))
+
+    stmt = dialect_insert(connection, table)
+    if stmt is not None:
+        db.execute(stmt.values(company_id=company_id, **dict.fromkeys(COUNTERS, 0)).on_conflict_do_nothing(
+            index_elements=["company_id"]
+        ))
+    elif db.get(CompanyStats, company_id) is None:
+        db.add(CompanyStats(company_id=company_id, **dict.fromkeys(COUNTERS, 0)))
+        db.flush()
+
+    values = compute_company_stats(db, company_id)
+    db.execute(update(table).where(table.c.company_id == company_id).values(updated_at=func.now(), **values))
+    db.commit()
+    return values
+
+def rebuild_company_stats(db: Session, company_id: Optional[int] = None) -> int:
+    """Пересчет счетчиков (всех компаний или одной) по текущим данным"""
+    query = db.query(Job.company_id).distinct()
+    if company_id is not None:
+        query = query.filter(Job.company_id == company_id)
+    company_ids = [value for (value,) in query]
+
+    stale = db.query(CompanyStats)
+    if company_id is not None:
+        stale = stale.filter(CompanyStats.company_id == company_id)
+    stale.delete(synchronize_session=False)
+
+    db.bulk_insert_mappings(CompanyStats, [
+        {"company_id": value, **compute_company_stats(db, value)} for value in company_ids
+    ])
+    db.commit()
+    return len(company_ids)
+
+# ========== ИНКРЕМЕНТАЛЬНОЕ ОБНОВЛЕНИЕ ==========
+
+def _apply(connection, company_id, deltas: Dict[str, int]) -> None:
+    """UPDATE company_stats SET counter = counter + delta (строки нет - нечего обновлять)"""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if company_id is None or not deltas:
+        return
+    table = CompanyStats.__table__
+    if not isinstance(company_id, int):
+        # Подзапрос: компания вакансии отклика
+        company_id = company_id.scalar_subquery()
+    connection.execute(
+        update(table).where(table.c.company_id == company_id).values(
+            updated_at=func.now(),
+            **{name: table.c[name] + delta for name, delta in deltas.items()}
+        )
+    )
+
+def _old_and_new(target, *attributes):
+    """Значения атрибутов до и после изменения"""
+    state = inspect(target)
+    old, new = [], []
+    for attribute in attributes:
+        history = state.attrs[attribute].history
+        current = getattr(target, attribute)
+        new.append(current)
+        old.append(history.deleted[0] if history.deleted else current)
+    return old, new
+
+def _job_deltas(status, sign: int) -> Dict[str, int]:
+    return {"total_jobs": sign, "active_jobs": sign if _is(status, JobStatus.ACTIVE) else 0}
+
+def _application_deltas(status, sign: int) -> Dict[str, int]:
+    return {
+        "total_applications": sign,
+        "new_applications": sign if _is(status, JobApplicationStatus.APPLIED) else 0,
+    }
+
+def _job_company(job_id):
+    return select(Job.company_id).where(Job.id == job_id)
+
+@event.listens_for(Job, "after_insert")
+def _job_inserted(mapper, connection, target):
+    _apply(connection, target.company_id, _job_deltas(target.status, 1))
+
+@event.listens_for(Job, "after_update")
+def _job_updated(mapper, connection, target):
+    (old_company, old_status), (new_company, new_status) = _old_and_new(target, "company_id", "status")
+    if old_company == new_company and _is(old_status, JobStatus.ACTIVE) == _is(new_status, JobStatus.ACTIVE):
+        return
+    _apply(connection, old_company, _job_deltas(old_status, -1))
+    _apply(connection, new_company, _job_deltas(new_status, 1))
+
+@event.listens_for(Job, "after_delete")
+def _job_deleted(mapper, connection, target):
+    _apply(connection, target.company_id, _job_deltas(target.status, -1))
+
+@event.listens_for(JobApplication, "after_insert")
+def _application_inserted(mapper, connection, target):
+    _apply(connection, _job_company(target.job_id), _application_deltas(target.status, 1))
+
+@event.listens_for(JobApplication, "after_update")
+def _application_updated(mapper, connection, target):
+    (old_job, old_status), (new_job, new_status) = _old_and_new(target, "job_id", "status")
+    if old_job == new_job and _is(old_status, JobApplicationStatus.APPLIED) == _is(new_status, JobApplicationStatus.APPLIED):
+        return
+    _apply(connection, _job_company(old_job), _application_deltas(old_status, -1))
+    _apply(connection, _job_company(new_job), _application_deltas(new_status, 1))
+
+@event.listens_for(JobApplication, "after_delete")
+def _application_deleted(mapper, connection, target):
+    _apply(connection, _job_company(target.job_id), _application_deltas(target.status, -1))
+
+def discount_job_applications(db: Session, job: Job) -> None:
+    """
+    Вычитание откликов вакансии перед массовым удалением через query.delete()
+
+    Массовое удаление не вызывает хуки маппера, поэтому вызывается явно.
+    """
+    total, applied = db.query(
+        func.count(JobApplication.id),
+        func.count(case((JobApplication.status == JobApplicationStatus.APPLIED, JobApplication.id))),
+    ).filter(JobApplication.job_id == job.id).one()
+    _apply(db.connection(), job.company_id, {"total_applications": -total, "new_applications": -applied})
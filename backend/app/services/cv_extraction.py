@@ -0,0 +1,220 @@
+"""
+Извлечение содержимого резюме
+Разбор файлов в пуле процессов с кешем результатов по SHA-256 содержимого
+"""
+
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.static_files import CONTENT_HASH_PATTERN
+from app.models.cv import CVExtraction
+from app.models.user import CandidateProfile
+from app.services import cv_parser
+from app.services.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+# Размер пачки для IN (...) и промежуточных commit при пакетной обработке
+BATCH_SIZE = 500
+
+# Сбои окружения (хранилище, пул процессов, нет файла или библиотеки): результат
+# не сохраняется, чтобы файл был разобран повторно. Остальные ошибки - ошибки разбора
+TRANSIENT_ERRORS = (OSError, BrokenProcessPool, ImportError)
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+# Хеши, которые обрабатываются прямо сейчас (одинаковые файлы разбираются один раз)
+_in_flight: Set[str] = set()
+
+def get_executor() -> ProcessPoolExecutor:
+    """Общий пул процессов (создается при первом обращении)"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.CV_EXTRACTION_WORKERS)
+    return _executor
+
+def shutdown_executor() -> None:
+    """Остановка пула процессов при завершении приложения (и после поломки пула)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+def get_extraction(db: Session, content_hash: Optional[str]) -> Optional[CVExtraction]:
+    """Результат извлечения по хешу содержимого"""
+    if not content_hash:
+        return None
+    return db.query(CVExtraction).filter(CVExtraction.content_hash == content_hash).first()
+
+def _build_record(content_hash: str, result: Optional[Dict[str, Any]], error: Optional[str]) -> CVExtraction:
+    result = result or {}
+    return CVExtraction(
+        content_hash=content_hash,
+        text=result.get("text"),
+        skills=json.dumps(result.get("skills", []), ensure_ascii=False),
+        experience_years=result.get("experience_years"),
+        positions=json.dumps(result.get("positions", []), ensure_ascii=False),
+        error=error
+    )
+
+# ========== ОБРАБОТКА ПОСЛЕ ЗАГРУЗКИ ==========
+
+def _is_cached(content_hash: str) -> bool:
+    db = SessionLocal()
+    try:
+        return db.query(CVExtraction.id).filter(CVExtraction.content_hash == content_hash).first() is not None
+    finally:
+        db.close()
+
+def _store(content_hash: str, result: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+    db = SessionLocal()
+    try:
+        db.add(_build_record(content_hash, result, error))
+        db.commit()
+    except IntegrityError:
+        # Тот же файл уже обработан параллельно
+        db.rollback()
+    finally:
+        db.close()
+
+async def process_cv(path: str, content_hash: str) -> None:
+    """
+    Фоновая задача после загрузки резюме
+
+    Если содержимое уже разбиралось (повторная загрузка, дубликат), ничего не делает.
+    Иначе файл разбирается в пуле процессов и результат сохраняется в cv_extractions.
+    Ошибка разбора сохраняется; при сбое хранилища или окружения (TRANSIENT_ERRORS)
+    ничего не сохраняется, и следующая загрузка или extract_cvs.py повторят разбор.
+    """
+    if content_hash in _in_flight:
+        return
+    _in_flight.add(content_hash)
+    try:
+        if await run_in_threadpool(_is_cached, content_hash):
+            return
+
+        storage = get_storage()
+        loop = asyncio.get_running_loop()
+        try:
+            local_path = await run_in_threadpool(storage.fetch, path)
+        except Exception as e:
+            # Любой сбой хранилища - не ошибка файла
+            logger.warning(f"Резюме {path} не получено из хранилища, будет повторено: {e!r}")
+            return
+        try:
+            result = await loop.run_in_executor(get_executor(), cv_parser.extract_cv, local_path)
+            error = None
+        except TRANSIENT_ERRORS as e:
+            if isinstance(e, BrokenProcessPool):
+                shutdown_executor()
+            logger.warning(f"Резюме {path} не обработано, будет повторено: {e!r}")
+            return
+        except Exception as e:
+            logger.warning(f"Не удалось разобрать резюме {path}: {e}")
+            result, error = None, str(e)
+        finally:
+            await run_in_threadpool(storage.release, local_path)
+
+        await run_in_threadpool(_store, content_hash, result, error)
+    finally:
+        _in_flight.discard(content_hash)
+
+# ========== ПАКЕТНАЯ ОБРАБОТКА ==========
+
+def _known_hash(profile: CandidateProfile) -> Optional[str]:
+    """Хеш без чтения файла: сохраненный или из имени файла в хранилище"""
+    if profile.cv_sha256:
+        return profile.cv_sha256
+    stem = os.path.splitext(os.path.basename(profile.cv_url))[0]
+    return stem if CONTENT_HASH_PATTERN.fullmatch(stem) else None
+
+def backfill_extractions(db: Session, workers: Optional[int] = None, force: bool = False) -> Dict[str, int]:
+    """
+    Обработка уже загруженных резюме
+
+    Хеши (для файлов, сохраненных до контентной адресации) и разбор файлов
+    считаются параллельно в пуле процессов, одинаковые файлы разбираются
+    один раз, закешированные пропускаются.
+    """
+    storage = get_storage()
+    profiles = db.query(CandidateProfile).filter(CandidateProfile.cv_url.isnot(None)).all()
+    existing = [profile for profile in profiles if storage.exists(profile.cv_url)]
+    stats = {
+        "profiles": len(profiles),
+        "missing_files": len(profiles) - len(existing),
+        "unique_files": 0,
+        "cached": 0,
+        "extracted": 0,
+        "failed": 0,
+    }
+    if not existing:
+        return stats
+
+    with ProcessPoolExecutor(max_workers=workers or settings.CV_EXTRACTION_WORKERS) as pool:
+        unhashed = []
+        for profile in existing:
+            profile.cv_sha256 = _known_hash(profile)
+            if profile.cv_sha256 is None:
+                unhashed.append(profile)
+
+        if unhashed:
+            with ExitStack() as stack:
+                paths = [stack.enter_context(storage.local_copy(profile.cv_url)) for profile in unhashed]
+                for profile, content_hash in zip(unhashed, pool.map(cv_parser.hash_file, paths, chunksize=16)):
+                    profile.cv_sha256 = content_hash
+        db.commit()
+
+        by_hash: Dict[str, str] = {}
+        for profile in existing:
+            by_hash.setdefault(profile.cv_sha256, profile.cv_url)
+        stats["unique_files"] = len(by_hash)
+
+        hashes = list(by_hash)
+        cached = set()
+        for start in range(0, len(hashes), BATCH_SIZE):
+            batch = hashes[start:start + BATCH_SIZE]
+            query = db.query(CVExtraction).filter(CVExtraction.content_hash.in_(batch))
+            if force:
+                query.delete(synchronize_session=False)
+            else:
+                cached.update(content_hash for (content_hash,) in query.with_entities(CVExtraction.content_hash))
+        db.commit()
+        stats["cached"] = len(cached)
+
+        futures = {}
+        for content_hash, key in by_hash.items():
+            if content_hash not in cached:
+                local_path = storage.fetch(key)
+                futures[pool.submit(cv_parser.extract_cv, local_path)] = (content_hash, local_path)
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            content_hash, local_path = futures[future]
+            storage.release(local_path)
+            try:
+                result, error = future.result(), None
+                stats["extracted"] += 1
+            except TRANSIENT_ERRORS:
+                # Не сохраняем - файл будет разобран при следующем запуске
+                stats["failed"] += 1
+                continue
+            except Exception as e:
+                result, error = None, str(e)
+                stats["failed"] += 1
+            db.add(_build_record(content_hash, result, error))
+            if done % BATCH_SIZE == 0:
+                db.commit()
+        db.commit()
+
+    return stats
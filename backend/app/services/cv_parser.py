@@ -0,0 +1,146 @@
+"""
+Извлечение текста и структурированных данных из резюме (.pdf/.docx/.doc)
+Модуль без зависимостей от БД - функции выполняются в отдельных процессах
+"""
+
+import hashlib
+import logging
+import re
+import zipfile
+from typing import Any, Dict, List, Optional
+from xml.etree import ElementTree
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+    logger.warning("pypdf не установлен, извлечение текста из PDF отключено")
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Навыки, которые ищем в тексте резюме
+COMMON_SKILLS = [
+    "Python", "JavaScript", "TypeScript", "Java", "Kotlin", "Swift", "C++", "C#", "PHP", "Ruby", "Go", "Rust", "Scala",
+    "React", "Vue.js", "Angular", "Next.js", "Node.js", "Django", "Flask", "FastAPI", "Spring", "Laravel", ".NET",
+    "SQL", "MySQL", "PostgreSQL", "MongoDB", "Redis", "SQLite", "Elasticsearch", "Kafka", "RabbitMQ",
+    "Docker", "Kubernetes", "AWS", "Azure", "Google Cloud", "Terraform", "Ansible", "Jenkins", "CI/CD",
+    "Git", "Linux", "HTML", "CSS", "SASS", "GraphQL", "REST API", "Microservices",
+    "Android", "iOS", "React Native", "Flutter",
+    "Machine Learning", "Data Science", "Pandas", "NumPy", "TensorFlow", "PyTorch",
+    "Figma", "Photoshop", "Selenium", "Cypress", "Jira",
+]
+
+# Должности, которые ищем в тексте резюме
+POSITION_PATTERN = re.compile(
+    r"\b((?:senior|middle|junior|lead|principal|staff|head of)?\s*"
+    r"(?-i:[A-Z][A-Za-z.+#/]*\s){0,2}"
+    r"(?:developer|engineer|programmer|architect|designer|analyst|manager|tester|scientist|"
+    r"разработчик|программист|инженер|аналитик|дизайнер|тестировщик|менеджер))\b",
+    re.IGNORECASE
+)
+
+EXPERIENCE_PATTERNS = [
+    r"(\d{1,2})\+?\s*(?:года|год|лет)\s*(?:коммерческого\s*)?опыта",
+    r"опыт\s*(?:работы)?\s*(?:более|от)?\s*(\d{1,2})\+?\s*(?:года|год|лет)",
+    r"стаж\s*(\d{1,2})\s*(?:года|год|лет)",
+    r"(\d{1,2})\+?\s*years?\s*(?:of\s*)?(?:commercial\s*|professional\s*)?experience",
+    r"experience\s*(?:of)?\s*(\d{1,2})\+?\s*years?",
+]
+
+def hash_file(path: str) -> str:
+    """SHA-256 содержимого файла"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# ========== ИЗВЛЕЧЕНИЕ ТЕКСТА ==========
+
+def _docx_text(path: str) -> str:
+    """Текст из .docx (word/document.xml)"""
+    namespace = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+    paragraphs = []
+    for paragraph in root.iter(f"{namespace}p"):
+        text = "".join(node.text or "" for node in paragraph.iter(f"{namespace}t"))
+        if text:
+            paragraphs.append(text)
+    return "\n".join(paragraphs)
+
+def _pdf_text(path: str) -> str:
+    """Текст из .pdf (pypdf: сжатые потоки, CID-шрифты)"""
+    if PdfReader is None:
+        raise ImportError("pypdf не установлен")
+    reader = PdfReader(path)
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+def _doc_text(path: str) -> str:
+    """Текст из .doc (бинарный формат Word) - печатные фрагменты в UTF-16LE"""
+    with open(path, "rb") as f:
+        data = f.read()
+    runs = re.findall(rb"(?:[\x20-\x7e\x0d]\x00|[\x10-\x4f]\x04){4,}", data)
+    return "\n".join(run.decode("utf-16le", errors="ignore") for run in runs)
+
+def extract_text(path: str) -> str:
+    """Извлечение текста из файла резюме по расширению"""
+    lowered = path.lower()
+    if lowered.endswith(".docx"):
+        text = _docx_text(path)
+    elif lowered.endswith(".pdf"):
+        text = _pdf_text(path)
+    elif lowered.endswith(".doc"):
+        text = _doc_text(path)
+    else:
+        raise ValueError(f"Неподдерживаемый формат резюме: {path}")
+    return re.sub(r"[ \t]+", " ", text).strip()
+
+# ========== СТРУКТУРИРОВАННЫЕ ДАННЫЕ ==========
+
+def extract_skills(text: str) -> List[str]:
+    """Навыки из списка COMMON_SKILLS, встречающиеся в тексте"""
+    found = []
+    for skill in COMMON_SKILLS:
+        pattern = r"(?<![\w.+#])" + re.escape(skill) + r"(?![\w+#])"
+        if re.search(pattern, text, re.IGNORECASE):
+            found.append(skill)
+    return found
+
+def extract_experience_years(text: str) -> Optional[int]:
+    """Количество лет опыта (максимальное найденное значение)"""
+    years = []
+    for pattern in EXPERIENCE_PATTERNS:
+        years.extend(int(value) for value in re.findall(pattern, text, re.IGNORECASE))
+    years = [value for value in years if value <= 50]
+    return max(years) if years else None
+
+def extract_positions(text: str, limit: int = 5) -> List[str]:
+    """Названия должностей, встречающиеся в тексте"""
+    positions = []
+    seen = set()
+    for match in POSITION_PATTERN.finditer(text):
+        position = " ".join(match.group(1).split())
+        if position.lower() not in seen:
+            seen.add(position.lower())
+            positions.append(position)
+        if len(positions) >= limit:
+            break
+    return positions
+
+def extract_cv(path: str) -> Dict[str, Any]:
+    """
+    Полная обработка файла резюме
+
+    Returns:
+        {"text", "skills", "experience_years", "positions"}
+    """
+    text = extract_text(path)
+    return {
+        "text": text,
+        "skills": extract_skills(text),
+        "experience_years": extract_experience_years(text),
+        "positions": extract_positions(text),
+    }
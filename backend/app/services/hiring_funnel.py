@@ -0,0 +1,258 @@
+"""
+Воронка найма и длительности этапов
+Отклики за период выгружаются одним запросом в столбцы NumPy, конверсии этапов
+и перцентили длительностей считаются векторно по вакансиям, компаниям или потокам
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.job import Job, JobApplication, JobApplicationStatus
+from app.models.user import CompanyProfile, RecruitmentStream, User
+from app.services.recruitment_analytics import owner_stream_id
+
+# Этапы воронки по порядку
+STAGES = ("applied", "reviewed", "interview_scheduled", "interview_completed", "decided", "accepted")
+
+# Незавершенный статус -> последний пройденный этап
+_STATUS_STAGE = {
+    JobApplicationStatus.APPLIED: 0,
+    JobApplicationStatus.REVIEWED: 1,
+    JobApplicationStatus.INTERVIEW_SCHEDULED: 2,
+    JobApplicationStatus.INTERVIEW_COMPLETED: 3,
+}
+
+# Завершающие статусы: решение принято, промежуточные этапы по ним не известны
+_DECIDED_STATUSES = {
+    JobApplicationStatus.REJECTED,
+    JobApplicationStatus.WITHDRAWN,
+    JobApplicationStatus.ACCEPTED,
+}
+
+# Длительность -> (начало, конец, только для принятых)
+DURATIONS = {
+    "time_to_review": ("applied_at", "reviewed_at", False),
+    "time_to_interview": ("applied_at", "interview_scheduled_at", False),
+    "time_to_decision": ("applied_at", "decision_at", False),
+    "time_to_hire": ("applied_at", "decision_at", True),
+}
+
+PERCENTILES = (50, 75, 90)
+
+GROUP_BY = ("job", "company", "stream")
+
+class FunnelColumns(NamedTuple):
+    """Отклики в виде столбцов"""
+    job_id: np.ndarray
+    company_id: np.ndarray
+    stream_id: np.ndarray  # -1 - без потока
+    stage: np.ndarray  # Последний этап по незавершенному статусу (0 - для завершающих)
+    decided: np.ndarray
+    rejected: np.ndarray
+    accepted: np.ndarray
+    timestamps: Dict[str, np.ndarray]  # datetime64[s], NaT - нет метки
+    names: Dict[str, Dict[int, str]]
+
+def _datetime64(values: Sequence[Optional[datetime]]) -> np.ndarray:
+    """Столбец меток времени (с часовым поясом - приводится к UTC)"""
+    normalized = [
+        value.astimezone(timezone.utc).replace(tzinfo=None) if value is not None and value.tzinfo else value
+        for value in values
+    ]
+    return np.array(normalized, dtype="datetime64[s]")
+
+def fetch_columns(db: Session, scope=None, since: Optional[datetime] = None) -> FunnelColumns:
+    """Один запрос: отклики, поданные с since, в области scope (условие на владельца вакансии)"""
+    query = db.query(
+        JobApplication.job_id,
+        Job.company_id,
+        owner_stream_id(),
+        JobApplication.status,
+        JobApplication.applied_at,
+        JobApplication.reviewed_at,
+        JobApplication.interview_scheduled_at,
+        JobApplication.interview_completed_at,
+        JobApplication.decision_at,
+        Job.title,
+        CompanyProfile.company_name,
+    ).join(
+        Job, JobApplication.job_id == Job.id
+    ).join(
+        CompanyProfile, Job.company_id == CompanyProfile.id
+    ).join(User, Job.created_by == User.id)
+    if scope is not None:
+        query = query.filter(scope)
+    if since is not None:
+        query = query.filter(JobApplication.applied_at >= since)
+    rows = query.all()
+
+    columns = list(zip(*rows)) if rows else [()] * 11
+    job_id, company_id, stream_id, statuses = columns[:4]
+    stream_names = dict(db.query(RecruitmentStream.id, RecruitmentStream.name).filter(
+        RecruitmentStream.id.in_({value for value in stream_id if value is not None})
+    )) if rows else {}
+
+    return FunnelColumns(
+        job_id=np.array(job_id, dtype=np.int64),
+        company_id=np.array(company_id, dtype=np.int64),
+        stream_id=np.array([-1 if value is None else value for value in stream_id], dtype=np.int64),
+        stage=np.array([_STATUS_STAGE.get(status, 0) for status in statuses], dtype=np.int8),
+        decided=np.array([status in _DECIDED_STATUSES for status in statuses], dtype=bool),
+        rejected=np.array([status == JobApplicationStatus.REJECTED for status in statuses], dtype=bool),
+        accepted=np.array([status == JobApplicationStatus.ACCEPTED for status in statuses], dtype=bool),
+        timestamps={
+            name: _datetime64(values)
+            for name, values in zip(
+                ("applied_at", "reviewed_at", "interview_scheduled_at", "interview_completed_at", "decision_at"),
+                columns[4:9]
+            )
+        },
+        names={
+            "job": dict(zip(job_id, columns[9])),
+            "company": dict(zip(company_id, columns[10])),
+            "stream": stream_names,
+        },
+    )
+
+# ========== ВЕКТОРНЫЕ РАСЧЕТЫ ==========
+
+def _reached(columns: FunnelColumns) -> np.ndarray:
+    """
+    Матрица (отклики x этапы): дошел ли отклик до этапа
+
+    Промежуточный этап считается пройденным по своей временной метке или по
+    незавершенному статусу. Отказ, отзыв и принятие означают только решение:
+    отклик, отклоненный сразу после подачи, не попадает в просмотренные
+    и в собеседования, поэтому этапы не вложены друг в друга.
+    """
+    count = len(columns.stage)
+    reached = np.zeros((count, len(STAGES)), dtype=bool)
+    reached[:, 0] = True
+    for index, timestamp in enumerate(("reviewed_at", "interview_scheduled_at", "interview_completed_at"), start=1):
+        reached[:, index] = (columns.stage >= index) | ~np.isnat(columns.timestamps[timestamp])
+    reached[:, 4] = columns.decided | ~np.isnat(columns.timestamps["decision_at"])
+    reached[:, 5] = columns.accepted
+    return reached
+
+def _durations(columns: FunnelColumns) -> Dict[str, np.ndarray]:
+    """Длительности в днях (NaN - этап не пройден)"""
+    result = {}
+    for name, (start, end, accepted_only) in DURATIONS.items():
+        days = (columns.timestamps[end] - columns.timestamps[start]) / np.timedelta64(1, "D")
+        days = days.astype(np.float64)
+        days[days < 0] = np.nan
+        if accepted_only:
+            days[~columns.accepted] = np.nan
+        result[name] = days
+    return result
+
+def _group_percentiles(groups: np.ndarray, values: np.ndarray, group_count: int) -> Dict[str, np.ndarray]:
+    """Перцентили значений по группам без цикла по группам (сортировка по (группа, значение))"""
+    valid = ~np.isnan(values)
+    groups, values = groups[valid], values[valid]
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order]
+
+    counts = np.bincount(groups, minlength=group_count)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    sums = np.bincount(groups, weights=values, minlength=group_count)
+
+    result = {"count": counts}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result["mean"] = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    for percentile in PERCENTILES:
+        # Линейная интерполяция между соседними значениями группы (как np.percentile)
+        position = (counts - 1).clip(min=0) * percentile / 100
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        fraction = position - lower
+        if len(values):
+            low_values = values[np.minimum(offsets + lower, len(values) - 1)]
+            high_values = values[np.minimum(offsets + upper, len(values) - 1)]
+            estimate = low_values + (high_values - low_values) * fraction
+        else:
+            estimate = np.zeros(group_count)
+        result[f"p{percentile}"] = np.where(counts > 0, estimate, np.nan)
+    return result
+
+def _rate(part: float, total: float) -> float:
+    return round(part / total * 100, 2) if total else 0
+
+def _round(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 1)
+
+def compute_funnel(columns: FunnelColumns, group_by: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Воронка и длительности по группам (group_by: job, company, stream или None - итог)
+    """
+    if group_by is None:
+        keys = np.zeros(len(columns.stage), dtype=np.int64)
+    else:
+        keys = getattr(columns, f"{group_by}_id")
+    group_keys, groups = np.unique(keys, return_inverse=True)
+    group_count = len(group_keys)
+    if not group_count:
+        return []
+
+    reached = _reached(columns)
+    stage_counts = np.stack(
+        [np.bincount(groups, weights=reached[:, index], minlength=group_count) for index in range(len(STAGES))],
+        axis=1
+    ).astype(np.int64)
+    # Этапы не вложены (отказ сразу после подачи - решение без просмотра), поэтому
+    # конверсия этапа - доля дошедших до него, которые дошли и до следующего
+    transition_counts = np.stack(
+        [
+            np.bincount(groups, weights=reached[:, index] & reached[:, index + 1], minlength=group_count)
+            for index in range(len(STAGES) - 1)
+        ],
+        axis=1
+    ).astype(np.int64)
+    rejected = np.bincount(groups, weights=columns.rejected, minlength=group_count)
+    durations = {
+        name: _group_percentiles(groups, values, group_count)
+        for name, values in _durations(columns).items()
+    }
+
+    names = columns.names.get(group_by, {}) if group_by else {}
+    result = []
+    for index, key in enumerate(group_keys.tolist()):
+        counts = stage_counts[index]
+        funnel = dict(zip(STAGES, counts.tolist()))
+        funnel["rejected"] = int(rejected[index])
+        result.append({
+            "key": None if group_by is None or key == -1 else key,
+            "name": names.get(key) if group_by else None,
+            "funnel": funnel,
+            "conversion": {
+                f"{previous}_to_{stage}": _rate(transition_counts[index][position], counts[position])
+                for position, (previous, stage) in enumerate(zip(STAGES, STAGES[1:]))
+            },
+            "overall_conversion": _rate(funnel["accepted"], funnel["applied"]),
+            "durations": {
+                name: {
+                    "count": int(stats["count"][index]),
+                    "mean": _round(stats["mean"][index]),
+                    **{f"p{percentile}": _round(stats[f"p{percentile}"][index]) for percentile in PERCENTILES},
+                }
+                for name, stats in durations.items()
+            },
+        })
+    return result
+
+def get_funnel(
+    db: Session,
+    scope=None,
+    since: Optional[datetime] = None,
+    group_by: Optional[str] = None
+) -> Dict[str, Any]:
+    """Итоговая воронка и воронки по группам за период"""
+    columns = fetch_columns(db, scope, since)
+    total = compute_funnel(columns)
+    return {
+        "total": total[0] if total else None,
+        "groups": compute_funnel(columns, group_by) if group_by else [],
+    }
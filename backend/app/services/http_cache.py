@@ -0,0 +1,209 @@
+"""
+Постоянный HTTP кэш ответов внешних платформ
+Ответы хранятся в отдельном файле SQLite (общий для всех воркеров на хосте)
+с TTL по типу ресурса. Устаревшие записи перепроверяются условным запросом
+(ETag / Last-Modified), объем файла ограничен вытеснением давно не читанных
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional
+from urllib.parse import urlencode
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Тип ресурса -> время, в течение которого ответ используется без запроса (секунды)
+RESOURCE_TTLS: Dict[str, int] = {
+    "linkedin_search": 15 * 60,
+    "linkedin_profile": 24 * 3600,
+    "linkedin_positions": 24 * 3600,
+    "linkedin_skills": 3 * 24 * 3600,
+    "lalafo_search": 10 * 60,
+}
+
+DEFAULT_TTL = 3600
+
+# При переполнении объем уменьшается до этой доли лимита
+EVICT_TO_RATIO = 0.9
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS http_cache (
+        key TEXT PRIMARY KEY,
+        url TEXT NOT NULL,
+        resource TEXT NOT NULL,
+        body BLOB NOT NULL,
+        etag TEXT,
+        last_modified TEXT,
+        stored_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        accessed_at REAL NOT NULL,
+        size INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_http_cache_accessed_at ON http_cache (accessed_at)",
+    "CREATE TABLE IF NOT EXISTS http_cache_meta (id INTEGER PRIMARY KEY CHECK (id = 1), total_bytes INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO http_cache_meta (id, total_bytes) VALUES (1, 0)",
+)
+
+class CachedResponse(NamedTuple):
+    """Сохраненный ответ"""
+    data: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+    is_fresh: bool
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Заголовки условного запроса для перепроверки"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+def cache_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Ключ записи: SHA-256 от URL и отсортированных параметров"""
+    query = urlencode(sorted((params or {}).items()), doseq=True)
+    return hashlib.sha256(f"{url}?{query}".encode("utf-8")).hexdigest()
+
+class HttpCache:
+    """Кэш в SQLite (WAL): соединение на поток, запись и учет объема в одной транзакции"""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._initialized:
+                    for statement in _SCHEMA:
+                        connection.execute(statement)
+                    self._initialized = True
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Сохраненный ответ (в том числе устаревший - для перепроверки)"""
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT body, etag, last_modified, expires_at FROM http_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        now = time.time()
+        connection.execute("UPDATE http_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        body, etag, last_modified, expires_at = row
+        if expires_at > now:
+            self.hits += 1
+        return CachedResponse(json.loads(body), etag, last_modified, expires_at > now)
+
+    def put(
+        self,
+        key: str,
+        url: str,
+        resource: str,
+        data: Any,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> None:
+        """Сохранение ответа 200 и вытеснение при превышении объема"""
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        now = time.time()
+        expires_at = now + RESOURCE_TTLS.get(resource, DEFAULT_TTL)
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            previous = connection.execute("SELECT size FROM http_cache WHERE key = ?", (key,)).fetchone()
+            connection.execute(
+                "INSERT OR REPLACE INTO http_cache "
+                "(key, url, resource, body, etag, last_modified, stored_at, expires_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, resource, body, etag, last_modified, now, expires_at, now, len(body))
+            )
+            connection.execute(
+                "UPDATE http_cache_meta SET total_bytes = total_bytes + ? WHERE id = 1",
+                (len(body) - (previous[0] if previous else 0),)
+            )
+            total = connection.execute("SELECT total_bytes FROM http_cache_meta WHERE id = 1").fetchone()[0]
+            if total > self.max_bytes:
+                self._evict(connection, total)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def refresh(self, key: str, resource: str) -> None:
+        """Ответ 304: запись снова свежая на TTL ресурса"""
+        now = time.time()
+        self._connection().execute(
+            "UPDATE http_cache SET expires_at = ?, accessed_at = ? WHERE key = ?",
+            (now + RESOURCE_TTLS.get(resource, DEFAULT_TTL), now, key)
+        )
+        self.revalidated += 1
+
+    def _evict(self, connection: sqlite3.Connection, total: int) -> None:
+        """Удаление давно не читанных записей до EVICT_TO_RATIO лимита (внутри транзакции)"""
+        target = int(self.max_bytes * EVICT_TO_RATIO)
+        while total > target:
+            rows = connection.execute(
+                "SELECT key, size FROM http_cache ORDER BY accessed_at LIMIT 100"
+            ).fetchall()
+            if not rows:
+                break
+            victims, freed = [], 0
+            for key, size in rows:
+                if total - freed <= target:
+                    break
+                victims.append((key,))
+                freed += size
+            connection.executemany("DELETE FROM http_cache WHERE key = ?", victims)
+            connection.execute("UPDATE http_cache_meta SET total_bytes = total_bytes - ? WHERE id = 1", (freed,))
+            total -= freed
+            self.evicted += len(victims)
+            logger.info(f"HTTP кэш: вытеснено {len(victims)} записей ({freed} байт)")
+
+    def stats(self) -> Dict[str, Any]:
+        total = self._connection().execute("SELECT total_bytes FROM http_cache_meta WHERE id = 1").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "evicted": self.evicted,
+            "total_bytes": total,
+            "max_bytes": self.max_bytes,
+        }
+
+_cache: Optional[HttpCache] = None
+
+def get_cache() -> Optional[HttpCache]:
+    """Общий кэш процесса (None - отключен HTTP_CACHE_ENABLED)"""
+    global _cache
+    if not settings.HTTP_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = HttpCache(settings.HTTP_CACHE_PATH, settings.HTTP_CACHE_MAX_BYTES)
+    return _cache
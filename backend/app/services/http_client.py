@@ -0,0 +1,93 @@
+"""
+Общая HTTP сессия для клиентов внешних платформ
+Одна aiohttp.ClientSession на event loop (у приложения он один): пул keep-alive
+соединений с лимитом на хост, кэш DNS и общие таймауты. Создается при старте
+приложения и закрывается при остановке
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+    logger.warning("aiohttp не установлен, HTTP клиенты внешних платформ отключены")
+
+# Сессия привязана к loop, в котором создана, и не может использоваться в другом
+_sessions: Dict[asyncio.AbstractEventLoop, "aiohttp.ClientSession"] = {}
+
+def _create_session() -> "aiohttp.ClientSession":
+    connector = aiohttp.TCPConnector(
+        limit=settings.HTTP_POOL_SIZE,
+        limit_per_host=settings.HTTP_POOL_PER_HOST,
+        ttl_dns_cache=settings.HTTP_DNS_CACHE_SECONDS,
+        keepalive_timeout=settings.HTTP_KEEPALIVE_SECONDS,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=settings.HTTP_TIMEOUT_SECONDS,
+        connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+def _discard_closed_loops() -> None:
+    """Освобождение сессий завершившихся loop (скрипты, тестовые клиенты)"""
+    for loop in [loop for loop in _sessions if loop.is_closed()]:
+        session = _sessions.pop(loop)
+        # Соединения закрытого loop уже не используются: ожидать нечего,
+        # пул закрывается синхронно, сессия отсоединяется от него
+        connector = session.connector
+        session.detach()
+        if connector is not None:
+            connector._close()
+
+def get_session() -> "aiohttp.ClientSession":
+    """
+    Общая сессия текущего event loop
+
+    Создается при первом обращении, если приложение запущено без lifespan
+    (скрипты, фоновые задачи в другом loop). Сессии других работающих loop
+    не затрагиваются, сессии завершившихся loop закрываются.
+    """
+    if aiohttp is None:
+        raise RuntimeError("aiohttp не установлен")
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        _discard_closed_loops()
+        session = _sessions[loop] = _create_session()
+    return session
+
+async def start_session() -> None:
+    """Создание сессии при старте приложения"""
+    if aiohttp is not None:
+        get_session()
+
+async def close_session() -> None:
+    """Закрытие сессии текущего loop и соединений пула при остановке приложения"""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+    _discard_closed_loops()
+
+def deadline_timeout(deadline: Optional[float]) -> "aiohttp.ClientTimeout":
+    """
+    Таймаут запроса, не выходящий за общий дедлайн операции (по loop.time())
+
+    Raises:
+        asyncio.TimeoutError: дедлайн уже прошел
+    """
+    if deadline is None:
+        return get_session().timeout
+    remaining = deadline - asyncio.get_running_loop().time()
+    if remaining <= 0:
+        raise asyncio.TimeoutError("Истек дедлайн операции")
+    return aiohttp.ClientTimeout(
+        total=min(remaining, settings.HTTP_TIMEOUT_SECONDS),
+        connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+    )
@@ -5,10 +5,11 @@
 import json
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, bindparam, select
 
 logger = logging.getLogger(__name__)
 
@@ -17,12 +18,31 @@ from app.models.integration import (
     CandidateImport, IntegrationPlatform, IntegrationStatus
 )
 from app.models.user import User, UserRole, CandidateProfile
+from app.models.skill import external_candidate_skills
 from app.schemas.integration import (
     ExternalCandidateCreate, PlatformIntegrationCreate, 
     SearchCandidatesRequest, ImportCandidateRequest
 )
+from app.core.config import settings
+from app.core.database import dialect_insert
 from app.core.exceptions import ValidationError, NotFoundError
 from app.core.security import encrypt_data, decrypt_data
+from app.services.skills import parse_skills, skills_subquery, sync_external_candidate_links
+
+# Поля внешнего кандидата, которые приходят с платформы и обновляются при синхронизации
+EXTERNAL_CANDIDATE_FIELDS = (
+    "first_name", "last_name", "email", "phone", "location",
+    "current_position", "current_company", "experience_years", "skills", "summary",
+    "salary_min", "salary_max", "profile_url", "cv_url", "linkedin_url", "github_url", "raw_data",
+)
+
+def platform_health(platform: IntegrationPlatform) -> Optional[Dict[str, Any]]:
+    """Состояние circuit breaker и метрики лимита запросов платформы (None - запросов не было)"""
+    try:
+        from app.services.platform_limits import platform_health as all_platforms_health
+    except ImportError:
+        return None
+    return all_platforms_health().get(platform.value)
 
 class IntegrationService:
     """Сервис для управления интеграциями с внешними платформами"""
@@ -154,7 +174,13 @@ class IntegrationService:
         if not integration:
             raise NotFoundError("Интеграция не найдена")
         
-        # Удаляем связанных кандидатов
+        # Удаляем связанных кандидатов вместе с их навыками
+        candidate_ids = self.db.query(ExternalCandidate.id).filter(
+            ExternalCandidate.integration_id == integration_id
+        )
+        self.db.execute(external_candidate_skills.delete().where(
+            external_candidate_skills.c.external_candidate_id.in_(candidate_ids.scalar_subquery())
+        ))
         self.db.query(ExternalCandidate).filter(
             ExternalCandidate.integration_id == integration_id
         ).delete()
@@ -193,13 +219,8 @@ class IntegrationService:
             # Вызываем соответствующий сервис для платформы
             candidates = await self._search_on_platform(integration, search_request)
             
-            # Сохраняем найденных кандидатов
-            saved_candidates = []
-            for candidate_data in candidates:
-                candidate = await self._save_external_candidate(
-                    integration.id, candidate_data
-                )
-                saved_candidates.append(candidate)
+            # Сохраняем найденных кандидатов одной пачкой
+            saved_candidates = await self._save_external_candidates(integration, candidates)
             
             # Обновляем статистику
             if integration.total_candidates_found is None:
@@ -218,16 +239,21 @@ class IntegrationService:
             await self._log_integration_operation(
                 integration.id, "search", "success",
                 f"Найдено {len(saved_candidates)} кандидатов",
-                {"search_params": search_params, "candidates_count": len(saved_candidates)}
+                {
+                    "search_params": search_params,
+                    "candidates_count": len(saved_candidates),
+                    "platform_health": platform_health(integration.platform),
+                }
             )
             
             return saved_candidates
             
         except Exception as e:
-            # Логируем ошибку
+            # Логируем ошибку вместе с состоянием breaker и лимита запросов
             await self._log_integration_operation(
                 integration.id, "search", "error",
-                f"Ошибка поиска кандидатов: {str(e)}"
+                f"Ошибка поиска кандидатов: {str(e)}",
+                {"platform_health": platform_health(integration.platform)}
             )
             raise
     
@@ -259,45 +285,37 @@ class IntegrationService:
         access_token: str, 
         search_request: SearchCandidatesRequest
     ) -> List[Dict[str, Any]]:
-        """Поиск кандидатов в LinkedIn"""
+        """
+        Поиск кандидатов в LinkedIn
+
+        Fallback данные используются, только если интеграция с платформой не настроена;
+        ошибки и пустой результат реального запроса возвращаются как есть
+        """
+        # Проверяем, доступен ли aiohttp
         try:
-            # Проверяем, доступен ли aiohttp
-            try:
-                import aiohttp
-                from .linkedin_api import LinkedInAPI
-                from ..core.api_config import APIConfig
-                
-                # Проверяем, настроен ли LinkedIn API
-                if not APIConfig.is_linkedin_configured():
-                    logger.warning("LinkedIn API не настроен, используем fallback данные")
-                    return self._get_linkedin_fallback_data(search_request)
-                
-                # Создаем экземпляр LinkedIn API
-                linkedin_api = LinkedInAPI(access_token)
-                
-                # Выполняем поиск
-                candidates = await linkedin_api.search_people(
-                    keywords=search_request.keywords,
-                    locations=search_request.locations,
-                    experience_min=search_request.experience_min,
-                    experience_max=search_request.experience_max,
-                    limit=search_request.limit
-                )
-                
-                # Если реальный API не вернул результатов, используем моковые данные
-                if not candidates:
-                    return self._get_linkedin_fallback_data(search_request)
-                
-                return candidates
-                
-            except ImportError:
-                logger.warning("aiohttp не установлен, используем fallback данные для LinkedIn")
-                return self._get_linkedin_fallback_data(search_request)
-            
-        except Exception as e:
-            logger.error(f"LinkedIn API error: {e}")
-            # В случае ошибки возвращаем моковые данные
+            import aiohttp
+            from .linkedin_api import LinkedInAPI
+            from ..core.api_config import APIConfig
+        except ImportError:
+            logger.warning("aiohttp не установлен, используем fallback данные для LinkedIn")
             return self._get_linkedin_fallback_data(search_request)
+        
+        # Проверяем, настроен ли LinkedIn API
+        if not APIConfig.is_linkedin_configured():
+            logger.warning("LinkedIn API не настроен, используем fallback данные")
+            return self._get_linkedin_fallback_data(search_request)
+        
+        # Создаем экземпляр LinkedIn API
+        linkedin_api = LinkedInAPI(access_token)
+        
+        # Выполняем поиск; отказ, таймаут или сбой платформы не маскируются моковыми данными
+        return await linkedin_api.search_people(
+            keywords=search_request.keywords,
+            locations=search_request.locations,
+            experience_min=search_request.experience_min,
+            experience_max=search_request.experience_max,
+            limit=search_request.limit
+        )
     
     def _get_linkedin_fallback_data(self, search_request: SearchCandidatesRequest) -> List[Dict[str, Any]]:
         """Fallback данные для LinkedIn"""
@@ -426,45 +444,37 @@ class IntegrationService:
         access_token: str, 
         search_request: SearchCandidatesRequest
     ) -> List[Dict[str, Any]]:
-        """Поиск кандидатов на Lalafo (Кыргызстан)"""
+        """
+        Поиск кандидатов на Lalafo (Кыргызстан)
+
+        Fallback данные используются, только если интеграция с платформой не настроена;
+        ошибки и пустой результат реального запроса возвращаются как есть
+        """
+        # Проверяем, доступен ли aiohttp
         try:
-            # Проверяем, доступен ли aiohttp
-            try:
-                import aiohttp
-                from .lalafo_api import LalafoAPI
-                from ..core.api_config import APIConfig
-                
-                # Проверяем, настроен ли Lalafo API
-                if not APIConfig.is_lalafo_configured():
-                    logger.warning("Lalafo API не настроен, используем fallback данные")
-                    return self._get_lalafo_fallback_data(search_request)
-                
-                # Создаем экземпляр Lalafo API
-                lalafo_api = LalafoAPI(access_token)
-                
-                # Выполняем поиск
-                candidates = await lalafo_api.search_job_postings(
-                    keywords=search_request.keywords,
-                    locations=search_request.locations,
-                    experience_min=search_request.experience_min,
-                    experience_max=search_request.experience_max,
-                    limit=search_request.limit
-                )
-                
-                # Если реальный API не вернул результатов, используем моковые данные
-                if not candidates:
-                    return self._get_lalafo_fallback_data(search_request)
-                
-                return candidates
-                
-            except ImportError:
-                logger.warning("aiohttp не установлен, используем fallback данные для Lalafo")
-                return self._get_lalafo_fallback_data(search_request)
-            
-        except Exception as e:
-            logger.error(f"Lalafo API error: {e}")
-            # В случае ошибки возвращаем моковые данные
+            import aiohttp
+            from .lalafo_api import LalafoAPI
+            from ..core.api_config import APIConfig
+        except ImportError:
+            logger.warning("aiohttp не установлен, используем fallback данные для Lalafo")
             return self._get_lalafo_fallback_data(search_request)
+        
+        # Проверяем, настроен ли Lalafo API
+        if not APIConfig.is_lalafo_configured():
+            logger.warning("Lalafo API не настроен, используем fallback данные")
+            return self._get_lalafo_fallback_data(search_request)
+        
+        # Создаем экземпляр Lalafo API
+        lalafo_api = LalafoAPI(access_token)
+        
+        # Выполняем поиск; отказ, таймаут или сбой платформы не маскируются моковыми данными
+        return await lalafo_api.search_job_postings(
+            keywords=search_request.keywords,
+            locations=search_request.locations,
+            experience_min=search_request.experience_min,
+            experience_max=search_request.experience_max,
+            limit=search_request.limit
+        )
     
     def _get_lalafo_fallback_data(self, search_request: SearchCandidatesRequest) -> List[Dict[str, Any]]:
         """Fallback данные для Lalafo"""
@@ -568,74 +578,103 @@ class IntegrationService:
     
     # ========== УПРАВЛЕНИЕ КАНДИДАТАМИ ==========
     
-    async def _save_external_candidate(
-        self, 
-        integration_id: int, 
-        candidate_data: Dict[str, Any]
-    ) -> ExternalCandidate:
-        """Сохранение внешнего кандидата в базу"""
-        
-        # Получаем платформу из интеграции
-        integration = self.db.query(PlatformIntegration).filter(
-            PlatformIntegration.id == integration_id
-        ).first()
-        
-        if not integration:
-            raise NotFoundError("Интеграция не найдена")
+    async def _save_external_candidates(
+        self,
+        integration: PlatformIntegration,
+        candidates_data: List[Dict[str, Any]]
+    ) -> List[ExternalCandidate]:
+        """
+        Сохранение пачки внешних кандидатов в базу
+
+        Существующие записи загружаются одним IN запросом, вставка и
+        обновление выполняются одним upsert по (platform, external_id) без
+        коммита - его делает вызывающий вместе со статистикой интеграции.
+        Поля, которых нет в данных платформы, не изменяются.
+        """
+        # Последняя версия каждого профиля (повтор ключа в одном upsert недопустим)
+        by_external_id: Dict[str, Dict[str, Any]] = {}
+        for candidate_data in candidates_data:
+            by_external_id[candidate_data["external_id"]] = candidate_data
+        if not by_external_id:
+            return []
+        
+        table = ExternalCandidate.__table__
+        connection = self.db.connection()
+        existing = {
+            row.external_id: row
+            for row in connection.execute(
+                select(table.c.id, table.c.external_id, table.c.skills).where(
+                    and_(
+                        table.c.platform == integration.platform,
+                        table.c.external_id.in_(list(by_external_id))
+                    )
+                )
+            )
+        }
+        
+        # Обновляются только поля, пришедшие с платформы: отсутствующее в ответе
+        # поле не затирает сохраненное значение. Строки одного upsert должны иметь
+        # одинаковый набор столбцов, поэтому группируем их по набору полей
+        now = datetime.utcnow()
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = defaultdict(list)
+        for external_id, candidate_data in by_external_id.items():
+            fields = tuple(field for field in EXTERNAL_CANDIDATE_FIELDS if field in candidate_data)
+            row = {field: candidate_data[field] for field in fields}
+            if "skills" in row:
+                row["skills"] = json.dumps(row["skills"]) if row["skills"] else None
+            row.update(
+                external_id=external_id,
+                platform=integration.platform,
+                integration_id=integration.id,
+                last_synced_at=now,
+                updated_at=now
+            )
+            groups[fields].append(row)
+        
+        stmt = dialect_insert(connection, table)
+        for fields, rows in groups.items():
+            updated_fields = fields + ("last_synced_at", "updated_at")
+            if stmt is not None:
+                connection.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=["platform", "external_id"],
+                        set_={field: stmt.excluded[field] for field in updated_fields}
+                    ),
+                    rows
+                )
+                continue
+            new_rows = [row for row in rows if row["external_id"] not in existing]
+            updated_rows = [
+                {**row, "candidate_id": existing[row["external_id"]].id}
+                for row in rows if row["external_id"] in existing
+            ]
+            if new_rows:
+                connection.execute(table.insert(), new_rows)
+            if updated_rows:
+                connection.execute(
+                    table.update().where(table.c.id == bindparam("candidate_id")).values({
+                        field: bindparam(field) for field in updated_fields
+                    }),
+                    updated_rows
+                )
         
-        # Проверяем, не существует ли уже такой кандидат
-        existing = self.db.query(ExternalCandidate).filter(
+        candidates = self.db.query(ExternalCandidate).populate_existing().filter(
             and_(
-                ExternalCandidate.external_id == candidate_data["external_id"],
-                ExternalCandidate.platform == integration.platform
+                ExternalCandidate.platform == integration.platform,
+                ExternalCandidate.external_id.in_(list(by_external_id))
             )
-        ).first()
-        
-        if existing:
-            # Обновляем существующего кандидата
-            for field, value in candidate_data.items():
-                if hasattr(existing, field) and field not in ["id", "created_at"]:
-                    if field == "skills" and value:
-                        setattr(existing, field, json.dumps(value))
-                    else:
-                        setattr(existing, field, value)
-            
-            existing.last_synced_at = datetime.utcnow()
-            existing.updated_at = datetime.utcnow()
-            self.db.commit()
-            self.db.refresh(existing)
-            return existing
-        
-        # Создаем нового кандидата
-        candidate = ExternalCandidate(
-            integration_id=integration_id,
-            external_id=candidate_data["external_id"],
-            platform=integration.platform,  # Используем платформу из интеграции
-            first_name=candidate_data.get("first_name"),
-            last_name=candidate_data.get("last_name"),
-            email=candidate_data.get("email"),
-            phone=candidate_data.get("phone"),
-            location=candidate_data.get("location"),
-            current_position=candidate_data.get("current_position"),
-            current_company=candidate_data.get("current_company"),
-            experience_years=candidate_data.get("experience_years"),
-            skills=json.dumps(candidate_data.get("skills", [])) if candidate_data.get("skills") else None,
-            summary=candidate_data.get("summary"),
-            salary_min=candidate_data.get("salary_min"),
-            salary_max=candidate_data.get("salary_max"),
-            profile_url=candidate_data.get("profile_url"),
-            cv_url=candidate_data.get("cv_url"),
-            linkedin_url=candidate_data.get("linkedin_url"),
-            github_url=candidate_data.get("github_url"),
-            raw_data=candidate_data.get("raw_data"),
-            last_synced_at=datetime.utcnow()
-        )
-        
-        self.db.add(candidate)
-        self.db.commit()
-        self.db.refresh(candidate)
-        
-        return candidate
+        ).all()
+        
+        # upsert идет в обход ORM: связи навыков пересобираются только для новых и измененных
+        sync_external_candidate_links(connection, [
+            (candidate.id, candidate.skills) for candidate in candidates
+            if candidate.external_id not in existing
+            or existing[candidate.external_id].skills != candidate.skills
+        ])
+        
+        order = {external_id: position for position, external_id in enumerate(by_external_id)}
+        candidates.sort(key=lambda candidate: order[candidate.external_id])
+        return candidates
     
     async def get_external_candidates(
         self, 
@@ -674,11 +713,12 @@ class IntegrationService:
             )
             query = query.filter(search_filter)
         
-        # Фильтр по навыкам
-        if skills:
-            skills_list = [skill.strip() for skill in skills.split(",")]
-            for skill in skills_list:
-                query = query.filter(ExternalCandidate.skills.ilike(f"%{skill}%"))
+        # Фильтр по навыкам (через нормализованную таблицу навыков)
+        skills_list = parse_skills(skills)
+        if skills_list:
+            query = query.filter(ExternalCandidate.id.in_(
+                skills_subquery(external_candidate_skills, "external_candidate_id", skills_list)
+            ))
         
         # Фильтр по опыту
         if experience_min is not None:
@@ -847,7 +887,7 @@ class IntegrationService:
     async def sync_integration(self, integration_id: int) -> Dict[str, Any]:
         """Синхронизация интеграции"""
         
-        integration = await self.get_integration(integration_id)
+        integration = self.get_integration(integration_id)
         
         if not integration.is_active:
             raise ValidationError("Интеграция неактивна")
@@ -889,14 +929,23 @@ class IntegrationService:
             
         except Exception as e:
             # Обновляем статус ошибки
+            self.db.rollback()
             integration.status = IntegrationStatus.ERROR
-            integration.error_count += 1
+            integration.error_count = (integration.error_count or 0) + 1
             integration.last_error = str(e)
+            if integration.auto_sync:
+                # Повтор с удвоением задержки, но не реже обычного интервала
+                retry_minutes = min(
+                    settings.INTEGRATION_SYNC_RETRY_MINUTES * 2 ** (integration.error_count - 1),
+                    integration.sync_interval_hours * 60
+                )
+                integration.next_sync_at = datetime.utcnow() + timedelta(minutes=retry_minutes)
             self.db.commit()
             
             # Логируем ошибку
             await self._log_integration_operation(
-                integration_id, "sync", "error", f"Ошибка синхронизации: {str(e)}"
+                integration_id, "sync", "error", f"Ошибка синхронизации: {str(e)}",
+                {"platform_health": platform_health(integration.platform)}
             )
             
             raise
@@ -0,0 +1,165 @@
+"""
+Автоматическая синхронизация интеграций
+Фоновая задача выбирает интеграции с наступившим next_sync_at и запускает
+синхронизацию под арендой (sync_lease_owner/sync_lease_expires_at), чтобы
+несколько узлов приложения не синхронизировали одну интеграцию дважды.
+Число одновременных синхронизаций на узле ограничено, каждая работает
+в собственной сессии базы данных
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.integration import PlatformIntegration
+from app.services.integration_service import IntegrationService
+
+logger = logging.getLogger(__name__)
+
+# Интеграций, выбираемых за одну проверку
+POLL_BATCH_SIZE = 20
+
+# Идентификатор узла - владельца аренды
+NODE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_scheduler_task: Optional[asyncio.Task] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_running: Set[int] = set()
+
+def _lease_free(now: datetime):
+    table = PlatformIntegration.__table__
+    return or_(table.c.sync_lease_expires_at.is_(None), table.c.sync_lease_expires_at < now)
+
+def _is_due(now: datetime):
+    table = PlatformIntegration.__table__
+    return and_(
+        table.c.is_active == True,
+        table.c.auto_sync == True,
+        or_(table.c.next_sync_at.is_(None), table.c.next_sync_at <= now)
+    )
+
+def due_integration_ids(limit: int = POLL_BATCH_SIZE) -> List[int]:
+    """Интеграции, которым пора синхронизироваться и которые никто не арендовал (собственная сессия)"""
+    table = PlatformIntegration.__table__
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        return list(db.execute(
+            select(table.c.id)
+            .where(and_(_is_due(now), _lease_free(now)))
+            .order_by(table.c.next_sync_at)
+            .limit(limit)
+        ).scalars())
+    finally:
+        db.close()
+
+def acquire_lease(db: Session, integration_id: int, due_only: bool = False) -> bool:
+    """
+    Аренда синхронизации интеграции для этого узла
+
+    Условный UPDATE атомарен: из нескольких узлов аренду получает один.
+    due_only - только если синхронизация все еще нужна (другой узел мог
+    завершить ее между выборкой и арендой).
+    """
+    table = PlatformIntegration.__table__
+    now = datetime.utcnow()
+    condition = and_(table.c.id == integration_id, _lease_free(now))
+    if due_only:
+        condition = and_(condition, _is_due(now))
+    result = db.execute(
+        update(table).where(condition).values(
+            sync_lease_owner=NODE_ID,
+            sync_lease_expires_at=now + timedelta(seconds=settings.INTEGRATION_SYNC_LEASE_SECONDS)
+        )
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def release_lease(db: Session, integration_id: int) -> None:
+    table = PlatformIntegration.__table__
+    db.execute(
+        update(table)
+        .where(and_(table.c.id == integration_id, table.c.sync_lease_owner == NODE_ID))
+        .values(sync_lease_owner=None, sync_lease_expires_at=None)
+    )
+    db.commit()
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.INTEGRATION_SYNC_CONCURRENCY)
+    return _semaphore
+
+async def run_sync(integration_id: int, due_only: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Синхронизация интеграции под арендой в собственной сессии
+
+    Returns:
+        Результат синхронизации или None, если она уже идет, аренда занята
+        другим узлом или синхронизация завершилась ошибкой (записана в интеграцию)
+    """
+    if integration_id in _running:
+        return None
+    _running.add(integration_id)
+    try:
+        async with _get_semaphore():
+            db = SessionLocal()
+            try:
+                if not acquire_lease(db, integration_id, due_only):
+                    return None
+                try:
+                    return await IntegrationService(db).sync_integration(integration_id)
+                except Exception as e:
+                    logger.warning(f"Синхронизация интеграции {integration_id} не удалась: {e}")
+                    return None
+                finally:
+                    db.rollback()
+                    release_lease(db, integration_id)
+            finally:
+                db.close()
+    finally:
+        _running.discard(integration_id)
+
+async def run_due_syncs() -> int:
+    """Синхронизация всех интеграций с наступившим next_sync_at; возвращает число успешных"""
+    integration_ids = await run_in_threadpool(due_integration_ids)
+    results = await asyncio.gather(*(run_sync(integration_id, due_only=True) for integration_id in integration_ids))
+    return sum(1 for result in results if result is not None)
+
+# ========== ФОНОВАЯ ЗАДАЧА ==========
+
+async def _run_scheduler(interval: int) -> None:
+    while True:
+        try:
+            await run_due_syncs()
+        except Exception as e:
+            logger.warning(f"Не удалось запустить синхронизацию интеграций: {e}")
+        await asyncio.sleep(interval)
+
+def start_scheduler() -> None:
+    """Запуск автоматической синхронизации (INTEGRATION_SYNC_POLL_SECONDS, 0 - отключена)"""
+    global _scheduler_task
+    interval = settings.INTEGRATION_SYNC_POLL_SECONDS
+    if interval > 0 and _scheduler_task is None:
+        _scheduler_task = asyncio.create_task(_run_scheduler(interval))
+
+async def stop_scheduler() -> None:
+    global _scheduler_task, _semaphore
+    if _scheduler_task is not None:
+        _scheduler_task.cancel()
+        try:
+            await _scheduler_task
+        except asyncio.CancelledError:
+            pass
+        _scheduler_task = None
+    _semaphore = None
@@ -0,0 +1,94 @@
+"""
+Массовые приглашения на интервью
+Проверка кандидатов, пропуск существующих приглашений и вставка одним запросом
+"""
+
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import JSON, and_, exists, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.models.job import InterviewInvitation, InvitationStatus, Job
+from app.models.user import CandidateProfile, User, UserRole
+
+class BatchResult(NamedTuple):
+    """Итог массового приглашения"""
+    created: Dict[int, int]  # candidate_id -> invitation_id
+    existing: List[int]  # Кандидаты, у которых уже есть приглашение на вакансию
+    not_found: List[int]  # Нет такого профиля или пользователь неактивен
+
+def create_invitations_batch(
+    db: Session,
+    job: Job,
+    candidate_ids: List[int],
+    expires_at: datetime,
+    scheduled_at: Optional[datetime] = None,
+    interview_language: str = "ru",
+    custom_questions: Optional[List[str]] = None
+) -> BatchResult:
+    """
+    Приглашение списка кандидатов (id профилей) на вакансию
+
+    Один запрос проверяет кандидатов и находит уже приглашенных (LEFT JOIN),
+    второй вставляет остальных через INSERT ... SELECT с NOT EXISTS, поэтому
+    параллельный запрос не создаст дубликат.
+    """
+    ids = list(dict.fromkeys(candidate_ids))
+    invitations = InterviewInvitation.__table__
+
+    rows = db.query(CandidateProfile.id, InterviewInvitation.id).join(
+        User, CandidateProfile.user_id == User.id
+    ).outerjoin(
+        InterviewInvitation,
+        and_(InterviewInvitation.candidate_id == CandidateProfile.id, InterviewInvitation.job_id == job.id)
+    ).filter(
+        CandidateProfile.id.in_(ids),
+        User.role == UserRole.CANDIDATE,
+        User.is_active == True
+    ).all()
+
+    valid = {candidate_id for candidate_id, _ in rows}
+    existing = {candidate_id for candidate_id, invitation_id in rows if invitation_id is not None}
+    to_create = [candidate_id for candidate_id in ids if candidate_id in valid and candidate_id not in existing]
+
+    created: Dict[int, int] = {}
+    if to_create:
+        already_invited = exists().where(
+            invitations.c.job_id == job.id,
+            invitations.c.candidate_id == CandidateProfile.id
+        )
+        source = select(
+            literal(job.id),
+            CandidateProfile.id,
+            literal(InvitationStatus.SENT, invitations.c.status.type),
+            literal(expires_at, invitations.c.expires_at.type),
+            literal(scheduled_at, invitations.c.scheduled_at.type),
+            literal(interview_language),
+            literal(custom_questions, JSON),
+        ).where(CandidateProfile.id.in_(to_create), ~already_invited)
+
+        stmt = insert(invitations).from_select(
+            ["job_id", "candidate_id", "status", "expires_at", "scheduled_at",
+             "interview_language", "custom_questions"],
+            source
+        )
+        if db.bind.dialect.insert_returning:
+            result = db.execute(stmt.returning(invitations.c.candidate_id, invitations.c.id))
+            created = dict(result.all())
+        else:
+            db.execute(stmt)
+            created = dict(db.query(InterviewInvitation.candidate_id, InterviewInvitation.id).filter(
+                InterviewInvitation.job_id == job.id,
+                InterviewInvitation.candidate_id.in_(to_create)
+            ).all())
+        db.commit()
+
+    # Приглашенные параллельным запросом между проверкой и вставкой тоже считаются существующими
+    existing.update(candidate_id for candidate_id in to_create if candidate_id not in created)
+
+    return BatchResult(
+        created=created,
+        existing=[candidate_id for candidate_id in ids if candidate_id in existing],
+        not_found=[candidate_id for candidate_id in ids if candidate_id not in valid]
+    )
@@ -0,0 +1,144 @@
+"""
+Рекомендации вакансий для кандидатов
+In-memory инвертированный индекс: нормализованный навык -> активные вакансии.
+Индекс свой у каждого воркера и обновляется изменениями вакансий, сделанными
+через ORM этого процесса (см. app.core.commit_hooks)
+"""
+
+import heapq
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.commit_hooks import DELETED, IncrementalIndex
+from app.models.job import Job, JobStatus, ExperienceLevel
+from app.services.matching import EXPERIENCE_RANGES, UNKNOWN_SCORE
+from app.services.skills import parse_skills
+
+# Веса составляющих оценки рекомендации
+WEIGHTS = {
+    "skills": 0.7,
+    "salary": 0.15,
+    "experience": 0.15,
+}
+
+class JobEntry(NamedTuple):
+    """Данные активной вакансии, нужные для оценки"""
+    skills: frozenset
+    salary_min: Optional[int]
+    salary_max: Optional[int]
+    experience_level: Optional[ExperienceLevel]
+
+class JobSkillIndex(IncrementalIndex):
+    """Инвертированный индекс навыков активных вакансий с инкрементальным обновлением"""
+
+    def __init__(self):
+        super().__init__()
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._jobs: Dict[int, JobEntry] = {}
+
+    def _load(self, db: Session) -> None:
+        rows = db.query(
+            Job.id, Job.status, Job.required_skills,
+            Job.salary_min, Job.salary_max, Job.experience_level
+        ).filter(Job.status == JobStatus.ACTIVE).all()
+        for row in rows:
+            self.upsert(*row)
+
+    def _clear(self) -> None:
+        self._postings.clear()
+        self._jobs.clear()
+
+    def upsert(
+        self,
+        job_id: int,
+        status: Optional[JobStatus],
+        required_skills,
+        salary_min: Optional[int],
+        salary_max: Optional[int],
+        experience_level: Optional[ExperienceLevel]
+    ) -> None:
+        """Добавление/обновление вакансии (неактивные удаляются из индекса)"""
+        with self._lock:
+            self.remove(job_id)
+            if status != JobStatus.ACTIVE:
+                return
+            skills = frozenset(parse_skills(required_skills))
+            self._jobs[job_id] = JobEntry(skills, salary_min, salary_max, experience_level)
+            for skill in skills:
+                self._postings[skill].add(job_id)
+
+    def remove(self, job_id: int) -> None:
+        """Удаление вакансии из индекса"""
+        with self._lock:
+            entry = self._jobs.pop(job_id, None)
+            if entry is None:
+                return
+            for skill in entry.skills:
+                postings = self._postings.get(skill)
+                if postings is not None:
+                    postings.discard(job_id)
+                    if not postings:
+                        del self._postings[skill]
+
+    def recommend(
+        self,
+        skills,
+        experience_years: Optional[int] = None,
+        expected_salary: Optional[int] = None,
+        limit: int = 20
+    ) -> List[Tuple[int, float, List[str]]]:
+        """Лучшие вакансии для навыков кандидата: (job_id, оценка 0-100, совпавшие навыки)"""
+        candidate_skills = parse_skills(skills)
+
+        with self._lock:
+            matched: Dict[int, List[str]] = defaultdict(list)
+            for skill in candidate_skills:
+                for job_id in self._postings.get(skill, ()):
+                    matched[job_id].append(skill)
+
+            scored = []
+            for job_id, job_skills in matched.items():
+                entry = self._jobs[job_id]
+                score = (
+                    WEIGHTS["skills"] * len(job_skills) / len(entry.skills) +
+                    WEIGHTS["salary"] * _salary_score(entry, expected_salary) +
+                    WEIGHTS["experience"] * _experience_score(entry, experience_years)
+                )
+                scored.append((round(score * 100, 1), job_id, job_skills))
+
+        best = heapq.nlargest(limit, scored, key=lambda item: (item[0], item[1]))
+        return [(job_id, score, job_skills) for score, job_id, job_skills in best]
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+def _salary_score(entry: JobEntry, expected_salary: Optional[int]) -> float:
+    if not expected_salary or not entry.salary_max:
+        return UNKNOWN_SCORE
+    if expected_salary <= entry.salary_max:
+        return 1.0
+    return max(0.0, 1 - (expected_salary - entry.salary_max) / entry.salary_max)
+
+def _experience_score(entry: JobEntry, experience_years: Optional[int]) -> float:
+    if experience_years is None or entry.experience_level not in EXPERIENCE_RANGES:
+        return UNKNOWN_SCORE
+    low, high = EXPERIENCE_RANGES[entry.experience_level]
+    if experience_years < low:
+        return max(0.0, 1 - (low - experience_years) / 3)
+    if experience_years > high:
+        return max(0.0, 1 - (experience_years - high) / 6)
+    return 1.0
+
+job_skill_index = JobSkillIndex()
+
+# ========== ИНКРЕМЕНТАЛЬНОЕ ОБНОВЛЕНИЕ ==========
+# Изменения вакансий собираются при flush и применяются только после commit
+
+def _job_changes(session: Session, job: Job, kind: str):
+    if kind == DELETED:
+        return (("remove", (job.id,)),)
+    return (("upsert", (job.id, job.status, job.required_skills, job.salary_min, job.salary_max, job.experience_level)),)
+
+job_skill_index.watch((Job,), _job_changes)
@@ -0,0 +1,132 @@
+"""
+Поиск вакансий: общие фильтры и фасетные счетчики
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, NamedTuple, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+
+from app.core.cache import TTLCache
+from app.core.commit_hooks import on_commit_if_changed
+from app.models.job import Job, JobStatus, JobType, ExperienceLevel
+
+# Кэш фасетов: ключ - нормализованный набор фильтров
+facets_cache = TTLCache(ttl_seconds=300, max_entries=512)
+
+class JobFilters(NamedTuple):
+    """Нормализованный набор фильтров поиска вакансий"""
+    status: Optional[JobStatus] = None
+    company_id: Optional[int] = None
+    search: Optional[str] = None
+    experience_level: Optional[ExperienceLevel] = None
+    job_type: Optional[JobType] = None
+    location: Optional[str] = None
+
+def _parse_enum(enum_cls, value: Optional[str]):
+    """Конвертация строки в enum (неизвестные значения игнорируются)"""
+    if not value:
+        return None
+    try:
+        return enum_cls(value.lower())
+    except ValueError:
+        return None
+
+def normalize_job_filters(
+    status: Optional[str] = None,
+    company_id: Optional[int] = None,
+    search: Optional[str] = None,
+    experience_level: Optional[str] = None,
+    job_type: Optional[str] = None,
+    location: Optional[str] = None
+) -> JobFilters:
+    """Нормализация параметров запроса в JobFilters"""
+    search = search.strip().lower() if search and search.strip() else None
+    location = location.strip().lower() if location and location.strip() else None
+
+    return JobFilters(
+        status=_parse_enum(JobStatus, status),
+        company_id=company_id or None,
+        search=search,
+        experience_level=_parse_enum(ExperienceLevel, experience_level),
+        job_type=_parse_enum(JobType, job_type),
+        location=location
+    )
+
+def apply_job_filters(query: Query, filters: JobFilters) -> Query:
+    """Применение фильтров к запросу по вакансиям"""
+    if filters.status:
+        query = query.filter(Job.status == filters.status)
+
+    if filters.company_id:
+        query = query.filter(Job.company_id == filters.company_id)
+
+    if filters.search:
+        query = query.filter(
+            Job.title.ilike(f"%{filters.search}%") |
+            Job.description.ilike(f"%{filters.search}%")
+        )
+
+    if filters.experience_level:
+        query = query.filter(Job.experience_level == filters.experience_level)
+
+    if filters.job_type:
+        query = query.filter(Job.job_type == filters.job_type)
+
+    if filters.location:
+        if filters.location == 'remote':
+            query = query.filter(Job.is_remote == True)
+        else:
+            query = query.filter(Job.location.ilike(f"%{filters.location}%"))
+
+    return query
+
+def _compute_job_facets(db: Session, filters: JobFilters) -> Dict[str, Any]:
+    """Подсчет фасетов одним сгруппированным запросом"""
+    query = db.query(
+        Job.experience_level,
+        Job.job_type,
+        Job.status,
+        Job.is_remote,
+        Job.location,
+        func.count(Job.id)
+    )
+    rows = apply_job_filters(query, filters).group_by(
+        Job.experience_level, Job.job_type, Job.status, Job.is_remote, Job.location
+    ).all()
+
+    facets = {
+        "experience_level": defaultdict(int),
+        "job_type": defaultdict(int),
+        "status": defaultdict(int),
+        "location": defaultdict(int),
+        "remote": defaultdict(int),
+    }
+    total = 0
+
+    for experience_level, job_type, job_status, is_remote, location, count in rows:
+        total += count
+        if experience_level:
+            facets["experience_level"][experience_level.value] += count
+        if job_type:
+            facets["job_type"][job_type.value] += count
+        if job_status:
+            facets["status"][job_status.value] += count
+        if location:
+            facets["location"][location] += count
+        facets["remote"]["remote" if is_remote else "onsite"] += count
+
+    return {
+        "total": total,
+        "facets": {name: dict(values) for name, values in facets.items()}
+    }
+
+def get_job_facets(db: Session, filters: JobFilters) -> Dict[str, Any]:
+    """Получение фасетов вакансий (с кэшированием по набору фильтров)"""
+    return facets_cache.get_or_compute(filters, lambda: _compute_job_facets(db, filters))
+
+# ========== ИНВАЛИДАЦИЯ ==========
+# Кэш фасетов сбрасывается после commit транзакций, изменивших вакансии
+
+on_commit_if_changed((Job,), facets_cache.invalidate)
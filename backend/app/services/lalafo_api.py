@@ -2,13 +2,16 @@
 Lalafo API интеграция
 """
 
-import aiohttp
+import asyncio
 import json
 from typing import List, Dict, Any, Optional
 import logging
 import re
 from datetime import datetime
 
+from app.core.exceptions import PlatformRequestError, PlatformTimeoutError, PlatformUnavailableError
+from app.services.platform_limits import request_json
+
 logger = logging.getLogger(__name__)
 
 class LalafoAPI:
@@ -44,6 +47,11 @@ class LalafoAPI:
             
         Returns:
             Список найденных вакансий с информацией о кандидатах
+
+        Raises:
+            PlatformUnavailableError: Платформа недоступна или исчерпана квота
+            PlatformRequestError: Платформа отклонила запрос (токен, права, параметры)
+            PlatformTimeoutError: Поиск не уложился в дедлайн
         """
         try:
             # Формируем поисковый запрос
@@ -61,19 +69,21 @@ class LalafoAPI:
             # Выполняем поиск
             url = f"{self.base_url}/search"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers, params=search_params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return await self._process_search_results(data.get("data", []), locations)
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Lalafo API error: {response.status} - {error_text}")
-                        return []
-                        
+            status, data = await request_json("lalafo", url, self.headers, search_params, resource="lalafo_search")
+            if status == 200:
+                return await self._process_search_results(data.get("data", []), locations)
+            # Токен, права или параметры запроса - ошибка, а не пустой результат поиска
+            reason = "токен доступа недействителен или нет прав" if status in (401, 403) else "запрос отклонен"
+            raise PlatformRequestError(f"Lalafo: {reason} (HTTP {status})")
+        
+        except (PlatformUnavailableError, PlatformRequestError):
+            # Платформа недоступна, исчерпана квота или отклонила запрос - сообщаем вызывающему
+            raise
+        except asyncio.TimeoutError as e:
+            raise PlatformTimeoutError("Lalafo не ответил до дедлайна поиска") from e
         except Exception as e:
             logger.error(f"Error searching Lalafo: {e}")
-            return []
+            raise
     
     async def _process_search_results(
         self, 
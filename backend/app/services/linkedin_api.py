@@ -2,11 +2,15 @@
 LinkedIn API интеграция
 """
 
-import aiohttp
+import asyncio
 import json
 from typing import List, Dict, Any, Optional
 import logging
 
+from app.core.config import settings
+from app.core.exceptions import PlatformRequestError, PlatformTimeoutError, PlatformUnavailableError
+from app.services.platform_limits import request_json
+
 logger = logging.getLogger(__name__)
 
 class LinkedInAPI:
@@ -27,7 +31,8 @@ class LinkedInAPI:
         locations: Optional[List[str]] = None,
         experience_min: Optional[int] = None,
         experience_max: Optional[int] = None,
-        limit: int = 50
+        limit: int = 50,
+        timeout: Optional[float] = None
     ) -> List[Dict[str, Any]]:
         """
         Поиск людей в LinkedIn
@@ -38,10 +43,17 @@ class LinkedInAPI:
             experience_min: Минимальный опыт работы
             experience_max: Максимальный опыт работы
             limit: Количество результатов
+            timeout: Общий дедлайн поиска вместе с загрузкой профилей в секундах
             
         Returns:
-            Список найденных профилей
+            Список найденных профилей (загруженные до дедлайна)
+
+        Raises:
+            PlatformUnavailableError: Платформа недоступна или исчерпана квота
+            PlatformRequestError: Платформа отклонила запрос (токен, права, параметры)
+            PlatformTimeoutError: Поиск не уложился в дедлайн
         """
+        deadline = asyncio.get_running_loop().time() + (timeout or settings.LINKEDIN_SEARCH_TIMEOUT_SECONDS)
         try:
             # Формируем поисковый запрос
             search_params = {
@@ -59,52 +71,66 @@ class LinkedInAPI:
             # Выполняем поиск через People Search API
             url = f"{self.base_url}/peopleSearch"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers, params=search_params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return await self._process_search_results(data.get("elements", []))
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"LinkedIn API error: {response.status} - {error_text}")
-                        return []
-                        
+            status, data = await request_json("linkedin", url, self.headers, search_params, deadline, "linkedin_search")
+            if status == 200:
+                return await self._process_search_results(data.get("elements", []), deadline)
+            # Токен, права или параметры запроса - ошибка, а не пустой результат поиска
+            reason = "токен доступа недействителен или нет прав" if status in (401, 403) else "запрос отклонен"
+            raise PlatformRequestError(f"LinkedIn: {reason} (HTTP {status})")
+        
+        except (PlatformUnavailableError, PlatformRequestError):
+            # Платформа недоступна, исчерпана квота или отклонила запрос - сообщаем вызывающему
+            raise
+        except asyncio.TimeoutError as e:
+            raise PlatformTimeoutError("LinkedIn не ответил до дедлайна поиска") from e
         except Exception as e:
             logger.error(f"Error searching LinkedIn: {e}")
-            return []
+            raise
     
-    async def _process_search_results(self, elements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    async def _process_search_results(
+        self,
+        elements: List[Dict[str, Any]],
+        deadline: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
         """
         Обработка результатов поиска LinkedIn
-        """
-        candidates = []
         
+        Профили загружаются параллельно (не более LINKEDIN_ENRICH_CONCURRENCY
+        одновременно). Ошибка или дедлайн одного профиля не прерывает остальные:
+        профиль, опыт или навыки которого не удалось получить, пропускается,
+        чтобы не перезаписать сохраненного кандидата пустыми данными.
+        """
+        profile_ids = []
         for element in elements:
-            try:
-                # Извлекаем основную информацию
-                person = element.get("person", {})
-                if not person:
-                    continue
-                
-                # Получаем ID профиля
-                profile_id = person.get("id")
-                if not profile_id:
-                    continue
-                
-                # Получаем детальную информацию о профиле
-                profile_data = await self._get_profile_details(profile_id)
-                if profile_data:
-                    candidates.append(profile_data)
-                    
-            except Exception as e:
-                logger.error(f"Error processing LinkedIn result: {e}")
+            # Извлекаем ID профиля
+            person = element.get("person") or {}
+            profile_id = person.get("id")
+            if profile_id and profile_id not in profile_ids:
+                profile_ids.append(profile_id)
+        
+        semaphore = asyncio.Semaphore(settings.LINKEDIN_ENRICH_CONCURRENCY)
+        
+        async def enrich(profile_id: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                return await self._get_profile_details(profile_id, deadline)
+        
+        results = await asyncio.gather(*(enrich(profile_id) for profile_id in profile_ids), return_exceptions=True)
+        
+        candidates = []
+        for profile_id, result in zip(profile_ids, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error processing LinkedIn result {profile_id}: {result!r}")
                 continue
+            if result:
+                candidates.append(result)
         
         return candidates
     
-    async def _get_profile_details(self, profile_id: str) -> Optional[Dict[str, Any]]:
+    async def _get_profile_details(self, profile_id: str, deadline: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """
         Получение детальной информации о профиле
+        
+        Профиль, опыт работы и навыки запрашиваются одновременно.
         """
         try:
             # Получаем основную информацию профиля
@@ -113,48 +139,50 @@ class LinkedInAPI:
                 "projection": "(id,firstName,lastName,headline,location,industry)"
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(profile_url, headers=self.headers, params=profile_params) as response:
-                    if response.status != 200:
-                        return None
-                    
-                    profile_data = await response.json()
-                    
-                    # Получаем опыт работы
-                    experience = await self._get_experience(profile_id)
-                    
-                    # Получаем навыки
-                    skills = await self._get_skills(profile_id)
-                    
-                    # Получаем контактную информацию
-                    contact_info = await self._get_contact_info(profile_id)
-                    
-                    # Формируем кандидата
-                    candidate = {
-                        "external_id": f"linkedin_{profile_id}",
-                        "first_name": profile_data.get("firstName", {}).get("localized", {}).get("en_US"),
-                        "last_name": profile_data.get("lastName", {}).get("localized", {}).get("en_US"),
-                        "current_position": profile_data.get("headline", {}).get("localized", {}).get("en_US"),
-                        "location": profile_data.get("location", {}).get("name"),
-                        "profile_url": f"https://www.linkedin.com/in/{profile_id}",
-                        "linkedin_url": f"https://www.linkedin.com/in/{profile_id}",
-                        "skills": skills,
-                        "summary": profile_data.get("headline", {}).get("localized", {}).get("en_US"),
-                        "experience_years": self._calculate_experience_years(experience),
-                        "current_company": self._get_current_company(experience),
-                        "email": contact_info.get("email"),
-                        "phone": contact_info.get("phone"),
-                        "salary_min": None,  # LinkedIn не предоставляет информацию о зарплате
-                        "salary_max": None
-                    }
-                    
-                    return candidate
+            async def get_profile() -> Optional[Dict[str, Any]]:
+                status, data = await request_json(
+                    "linkedin", profile_url, self.headers, profile_params, deadline, "linkedin_profile"
+                )
+                return data if status == 200 else None
+            
+            # Профиль, опыт работы, навыки и контактная информация
+            profile_data, experience, skills, contact_info = await asyncio.gather(
+                get_profile(),
+                self._get_experience(profile_id, deadline),
+                self._get_skills(profile_id, deadline),
+                self._get_contact_info(profile_id)
+            )
+            if profile_data is None:
+                return None
+            
+            # Формируем кандидата
+            candidate = {
+                "external_id": f"linkedin_{profile_id}",
+                "first_name": profile_data.get("firstName", {}).get("localized", {}).get("en_US"),
+                "last_name": profile_data.get("lastName", {}).get("localized", {}).get("en_US"),
+                "current_position": profile_data.get("headline", {}).get("localized", {}).get("en_US"),
+                "location": profile_data.get("location", {}).get("name"),
+                "profile_url": f"https://www.linkedin.com/in/{profile_id}",
+                "linkedin_url": f"https://www.linkedin.com/in/{profile_id}",
+                "skills": skills,
+                "summary": profile_data.get("headline", {}).get("localized", {}).get("en_US"),
+                "experience_years": self._calculate_experience_years(experience),
+                "current_company": self._get_current_company(experience),
+                "email": contact_info.get("email"),
+                "phone": contact_info.get("phone"),
+                "salary_min": None,  # LinkedIn не предоставляет информацию о зарплате
+                "salary_max": None
+            }
+            
+            return candidate
                     
+        except (PlatformUnavailableError, asyncio.TimeoutError):
+            raise
         except Exception as e:
             logger.error(f"Error getting profile details for {profile_id}: {e}")
             return None
     
-    async def _get_experience(self, profile_id: str) -> List[Dict[str, Any]]:
+    async def _get_experience(self, profile_id: str, deadline: Optional[float] = None) -> List[Dict[str, Any]]:
         """Получение опыта работы"""
         try:
             experience_url = f"{self.base_url}/people/(id:{profile_id})/positions"
@@ -163,17 +191,20 @@ class LinkedInAPI:
                 "projection": "(elements*(id,title,company,startDate,endDate,description))"
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(experience_url, headers=self.headers, params=experience_params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get("elements", [])
-                    return []
+            status, data = await request_json(
+                "linkedin", experience_url, self.headers, experience_params, deadline, "linkedin_positions"
+            )
+            if status == 200:
+                return data.get("elements", [])
+            return []
+        except (PlatformUnavailableError, asyncio.TimeoutError):
+            # Неполный профиль не сохраняем: ошибка отбрасывает весь профиль
+            raise
         except Exception as e:
             logger.error(f"Error getting experience for {profile_id}: {e}")
             return []
     
-    async def _get_skills(self, profile_id: str) -> List[str]:
+    async def _get_skills(self, profile_id: str, deadline: Optional[float] = None) -> List[str]:
         """Получение навыков"""
         try:
             skills_url = f"{self.base_url}/people/(id:{profile_id})/skills"
@@ -182,17 +213,20 @@ class LinkedInAPI:
                 "projection": "(elements*(id,name))"
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(skills_url, headers=self.headers, params=skills_params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        skills = []
-                        for skill in data.get("elements", []):
-                            skill_name = skill.get("name", {}).get("localized", {}).get("en_US")
-                            if skill_name:
-                                skills.append(skill_name)
-                        return skills
-                    return []
+            status, data = await request_json(
+                "linkedin", skills_url, self.headers, skills_params, deadline, "linkedin_skills"
+            )
+            if status == 200:
+                skills = []
+                for skill in data.get("elements", []):
+                    skill_name = skill.get("name", {}).get("localized", {}).get("en_US")
+                    if skill_name:
+                        skills.append(skill_name)
+                return skills
+            return []
+        except (PlatformUnavailableError, asyncio.TimeoutError):
+            # Неполный профиль не сохраняем: ошибка отбрасывает весь профиль
+            raise
         except Exception as e:
             logger.error(f"Error getting skills for {profile_id}: {e}")
             return []
@@ -0,0 +1,253 @@
+"""
+Подбор и ранжирование кандидатов для вакансии
+Навыки кодируются битовыми векторами по словарю навыков,
+все профили оцениваются NumPy-операциями за один проход
+"""
+
+import threading
+from itertools import chain
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.commit_hooks import on_commit_if_changed
+from app.core.database import SessionLocal
+from app.models.job import Job, ExperienceLevel
+from app.models.user import CandidateProfile, User
+from app.services.skills import parse_skills
+
+# Диапазоны опыта (в годах), соответствующие уровню вакансии
+EXPERIENCE_RANGES = {
+    ExperienceLevel.JUNIOR: (0, 2),
+    ExperienceLevel.MIDDLE: (2, 5),
+    ExperienceLevel.SENIOR: (5, 8),
+    ExperienceLevel.LEAD: (7, 12),
+    ExperienceLevel.PRINCIPAL: (10, 40),
+}
+
+# Веса составляющих итоговой оценки
+WEIGHTS = {
+    "required_skills": 0.6,
+    "nice_to_have_skills": 0.15,
+    "experience": 0.15,
+    "salary": 0.1,
+}
+
+# Оценка для неизвестных значений (опыт/зарплата не указаны)
+UNKNOWN_SCORE = 0.5
+
+# Количество установленных бит для каждого значения байта
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+class SkillMask:
+    """Навыки вакансии в виде маски по байтам битовой матрицы"""
+
+    def __init__(self, columns: np.ndarray, masks: np.ndarray, total: int):
+        self.columns = columns  # индексы байтов, в которых есть навыки
+        self.masks = masks  # маски для этих байтов
+        self.total = total  # всего навыков (включая отсутствующие в словаре)
+
+class CandidateMatrix:
+    """Снимок профилей кандидатов в векторном виде"""
+
+    def __init__(
+        self,
+        profile_ids: np.ndarray,
+        skill_bits: np.ndarray,
+        vocabulary: Dict[str, int],
+        experience_years: np.ndarray,
+        salary_min: np.ndarray
+    ):
+        self.profile_ids = profile_ids
+        self.skill_bits = skill_bits  # (кандидаты x байты), бит j -> навык j
+        self.vocabulary = vocabulary
+        self.skill_names = [None] * len(vocabulary)
+        for name, index in vocabulary.items():
+            self.skill_names[index] = name
+        self.experience_years = experience_years  # NaN если не указан
+        self.salary_min = salary_min  # NaN если не указана
+
+    @classmethod
+    def from_rows(cls, rows: List[Tuple[int, Any, Optional[int], Optional[int]]]) -> "CandidateMatrix":
+        """Построение из строк (profile_id, skills, experience_years, salary_min)"""
+        vocabulary: Dict[str, int] = {}
+        parsed = []
+        for _, skills, _, _ in rows:
+            parsed.append([vocabulary.setdefault(skill, len(vocabulary)) for skill in parse_skills(skills)])
+
+        count = len(rows)
+        n_bytes = max(1, (len(vocabulary) + 7) // 8)
+        skill_bits = np.zeros((count, n_bytes), dtype=np.uint8)
+
+        lengths = np.fromiter((len(p) for p in parsed), dtype=np.int64, count=count)
+        if lengths.sum():
+            row_index = np.repeat(np.arange(count), lengths)
+            skill_index = np.fromiter(chain.from_iterable(parsed), dtype=np.int64, count=int(lengths.sum()))
+            bits = np.left_shift(1, skill_index & 7).astype(np.uint8)
+            np.bitwise_or.at(skill_bits, (row_index, skill_index >> 3), bits)
+
+        return cls(
+            profile_ids=np.fromiter((r[0] for r in rows), dtype=np.int64, count=count),
+            skill_bits=skill_bits,
+            vocabulary=vocabulary,
+            experience_years=np.array([np.nan if r[2] is None else r[2] for r in rows], dtype=np.float64),
+            salary_min=np.array([np.nan if r[3] is None else r[3] for r in rows], dtype=np.float64)
+        )
+
+    @classmethod
+    def build(cls, db: Session) -> "CandidateMatrix":
+        """Построение снимка по профилям активных кандидатов одним запросом"""
+        rows = db.query(
+            CandidateProfile.id,
+            CandidateProfile.skills,
+            CandidateProfile.experience_years,
+            CandidateProfile.expected_salary_min
+        ).join(User, CandidateProfile.user_id == User.id).filter(User.is_active == True).all()
+        return cls.from_rows([tuple(row) for row in rows])
+
+    def __len__(self) -> int:
+        return len(self.profile_ids)
+
+    def encode(self, skills: Any) -> SkillMask:
+        """Кодирование навыков вакансии в маску"""
+        names = parse_skills(skills)
+        by_byte: Dict[int, int] = {}
+        for name in names:
+            index = self.vocabulary.get(name)
+            if index is not None:
+                by_byte[index >> 3] = by_byte.get(index >> 3, 0) | (1 << (index & 7))
+
+        columns = np.fromiter(by_byte.keys(), dtype=np.int64, count=len(by_byte))
+        masks = np.fromiter(by_byte.values(), dtype=np.uint8, count=len(by_byte))
+        return SkillMask(columns, masks, len(names))
+
+    def overlap(self, mask: SkillMask) -> np.ndarray:
+        """Количество совпавших навыков для каждого кандидата"""
+        if not len(mask.columns):
+            return np.zeros(len(self), dtype=np.int64)
+        # Берем только байты, в которых есть навыки вакансии
+        return _POPCOUNT[self.skill_bits[:, mask.columns] & mask.masks].sum(axis=1, dtype=np.int64)
+
+    def matched_skills(self, position: int, mask: SkillMask) -> List[str]:
+        """Названия совпавших навыков кандидата"""
+        result = []
+        for column, byte_mask in zip(mask.columns, mask.masks):
+            value = int(self.skill_bits[position, column]) & int(byte_mask)
+            for bit in range(8):
+                if value & (1 << bit):
+                    result.append(self.skill_names[(int(column) << 3) + bit])
+        return result
+
+    def score(self, job: Job) -> Tuple[np.ndarray, Dict[str, np.ndarray], SkillMask, SkillMask]:
+        """Векторная оценка всех кандидатов для вакансии"""
+        required = self.encode(job.required_skills)
+        nice = self.encode(job.nice_to_have_skills)
+
+        parts = {
+            "required_skills": self._skill_score(required),
+            "nice_to_have_skills": self._skill_score(nice),
+            "experience": self._experience_score(job.experience_level),
+            "salary": self._salary_score(job.salary_max),
+        }
+
+        total = np.zeros(len(self), dtype=np.float64)
+        for name, values in parts.items():
+            total += WEIGHTS[name] * values
+        return total, parts, required, nice
+
+    def _skill_score(self, mask: SkillMask) -> np.ndarray:
+        if not mask.total:
+            return np.ones(len(self), dtype=np.float64)
+        return self.overlap(mask) / mask.total
+
+    def _experience_score(self, level: Optional[ExperienceLevel]) -> np.ndarray:
+        if level not in EXPERIENCE_RANGES:
+            return np.ones(len(self), dtype=np.float64)
+        low, high = EXPERIENCE_RANGES[level]
+        years = self.experience_years
+        # Недостаток опыта штрафуется сильнее, чем избыток
+        with np.errstate(invalid="ignore"):
+            score = np.where(
+                years < low,
+                1 - (low - years) / 3,
+                np.where(years > high, 1 - (years - high) / 6, 1.0)
+            )
+        score = np.clip(score, 0, 1)
+        score[np.isnan(years)] = UNKNOWN_SCORE
+        return score
+
+    def _salary_score(self, salary_max: Optional[int]) -> np.ndarray:
+        if not salary_max:
+            return np.ones(len(self), dtype=np.float64)
+        expected = self.salary_min
+        with np.errstate(invalid="ignore"):
+            score = np.where(expected <= salary_max, 1.0, 1 - (expected - salary_max) / salary_max)
+        score = np.clip(score, 0, 1)
+        score[np.isnan(expected)] = UNKNOWN_SCORE
+        return score
+
+    def top_k(self, job: Job, k: int) -> List[Dict[str, Any]]:
+        """Top-k кандидатов для вакансии по убыванию оценки"""
+        if not len(self) or k <= 0:
+            return []
+
+        total, parts, required, nice = self.score(job)
+        k = min(k, len(self))
+        # argpartition выбирает k лучших за O(n), сортируем только их
+        top = np.argpartition(-total, k - 1)[:k]
+        top = top[np.argsort(-total[top], kind="stable")]
+
+        return [
+            {
+                "candidate_id": int(self.profile_ids[i]),
+                "score": round(float(total[i]) * 100, 1),
+                "breakdown": {name: round(float(values[i]) * 100, 1) for name, values in parts.items()},
+                "matched_skills": self.matched_skills(i, required),
+                "matched_nice_to_have_skills": self.matched_skills(i, nice),
+            }
+            for i in top
+        ]
+
+# Снимок профилей перестраивается лениво после фиксации изменений профилей кандидатов
+_lock = threading.Lock()
+_matrix: Optional[CandidateMatrix] = None
+_version = 0
+_built_version = -1
+
+def get_candidate_matrix() -> CandidateMatrix:
+    """Получение актуального снимка профилей кандидатов (перестроение в собственной сессии)"""
+    global _matrix, _built_version
+    with _lock:
+        if _matrix is None or _built_version != _version:
+            version = _version
+            db = SessionLocal()
+            try:
+                _matrix = CandidateMatrix.build(db)
+            finally:
+                db.close()
+            _built_version = version
+        return _matrix
+
+def _rank(job: Job, limit: int) -> List[Dict[str, Any]]:
+    return get_candidate_matrix().top_k(job, limit)
+
+async def rank_candidates(job: Job, limit: int = 20) -> List[Dict[str, Any]]:
+    """Ранжирование кандидатов для вакансии (перестроение снимка и оценка - в пуле потоков)"""
+    return await run_in_threadpool(_rank, job, limit)
+
+# ========== ИНВАЛИДАЦИЯ ==========
+# Снимок устаревает после commit транзакций, изменивших профили кандидатов или активность пользователей
+
+def _is_relevant(obj) -> bool:
+    if isinstance(obj, CandidateProfile):
+        return True
+    return inspect(obj).attrs.is_active.history.has_changes()
+
+def _mark_stale() -> None:
+    global _version
+    _version += 1
+
+on_commit_if_changed((CandidateProfile, User), _mark_stale, is_relevant=_is_relevant)
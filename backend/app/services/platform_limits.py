@@ -0,0 +1,310 @@
+"""
+Защита запросов к внешним платформам
+Ограничение частоты (token bucket с учетом Retry-After), повторы с
+экспоненциальной задержкой и jitter для 429/5xx, circuit breaker,
+который сразу отказывает, пока платформа недоступна, и постоянный
+HTTP кэш с условными запросами
+"""
+
+import asyncio
+import logging
+import random
+import sqlite3
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.exceptions import PlatformUnavailableError
+from app.services.http_cache import cache_key, get_cache
+from app.services.http_client import deadline_timeout, get_session
+
+logger = logging.getLogger(__name__)
+
+# Платформа -> (запросов в секунду, размер пачки); остальные - PLATFORM_RATE_PER_SECOND/PLATFORM_BURST
+RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "linkedin": (5.0, 10),
+    "lalafo": (2.0, 5),
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """Ограничитель частоты: rate токенов в секунду, не больше capacity накопленных"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()  # С какого момента начисляются токены
+        self.throttled = 0
+        self.throttle_wait_seconds = 0.0
+
+    def pause(self, seconds: float) -> None:
+        """Остановка выдачи токенов (Retry-After от платформы): после паузы доступен один запрос"""
+        resume_at = time.monotonic() + seconds
+        if resume_at > self._updated:
+            self._updated = resume_at
+            self._tokens = min(self._tokens, 1.0)
+
+    async def acquire(self, deadline: Optional[float] = None) -> None:
+        """
+        Ожидание токена
+
+        Токен резервируется сразу (баланс может уйти в минус - очередь),
+        поэтому одновременные запросы расходятся по времени без блокировки.
+
+        Raises:
+            asyncio.TimeoutError: токен не освободится до дедлайна (по loop.time())
+        """
+        now = time.monotonic()
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+        self._tokens -= 1
+        wait = (self._updated - now) + max(0.0, -self._tokens / self.rate)
+        if wait <= 0:
+            return
+        if deadline is not None and asyncio.get_running_loop().time() + wait > deadline:
+            self._tokens += 1
+            raise asyncio.TimeoutError("Лимит запросов платформы не позволяет уложиться в дедлайн")
+        self.throttled += 1
+        self.throttle_wait_seconds += wait
+        await asyncio.sleep(wait)
+
+class CircuitBreaker:
+    """
+    Circuit breaker: после failure_threshold ошибок подряд запросы отклоняются
+    reset_seconds, затем один пробный запрос решает, закрыть ли его снова
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.opened_count = 0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def record_inconclusive(self) -> None:
+        """Запрос не показал, работает ли платформа (429, истек дедлайн) - состояние не меняется"""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opened_count += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def retry_in(self) -> float:
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+class PlatformGuard:
+    """Лимит частоты, breaker и счетчики одной платформы"""
+
+    def __init__(self, platform: str):
+        rate, burst = RATE_LIMITS.get(platform, (settings.PLATFORM_RATE_PER_SECOND, settings.PLATFORM_BURST))
+        self.platform = platform
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(settings.PLATFORM_BREAKER_FAILURES, settings.PLATFORM_BREAKER_RESET_SECONDS)
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0  # Ответы 429
+        self.server_errors = 0  # Ответы 5xx
+        self.network_errors = 0
+        self.short_circuited = 0  # Отклонено открытым breaker
+        self.cache_hits = 0  # Ответ из кэша без запроса
+        self.cache_revalidated = 0  # Ответы 304 на условный запрос
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Состояние breaker и метрики ограничения для логов и статистики"""
+        return {
+            "circuit": self.breaker.state,
+            "circuit_retry_in_seconds": round(self.breaker.retry_in(), 1),
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "circuit_opened_count": self.breaker.opened_count,
+            "requests": self.requests,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "server_errors": self.server_errors,
+            "network_errors": self.network_errors,
+            "short_circuited": self.short_circuited,
+            "throttled": self.bucket.throttled,
+            "throttle_wait_seconds": round(self.bucket.throttle_wait_seconds, 2),
+            "cache_hits": self.cache_hits,
+            "cache_revalidated": self.cache_revalidated,
+        }
+
+_guards: Dict[str, PlatformGuard] = {}
+
+def get_guard(platform: str) -> PlatformGuard:
+    guard = _guards.get(platform)
+    if guard is None:
+        guard = _guards[platform] = PlatformGuard(platform)
+    return guard
+
+def platform_health() -> Dict[str, Dict[str, Any]]:
+    """Состояние всех платформ, к которым были запросы"""
+    return {platform: guard.snapshot() for platform, guard in _guards.items()}
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After: секунды или HTTP дата"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def _backoff(attempt: int) -> float:
+    """Экспоненциальная задержка с полным jitter"""
+    ceiling = min(settings.PLATFORM_BACKOFF_MAX_SECONDS, settings.PLATFORM_BACKOFF_BASE_SECONDS * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+async def _cache_call(func, *args) -> Any:
+    """Операция с кэшем в пуле потоков; сбой кэша не должен ломать запрос"""
+    try:
+        return await run_in_threadpool(func, *args)
+    except (sqlite3.Error, OSError, ValueError) as e:
+        logger.warning(f"HTTP кэш недоступен: {e}")
+        return None
+
+async def request_json(
+    platform: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    deadline: Optional[float] = None,
+    resource: Optional[str] = None
+) -> Tuple[int, Any]:
+    """
+    GET запрос к платформе через лимит частоты, повторы и breaker
+
+    Если указан тип ресурса (ключ http_cache.RESOURCE_TTLS), ответ 200
+    кэшируется: свежая запись возвращается без запроса, устаревшая
+    перепроверяется по ETag/Last-Modified, и на 304 отдаются сохраненные данные.
+
+    Returns:
+        (HTTP статус, JSON тела для 2xx или None)
+
+    Raises:
+        PlatformUnavailableError: breaker открыт или повторы исчерпаны
+        asyncio.TimeoutError: не уложились в дедлайн
+    """
+    guard = get_guard(platform)
+    cache = get_cache() if resource else None
+    key = cached = None
+    if cache is not None:
+        key = cache_key(url, params)
+        cached = await _cache_call(cache.get, key)
+        if cached is not None and cached.is_fresh:
+            guard.cache_hits += 1
+            return 200, cached.data
+        if cached is not None:
+            headers = {**(headers or {}), **cached.conditional_headers()}
+
+    attempt = 0
+    while True:
+        if not guard.breaker.allow():
+            guard.short_circuited += 1
+            raise PlatformUnavailableError(
+                f"Платформа {platform} временно недоступна, повтор через {guard.breaker.retry_in():.1f} с"
+            )
+
+        # Исход запроса должен попасть в breaker при любом выходе (дедлайн лимитера,
+        # отмена задачи), иначе пробный запрос полуоткрытого breaker не освободится
+        settled = False
+        try:
+            await guard.bucket.acquire(deadline)
+            guard.requests += 1
+            delay = None
+            paused = False
+            try:
+                async with get_session().get(
+                    url, headers=headers, params=params, timeout=deadline_timeout(deadline)
+                ) as response:
+                    if response.status not in RETRY_STATUSES:
+                        # 4xx (кроме 429) - ответ платформы, а не сбой
+                        guard.breaker.record_success()
+                        settled = True
+                        if response.status == 304 and cached is not None:
+                            guard.cache_revalidated += 1
+                            await _cache_call(cache.refresh, key, resource)
+                            return 200, cached.data
+                        data = await response.json(content_type=None) if response.status < 300 else None
+                        if cache is not None and response.status == 200:
+                            await _cache_call(
+                                cache.put, key, url, resource, data,
+                                response.headers.get("ETag"), response.headers.get("Last-Modified")
+                            )
+                        return response.status, data
+                    error = f"HTTP {response.status}"
+                    delay = _retry_after(response.headers.get("Retry-After"))
+                    if response.status == 429:
+                        guard.rate_limited += 1
+                        # Квота - не отказ платформы: breaker не срабатывает, а все запросы
+                        # к платформе ждут Retry-After в лимитере
+                        delay = delay if delay is not None else _backoff(attempt)
+                        guard.bucket.pause(delay)
+                        guard.breaker.record_inconclusive()
+                        settled = True
+                        paused = True
+                    else:
+                        guard.server_errors += 1
+                        guard.breaker.record_failure()
+                        settled = True
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if deadline is not None and asyncio.get_running_loop().time() >= deadline:
+                    raise asyncio.TimeoutError("Истек дедлайн операции") from e
+                guard.network_errors += 1
+                guard.breaker.record_failure()
+                settled = True
+                error = f"{type(e).__name__}: {e}"
+        finally:
+            if not settled:
+                guard.breaker.record_inconclusive()
+
+        if attempt >= settings.PLATFORM_MAX_RETRIES:
+            raise PlatformUnavailableError(f"Платформа {platform} не ответила после {attempt + 1} попыток: {error}")
+        delay = delay if delay is not None else _backoff(attempt)
+        if deadline is not None and asyncio.get_running_loop().time() + delay > deadline:
+            raise PlatformUnavailableError(f"Платформа {platform} не ответила до дедлайна: {error}")
+        attempt += 1
+        guard.retries += 1
+        logger.warning(f"{platform}: {error}, повтор {attempt} через {delay:.1f} с")
+        if not paused:
+            await asyncio.sleep(delay)
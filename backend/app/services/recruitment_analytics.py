@@ -0,0 +1,229 @@
+"""
+Аналитика рекрутинга по потокам и рекрутерам
+Метрики считаются сгруппированными агрегатными запросами (один запрос на
+все потоки или всех рекрутеров). Вакансия относится к своему автору
+(jobs.created_by: рекрутер или владелец компании) и к его потоку
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.models.analytics import AnalyticsDailyRollup
+from app.models.job import InterviewInvitation, Job, JobApplication, JobApplicationStatus
+from app.models.user import RecruitmentStream, User, UserRole
+
+RECRUITER_ROLES = (UserRole.RECRUITER, UserRole.SENIOR_RECRUITER)
+
+# Отклик дошел до интервью
+INTERVIEW_STATUSES = (
+    JobApplicationStatus.INTERVIEW_SCHEDULED,
+    JobApplicationStatus.INTERVIEW_COMPLETED,
+    JobApplicationStatus.ACCEPTED,
+)
+
+EMPTY_METRICS = {
+    "total_jobs": 0,
+    "total_applications": 0,
+    "successful_hires": 0,
+    "success_rate": 0,
+    "average_time_to_hire": 0,
+    "conversion_rate": 0,
+}
+
+# ========== ОБЛАСТЬ ДАННЫХ ==========
+
+def stream_scope(stream: RecruitmentStream):
+    """Вакансии потока: рекрутеров потока и его старшего рекрутера"""
+    return or_(User.stream_id == stream.id, User.id == stream.senior_recruiter_id)
+
+def owner_stream_id():
+    """Поток владельца вакансий: свой поток рекрутера или поток, которым он владеет"""
+    owned_stream = select(RecruitmentStream.id).where(
+        RecruitmentStream.senior_recruiter_id == User.id
+    ).limit(1).scalar_subquery()
+    return func.coalesce(User.stream_id, owned_stream)
+
+def owner_scope(
+    db: Session,
+    current_user: User,
+    stream_id: Optional[int] = None
+) -> Tuple[Optional[RecruitmentStream], Any]:
+    """
+    Условие на владельца вакансий для роли пользователя
+
+    Returns:
+        (поток области или None, условие на User или None - без ограничений)
+    """
+    if current_user.role == UserRole.RECRUITER:
+        # Рекрутер видит только свои данные
+        return current_user.stream, User.id == current_user.id
+
+    if current_user.role == UserRole.SENIOR_RECRUITER:
+        # Старший рекрутер видит данные своего потока
+        owned_stream = db.query(RecruitmentStream).filter(
+            RecruitmentStream.senior_recruiter_id == current_user.id
+        ).first()
+        if not owned_stream:
+            return None, User.id == current_user.id
+        return owned_stream, stream_scope(owned_stream)
+
+    # Главный рекрутер или администратор видит все потоки
+    if stream_id:
+        stream = db.get(RecruitmentStream, stream_id)
+        if not stream:
+            return None, User.stream_id == stream_id
+        return stream, stream_scope(stream)
+    return None, None
+
+# ========== АГРЕГАТЫ ==========
+
+def days_between(db: Session, start, end):
+    """Разница между датами в днях (SQL выражение под диалект БД)"""
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        return func.extract("epoch", end - start) / 86400.0
+    if dialect == "mysql":
+        return func.timestampdiff(text("SECOND"), start, end) / 86400.0
+    return func.julianday(end) - func.julianday(start)
+
+def _application_aggregates(db: Session) -> List:
+    hired = JobApplication.status == JobApplicationStatus.ACCEPTED
+    reached_interview = or_(
+        JobApplication.interview_scheduled_at.isnot(None),
+        JobApplication.status.in_(INTERVIEW_STATUSES)
+    )
+    hire_days = case(
+        (and_(hired, JobApplication.decision_at.isnot(None)),
+         days_between(db, JobApplication.applied_at, JobApplication.decision_at))
+    )
+    return [
+        func.count(JobApplication.id).label("total_applications"),
+        func.count(case((hired, JobApplication.id))).label("successful_hires"),
+        func.count(case((reached_interview, JobApplication.id))).label("interviews"),
+        func.avg(hire_days).label("average_time_to_hire"),
+    ]
+
+def _jobs_query(db: Session, *columns, since: Optional[datetime] = None):
+    """Вакансии с владельцами и откликами (отклики за период, если задан since)"""
+    applications_join = JobApplication.job_id == Job.id
+    if since is not None:
+        applications_join = and_(applications_join, JobApplication.applied_at >= since)
+    return db.query(
+        *columns,
+        func.count(func.distinct(Job.id)).label("total_jobs"),
+        *_application_aggregates(db)
+    ).select_from(Job).join(
+        User, Job.created_by == User.id
+    ).outerjoin(JobApplication, applications_join)
+
+def _rate(part: int, total: int) -> float:
+    return round(part / total * 100, 2) if total else 0
+
+def build_metrics(row: Any) -> Dict[str, Any]:
+    """Метрики из строки агрегатного запроса"""
+    total = row.total_applications or 0
+    hires = row.successful_hires or 0
+    average = row.average_time_to_hire
+    return {
+        "total_jobs": getattr(row, "total_jobs", 0) or 0,
+        "total_applications": total,
+        "successful_hires": hires,
+        "success_rate": _rate(hires, total),
+        "average_time_to_hire": round(float(average), 1) if average is not None else 0,
+        "conversion_rate": _rate(row.interviews or 0, total),
+    }
+
+# ========== МЕТРИКИ ==========
+
+def get_summary(db: Session, scope=None, since: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Итоговые метрики области одним запросом
+
+    Количество интервью считается скалярным подзапросом в том же SELECT.
+    """
+    interviews = db.query(func.count(InterviewInvitation.id)).join(
+        Job, InterviewInvitation.job_id == Job.id
+    ).join(User, Job.created_by == User.id)
+    if scope is not None:
+        interviews = interviews.filter(scope)
+    if since is not None:
+        interviews = interviews.filter(InterviewInvitation.invited_at >= since)
+
+    query = _jobs_query(db, interviews.scalar_subquery().label("total_interviews"), since=since)
+    if scope is not None:
+        query = query.filter(scope)
+    row = query.one()
+    return {**build_metrics(row), "total_interviews": row.total_interviews or 0}
+
+def get_metrics_by_stream(db: Session, stream_ids: Optional[List[int]] = None) -> Dict[int, Dict[str, Any]]:
+    """Метрики всех потоков одним запросом с GROUP BY"""
+    query = _jobs_query(db, RecruitmentStream.id.label("stream_id")).join(
+        RecruitmentStream,
+        or_(User.stream_id == RecruitmentStream.id, User.id == RecruitmentStream.senior_recruiter_id)
+    )
+    if stream_ids is not None:
+        query = query.filter(RecruitmentStream.id.in_(stream_ids))
+    return {row.stream_id: build_metrics(row) for row in query.group_by(RecruitmentStream.id)}
+
+def get_metrics_by_owner(db: Session, user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Метрики рекрутеров (по авторам вакансий) одним запросом с GROUP BY"""
+    if not user_ids:
+        return {}
+    query = _jobs_query(db, User.id.label("user_id")).filter(User.id.in_(user_ids))
+    return {row.user_id: build_metrics(row) for row in query.group_by(User.id)}
+
+def get_performance(db: Session, scope=None, since: Optional[date] = None, until: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Метрики и тренды за период по дневным агрегатам
+
+    Читаются только строки analytics_daily_rollups за период (O(дней x вакансий),
+    ответ O(дней)). События относятся к своему дню: отклик к дню подачи,
+    найм к дню решения.
+    """
+    until = until or date.today()
+    rollup = AnalyticsDailyRollup
+    query = db.query(
+        rollup.day,
+        func.sum(rollup.applications).label("applications"),
+        func.sum(rollup.interviews_scheduled).label("interviews"),
+        func.sum(rollup.hires).label("hires"),
+        func.sum(rollup.hire_days_sum).label("hire_days_sum"),
+    ).filter(rollup.day <= until)
+    if since is not None:
+        query = query.filter(rollup.day >= since)
+    if scope is not None:
+        query = query.join(User, rollup.owner_id == User.id).filter(scope)
+    rows = {row.day: row for row in query.group_by(rollup.day)}
+
+    total = sum(row.applications or 0 for row in rows.values())
+    hires = sum(row.hires or 0 for row in rows.values())
+    interviews = sum(row.interviews or 0 for row in rows.values())
+    hire_days_sum = sum(row.hire_days_sum or 0 for row in rows.values())
+
+    # Ряды без пропусков: дни без событий с нулями
+    first_day = since or min(rows, default=until)
+    days = [first_day + timedelta(days=offset) for offset in range((until - first_day).days + 1)]
+
+    def series(field: str) -> List[Dict[str, Any]]:
+        return [
+            {"date": day.isoformat(), "count": int(getattr(rows[day], field) or 0) if day in rows else 0}
+            for day in days
+        ]
+
+    return {
+        "metrics": {
+            "total_applications": total,
+            "successful_hires": hires,
+            "success_rate": _rate(hires, total),
+            "average_time_to_hire": round(hire_days_sum / hires, 1) if hires else 0,
+            "conversion_rate": _rate(interviews, total),
+        },
+        "trends": {
+            "applications_over_time": series("applications"),
+            "interviews_over_time": series("interviews"),
+            "hires_over_time": series("hires"),
+        }
+    }
@@ -0,0 +1,245 @@
+"""
+Распределение оценок интервью
+In-memory индекс отсортированных оценок по вакансиям и компаниям: процентильный
+ранг и гистограмма считаются бинарным поиском, а не перебором отчетов.
+Индекс свой у каждого воркера и обновляется изменениями отчетов и анализов,
+сделанными через ORM этого процесса (см. app.core.commit_hooks)
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.commit_hooks import DELETED, IncrementalIndex
+from app.models.interview import AIAnalysis, InterviewSession
+from app.models.interview_report import InterviewReport, ReportStatus
+from app.models.job import InterviewInvitation, Job
+
+# Источник -> оцениваемые столбцы
+METRICS: Dict[str, Tuple[str, ...]] = {
+    "report": ("overall_score", "technical_score", "communication_score", "experience_score"),
+    "analysis": tuple(
+        column.key for column in AIAnalysis.__table__.columns if column.key.endswith("_score")
+    ),
+}
+
+# Шкала оценок источника (границы гистограммы по умолчанию)
+SCORE_RANGES = {
+    "report": (0.0, 100.0),
+    "analysis": (0.0, 5.0),
+}
+
+SCOPES = ("job", "company")
+
+MAX_BINS = 100
+
+class ScoreEntry(NamedTuple):
+    """Оценки одного отчета или анализа"""
+    job_id: int
+    company_id: int
+    candidate_id: int
+    scores: Dict[str, float]
+
+class ScoreDistributionIndex(IncrementalIndex):
+    """Отсортированные оценки по (область, id области, источник, метрика) с инкрементальным обновлением"""
+
+    def __init__(self):
+        super().__init__()
+        self._entries: Dict[Tuple[str, int], ScoreEntry] = {}
+        self._sorted: Dict[Tuple[str, int, str, str], List[float]] = defaultdict(list)
+
+    def _load(self, db: Session) -> None:
+        """Загрузка всех оценок (одна сортировка на список)"""
+        reports = db.query(
+            InterviewReport.id, Job.id, Job.company_id, InterviewReport.candidate_id,
+            *(getattr(InterviewReport, metric) for metric in METRICS["report"])
+        ).join(Job, InterviewReport.job_id == Job.id).filter(
+            InterviewReport.status == ReportStatus.COMPLETED
+        )
+        analyses = db.query(
+            AIAnalysis.id, Job.id, Job.company_id, InterviewInvitation.candidate_id,
+            *(getattr(AIAnalysis, metric) for metric in METRICS["analysis"])
+        ).join(
+            InterviewSession, AIAnalysis.interview_session_id == InterviewSession.id
+        ).join(
+            InterviewInvitation, InterviewSession.invitation_id == InterviewInvitation.id
+        ).join(Job, InterviewInvitation.job_id == Job.id)
+
+        for source, rows in (("report", reports), ("analysis", analyses)):
+            for subject_id, job_id, company_id, candidate_id, *scores in rows:
+                entry = ScoreEntry(job_id, company_id, candidate_id, _scores(source, scores))
+                self._entries[(source, subject_id)] = entry
+                for key in _keys(source, entry):
+                    self._sorted[key].append(entry.scores[key[3]])
+        for values in self._sorted.values():
+            values.sort()
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._sorted.clear()
+
+    def upsert(self, source: str, subject_id: int, entry: Optional[ScoreEntry]) -> None:
+        """Добавление/обновление оценок (None - удаление)"""
+        with self._lock:
+            self.remove(source, subject_id)
+            if entry is None or not entry.scores:
+                return
+            self._entries[(source, subject_id)] = entry
+            for key in _keys(source, entry):
+                insort(self._sorted[key], entry.scores[key[3]])
+
+    def remove(self, source: str, subject_id: int) -> None:
+        with self._lock:
+            entry = self._entries.pop((source, subject_id), None)
+            if entry is None:
+                return
+            for key in _keys(source, entry):
+                values = self._sorted.get(key)
+                if values is None:
+                    continue
+                position = bisect_left(values, entry.scores[key[3]])
+                if position < len(values) and values[position] == entry.scores[key[3]]:
+                    del values[position]
+                if not values:
+                    del self._sorted[key]
+
+    def remove_job(self, job_id: int) -> None:
+        """Удаление оценок удаленной вакансии"""
+        with self._lock:
+            for source, subject_id in [key for key, entry in self._entries.items() if entry.job_id == job_id]:
+                self.remove(source, subject_id)
+
+    def count(self, scope: str, scope_id: int, source: str, metric: str) -> int:
+        with self._lock:
+            return len(self._sorted.get((scope, scope_id, source, metric), ()))
+
+    def percentile_rank(self, scope: str, scope_id: int, source: str, metric: str, value: float) -> Optional[float]:
+        """
+        Процент оценок ниже value (равные считаются наполовину), None - нет оценок
+
+        Два бинарных поиска по отсортированному списку, O(log n).
+        """
+        with self._lock:
+            values = self._sorted.get((scope, scope_id, source, metric))
+            if not values:
+                return None
+            below = bisect_left(values, value)
+            equal = bisect_right(values, value) - below
+            return round((below + equal / 2) / len(values) * 100, 1)
+
+    def histogram(
+        self,
+        scope: str,
+        scope_id: int,
+        source: str,
+        metric: str,
+        bins: int = 10,
+        low: Optional[float] = None,
+        high: Optional[float] = None
+    ) -> Dict[str, object]:
+        """Гистограмма по равным интервалам [low, high]: бинарный поиск на каждую границу, O(bins log n)"""
+        default_low, default_high = SCORE_RANGES[source]
+        low = default_low if low is None else low
+        high = default_high if high is None else high
+        step = (high - low) / bins
+        edges = [low + step * index for index in range(bins)] + [high]
+
+        with self._lock:
+            values = self._sorted.get((scope, scope_id, source, metric), [])
+            # Последний интервал включает правую границу
+            positions = [bisect_left(values, edge) for edge in edges[:-1]] + [bisect_right(values, high)]
+            total = len(values)
+            quartiles = [_quantile(values, q) for q in (0.25, 0.5, 0.75)] if values else [None] * 3
+            bounds = (values[0], values[-1]) if values else (None, None)
+
+        return {
+            "count": total,
+            "edges": [round(edge, 4) for edge in edges],
+            "counts": [positions[index + 1] - positions[index] for index in range(bins)],
+            "min": bounds[0],
+            "max": bounds[1],
+            "p25": quartiles[0],
+            "median": quartiles[1],
+            "p75": quartiles[2],
+        }
+
+    def subject_ranks(self, source: str, subject_id: int) -> Optional[Dict[str, Dict[str, Optional[float]]]]:
+        """Процентильные ранги оценок отчета/анализа среди его вакансии и компании"""
+        with self._lock:
+            entry = self._entries.get((source, subject_id))
+            if entry is None:
+                return None
+            return {
+                metric: {
+                    "score": score,
+                    "job_percentile": self.percentile_rank("job", entry.job_id, source, metric, score),
+                    "job_count": self.count("job", entry.job_id, source, metric),
+                    "company_percentile": self.percentile_rank("company", entry.company_id, source, metric, score),
+                    "company_count": self.count("company", entry.company_id, source, metric),
+                }
+                for metric, score in entry.scores.items()
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+def _scores(source: str, values) -> Dict[str, float]:
+    return {metric: float(value) for metric, value in zip(METRICS[source], values) if value is not None}
+
+def _keys(source: str, entry: ScoreEntry) -> List[Tuple[str, int, str, str]]:
+    return [
+        key
+        for metric in entry.scores
+        for key in (("job", entry.job_id, source, metric), ("company", entry.company_id, source, metric))
+    ]
+
+def _quantile(values: List[float], q: float) -> float:
+    """Квантиль отсортированного списка с линейной интерполяцией"""
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return round(values[lower] + (values[upper] - values[lower]) * (position - lower), 2)
+
+score_index = ScoreDistributionIndex()
+
+# ========== ИНКРЕМЕНТАЛЬНОЕ ОБНОВЛЕНИЕ ==========
+# Изменения отчетов собираются при flush и применяются только после commit
+
+def _report_entry(session: Session, report: InterviewReport) -> Optional[ScoreEntry]:
+    if report.status != ReportStatus.COMPLETED:
+        return None
+    scores = _scores("report", [getattr(report, metric) for metric in METRICS["report"]])
+    if not scores:
+        return None
+    company_id = session.execute(select(Job.company_id).where(Job.id == report.job_id)).scalar()
+    if company_id is None:
+        return None
+    return ScoreEntry(report.job_id, company_id, report.candidate_id, scores)
+
+def _analysis_entry(session: Session, analysis: AIAnalysis) -> Optional[ScoreEntry]:
+    scores = _scores("analysis", [getattr(analysis, metric) for metric in METRICS["analysis"]])
+    if not scores:
+        return None
+    row = session.execute(
+        select(Job.id, Job.company_id, InterviewInvitation.candidate_id).join(
+            InterviewInvitation, InterviewInvitation.job_id == Job.id
+        ).join(
+            InterviewSession, InterviewSession.invitation_id == InterviewInvitation.id
+        ).where(InterviewSession.id == analysis.interview_session_id)
+    ).first()
+    return ScoreEntry(row[0], row[1], row[2], scores) if row else None
+
+def _score_changes(session: Session, obj, kind: str):
+    if isinstance(obj, Job):
+        # Отчеты вакансии удаляются массовым запросом вместе с ней
+        return (("remove_job", (obj.id,)),) if kind == DELETED else ()
+    source = "report" if isinstance(obj, InterviewReport) else "analysis"
+    if kind == DELETED:
+        return (("remove", (source, obj.id)),)
+    entry = _report_entry(session, obj) if source == "report" else _analysis_entry(session, obj)
+    return (("upsert", (source, obj.id, entry)),)
+
+score_index.watch((InterviewReport, AIAnalysis, Job), _score_changes)
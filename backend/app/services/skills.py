@@ -0,0 +1,217 @@
+"""
+Утилиты для работы с навыками
+Нормализация названий, разбор навыков, хранимых как JSON в Text,
+и синхронизация нормализованных таблиц навыков
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional, Union
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from app.core.database import dialect_insert
+from app.models.integration import ExternalCandidate
+from app.models.job import Job
+from app.models.skill import Skill, candidate_skills, external_candidate_skills, job_skills
+from app.models.user import CandidateProfile
+
+def normalize_skill(skill: str) -> str:
+    """Нормализация названия навыка ("  Python " -> "python")"""
+    return " ".join(skill.split()).lower()
+
+def split_skills(raw: Optional[Union[str, Iterable[str]]]) -> List[str]:
+    """
+    Разбор навыков в список названий без дубликатов (с сохранением написания)
+
+    Поддерживает JSON массив в строке, строку через запятую и обычный список
+    """
+    if not raw:
+        return []
+
+    if isinstance(raw, str):
+        try:
+            values = json.loads(raw)
+        except (json.JSONDecodeError, TypeError):
+            values = raw.split(",")
+        if isinstance(values, str):
+            values = [values]
+        elif not isinstance(values, list):
+            values = raw.split(",")
+    else:
+        values = raw
+
+    result = []
+    seen = set()
+    for value in values:
+        if not isinstance(value, str):
+            continue
+        name = " ".join(value.split())
+        normalized = name.lower()
+        if normalized and normalized not in seen:
+            seen.add(normalized)
+            result.append(name)
+    return result
+
+def parse_skills(raw: Optional[Union[str, Iterable[str]]]) -> List[str]:
+    """Разбор навыков в список нормализованных названий без дубликатов"""
+    return [name.lower() for name in split_skills(raw)]
+
+# ========== СПРАВОЧНИК НАВЫКОВ ==========
+
+def ensure_skill_ids(connection, names: Iterable[str]) -> Dict[str, int]:
+    """Получение id навыков по названиям (недостающие добавляются в справочник)"""
+    by_normalized: Dict[str, str] = {}
+    for name in names:
+        by_normalized.setdefault(normalize_skill(name), " ".join(name.split()))
+    by_normalized.pop("", None)
+    if not by_normalized:
+        return {}
+
+    skills_table = Skill.__table__
+    lookup = select(skills_table.c.normalized_name, skills_table.c.id)
+    ids = dict(connection.execute(
+        lookup.where(skills_table.c.normalized_name.in_(list(by_normalized)))
+    ).all())
+
+    missing = [
+        {"name": name, "normalized_name": normalized}
+        for normalized, name in by_normalized.items() if normalized not in ids
+    ]
+    if missing:
+        stmt = dialect_insert(connection, skills_table)
+        if stmt is not None:
+            connection.execute(stmt.on_conflict_do_nothing(index_elements=["normalized_name"]), missing)
+        else:
+            connection.execute(skills_table.insert(), missing)
+        ids.update(connection.execute(
+            lookup.where(skills_table.c.normalized_name.in_([row["normalized_name"] for row in missing]))
+        ).all())
+
+    return ids
+
+def skills_subquery(link_table, owner_column: str, skills: Iterable[str]):
+    """
+    Подзапрос id владельцев, у которых есть все перечисленные навыки
+
+    Точное совпадение по нормализованному названию ("java" не совпадает с "javascript")
+    """
+    names = parse_skills(list(skills))
+    owner = link_table.c[owner_column]
+    return (
+        select(owner)
+        .join(Skill, Skill.id == link_table.c.skill_id)
+        .where(Skill.normalized_name.in_(names))
+        .group_by(owner)
+        .having(func.count(link_table.c.skill_id) == len(names))
+    )
+
+# ========== СИНХРОНИЗАЦИЯ СВЯЗЕЙ ==========
+
+def _replace_links(connection, link_table, owner_column: str, owner_ids: List[int], rows: List[dict]):
+    """Замена связей навыков для владельцев"""
+    connection.execute(link_table.delete().where(link_table.c[owner_column].in_(owner_ids)))
+    if rows:
+        connection.execute(link_table.insert(), rows)
+
+def _candidate_rows(connection, items) -> List[dict]:
+    """items: [(candidate_id, skills)]"""
+    ids = ensure_skill_ids(connection, [name for _, raw in items for name in split_skills(raw)])
+    return [
+        {"candidate_id": owner_id, "skill_id": ids[name]}
+        for owner_id, raw in items for name in parse_skills(raw)
+    ]
+
+def _external_candidate_rows(connection, items) -> List[dict]:
+    """items: [(external_candidate_id, skills)]"""
+    ids = ensure_skill_ids(connection, [name for _, raw in items for name in split_skills(raw)])
+    return [
+        {"external_candidate_id": owner_id, "skill_id": ids[name]}
+        for owner_id, raw in items for name in parse_skills(raw)
+    ]
+
+def sync_external_candidate_links(connection, items) -> None:
+    """
+    Пересборка связей навыков внешних кандидатов пачкой
+
+    items: [(external_candidate_id, skills)]; для записей, сохраненных
+    в обход ORM (upsert), где обработчики событий модели не вызываются
+    """
+    items = list(items)
+    if items:
+        rows = _external_candidate_rows(connection, items)
+        _replace_links(connection, external_candidate_skills, "external_candidate_id", [item[0] for item in items], rows)
+
+def _job_rows(connection, items) -> List[dict]:
+    """items: [(job_id, required_skills, nice_to_have_skills)]"""
+    ids = ensure_skill_ids(connection, [
+        name for _, required, nice in items for name in split_skills(required) + split_skills(nice)
+    ])
+    rows = []
+    for job_id, required, nice in items:
+        required_names = parse_skills(required)
+        rows.extend({"job_id": job_id, "skill_id": ids[name], "is_required": True} for name in required_names)
+        rows.extend(
+            {"job_id": job_id, "skill_id": ids[name], "is_required": False}
+            for name in parse_skills(nice) if name not in required_names
+        )
+    return rows
+
+def _changed(target, *attributes: str) -> bool:
+    state = inspect(target)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+def _sync_candidate(mapper, connection, target):
+    if _changed(target, "skills"):
+        rows = _candidate_rows(connection, [(target.id, target.skills)])
+        _replace_links(connection, candidate_skills, "candidate_id", [target.id], rows)
+
+def _sync_external_candidate(mapper, connection, target):
+    if _changed(target, "skills"):
+        rows = _external_candidate_rows(connection, [(target.id, target.skills)])
+        _replace_links(connection, external_candidate_skills, "external_candidate_id", [target.id], rows)
+
+def _sync_job(mapper, connection, target):
+    if _changed(target, "required_skills", "nice_to_have_skills"):
+        rows = _job_rows(connection, [(target.id, target.required_skills, target.nice_to_have_skills)])
+        _replace_links(connection, job_skills, "job_id", [target.id], rows)
+
+def _unlink(link_table, owner_column: str):
+    def handler(mapper, connection, target):
+        connection.execute(link_table.delete().where(link_table.c[owner_column] == target.id))
+    return handler
+
+for _model, _sync, _table, _column in (
+    (CandidateProfile, _sync_candidate, candidate_skills, "candidate_id"),
+    (ExternalCandidate, _sync_external_candidate, external_candidate_skills, "external_candidate_id"),
+    (Job, _sync_job, job_skills, "job_id"),
+):
+    event.listen(_model, "after_insert", _sync)
+    event.listen(_model, "after_update", _sync)
+    event.listen(_model, "before_delete", _unlink(_table, _column))
+
+def backfill_skills(db: Session, batch_size: int = 1000) -> Dict[str, int]:
+    """Заполнение таблиц навыков по существующим JSON-полям"""
+    connection = db.connection()
+    sources = (
+        ("candidates", db.query(CandidateProfile.id, CandidateProfile.skills),
+         _candidate_rows, candidate_skills, "candidate_id"),
+        ("external_candidates", db.query(ExternalCandidate.id, ExternalCandidate.skills),
+         _external_candidate_rows, external_candidate_skills, "external_candidate_id"),
+        ("jobs", db.query(Job.id, Job.required_skills, Job.nice_to_have_skills),
+         _job_rows, job_skills, "job_id"),
+    )
+
+    totals = {}
+    for name, query, build_rows, link_table, owner_column in sources:
+        items = [tuple(row) for row in query.all()]
+        links = 0
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            rows = build_rows(connection, batch)
+            _replace_links(connection, link_table, owner_column, [item[0] for item in batch], rows)
+            links += len(rows)
+        totals[name] = links
+
+    db.commit()
+    return totals
@@ -0,0 +1,327 @@
+"""
+Хранилище загруженных файлов
+Локальный диск или S3-совместимое хранилище (AWS S3, MinIO и т.п.).
+Ключ объекта совпадает со значением в cv_url/avatar_url: uploads/cv/<sha256>.pdf
+"""
+
+import logging
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from mimetypes import guess_type
+from typing import Iterator, NamedTuple, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:
+    boto3 = None
+    ClientError = Exception
+
+class StoredObject(NamedTuple):
+    """Файл в хранилище"""
+    key: str
+    size: int
+    modified: float  # Unix time последнего изменения
+
+class StorageBackend:
+    """Базовый класс хранилища"""
+
+    # Файлы доступны напрямую по пути на диске
+    is_local = False
+
+    def writer(self, directory: str) -> "UploadWriter":
+        """Потоковая запись нового файла в каталог (имя задается при publish)"""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """Удаление файла (отсутствующий файл не ошибка)"""
+        raise NotImplementedError
+
+    def list(self, directory: str) -> Iterator[StoredObject]:
+        """Файлы непосредственно в каталоге (без служебных .-файлов)"""
+        raise NotImplementedError
+
+    def url(self, key: str) -> str:
+        """URL для скачивания файла клиентом"""
+        raise NotImplementedError
+
+    def fetch(self, key: str) -> str:
+        """Путь к локальной копии файла (освобождается через release)"""
+        raise NotImplementedError
+
+    def release(self, local_path: str) -> None:
+        """Освобождение локальной копии, полученной через fetch"""
+
+    @contextmanager
+    def local_copy(self, key: str):
+        local_path = self.fetch(key)
+        try:
+            yield local_path
+        finally:
+            self.release(local_path)
+
+class UploadWriter:
+    """Запись загружаемого файла чанками"""
+
+    def write(self, chunk: bytes) -> None:
+        raise NotImplementedError
+
+    def publish(self, key: str) -> None:
+        """Сохранение под итоговым ключом (если такой файл уже есть, запись отбрасывается)"""
+        raise NotImplementedError
+
+    def abort(self) -> None:
+        """Отмена записи и удаление временных данных"""
+        raise NotImplementedError
+
+# ========== ЛОКАЛЬНЫЙ ДИСК ==========
+
+class LocalUploadWriter(UploadWriter):
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+        self.file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        self.file.write(chunk)
+
+    def publish(self, key: str) -> None:
+        self.file.close()
+        if os.path.exists(key):
+            os.remove(self.temp_path)
+            # Свежее время изменения защищает файл от сборщика мусора до commit ссылки
+            os.utime(key)
+        else:
+            os.replace(self.temp_path, key)
+
+    def abort(self) -> None:
+        self.file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+class LocalStorage(StorageBackend):
+    """Файлы на локальном диске, ключ - путь относительно рабочего каталога"""
+
+    is_local = True
+
+    def writer(self, directory: str) -> UploadWriter:
+        return LocalUploadWriter(directory)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(key)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(key)
+        except FileNotFoundError:
+            pass
+
+    def list(self, directory: str) -> Iterator[StoredObject]:
+        if not os.path.isdir(directory):
+            return
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or entry.name.startswith("."):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield StoredObject(entry.path, stat.st_size, stat.st_mtime)
+
+    def url(self, key: str) -> str:
+        return "/" + key.replace(os.sep, "/")
+
+    def fetch(self, key: str) -> str:
+        if not os.path.isfile(key):
+            raise FileNotFoundError(key)
+        return key
+
+# ========== S3-СОВМЕСТИМОЕ ХРАНИЛИЩЕ ==========
+
+class S3UploadWriter(UploadWriter):
+    """
+    Потоковая multipart-загрузка с ограниченным буфером
+
+    В памяти держится не больше одной части (part_size). Файлы меньше
+    одной части отправляются одним put_object сразу под итоговым ключом,
+    большие собираются во временном объекте и копируются на стороне S3.
+    """
+
+    def __init__(self, storage: "S3Storage", directory: str):
+        self.storage = storage
+        self.temp_key = f"{directory}/.upload-{uuid.uuid4()}.part"
+        self.buffer = bytearray()
+        self.upload_id: Optional[str] = None
+        self.parts = []
+
+    @property
+    def client(self):
+        return self.storage.client
+
+    def _upload_part(self) -> None:
+        if self.upload_id is None:
+            self.upload_id = self.client.create_multipart_upload(
+                Bucket=self.storage.bucket, Key=self.temp_key
+            )["UploadId"]
+        number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.storage.bucket, Key=self.temp_key, UploadId=self.upload_id,
+            PartNumber=number, Body=bytes(self.buffer)
+        )
+        self.parts.append({"PartNumber": number, "ETag": response["ETag"]})
+        self.buffer.clear()
+
+    def write(self, chunk: bytes) -> None:
+        self.buffer += chunk
+        if len(self.buffer) >= self.storage.part_size:
+            self._upload_part()
+
+    def publish(self, key: str) -> None:
+        bucket = self.storage.bucket
+        content_type = guess_type(key)[0] or "application/octet-stream"
+
+        if self.storage.exists(key):
+            self.abort()
+            self.storage.touch(key)
+            return
+
+        if self.upload_id is None:
+            self.client.put_object(Bucket=bucket, Key=key, Body=bytes(self.buffer), ContentType=content_type)
+            self.buffer.clear()
+            return
+
+        if self.buffer:
+            self._upload_part()
+        self.client.complete_multipart_upload(
+            Bucket=bucket, Key=self.temp_key, UploadId=self.upload_id,
+            MultipartUpload={"Parts": self.parts}
+        )
+        self.upload_id = None
+        try:
+            self.client.copy_object(
+                Bucket=bucket, Key=key, CopySource={"Bucket": bucket, "Key": self.temp_key},
+                ContentType=content_type, MetadataDirective="REPLACE"
+            )
+        finally:
+            self.client.delete_object(Bucket=bucket, Key=self.temp_key)
+
+    def abort(self) -> None:
+        self.buffer.clear()
+        if self.upload_id is not None:
+            try:
+                self.client.abort_multipart_upload(
+                    Bucket=self.storage.bucket, Key=self.temp_key, UploadId=self.upload_id
+                )
+            except ClientError as e:
+                logger.warning(f"Не удалось отменить multipart-загрузку {self.temp_key}: {e}")
+            self.upload_id = None
+
+class S3Storage(StorageBackend):
+    """S3-совместимое хранилище, скачивание идет по presigned URL мимо приложения"""
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        url_expire_seconds: int = 3600,
+        part_size: int = 8 * 1024 * 1024
+    ):
+        if boto3 is None:
+            raise RuntimeError("Для STORAGE_BACKEND=s3 требуется пакет boto3")
+        self.bucket = bucket
+        self.url_expire_seconds = url_expire_seconds
+        # Минимальный размер части multipart-загрузки в S3 - 5 МБ
+        self.part_size = max(part_size, 5 * 1024 * 1024)
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=access_key_id or None,
+            aws_secret_access_key=secret_access_key or None,
+        )
+
+    def writer(self, directory: str) -> UploadWriter:
+        return S3UploadWriter(self, directory)
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def touch(self, key: str) -> None:
+        """Обновление LastModified (защита от сборщика мусора при повторной загрузке)"""
+        self.client.copy_object(
+            Bucket=self.bucket, Key=key, CopySource={"Bucket": self.bucket, "Key": key},
+            MetadataDirective="REPLACE", ContentType=guess_type(key)[0] or "application/octet-stream"
+        )
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def list(self, directory: str) -> Iterator[StoredObject]:
+        prefix = directory.rstrip("/") + "/"
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix, Delimiter="/"):
+            for item in page.get("Contents", []):
+                if os.path.basename(item["Key"]).startswith("."):
+                    continue
+                yield StoredObject(item["Key"], item["Size"], item["LastModified"].timestamp())
+
+    def url(self, key: str) -> str:
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": key}, ExpiresIn=self.url_expire_seconds
+        )
+
+    def fetch(self, key: str) -> str:
+        fd, local_path = tempfile.mkstemp(prefix=".fetch-", suffix=os.path.splitext(key)[1])
+        try:
+            with os.fdopen(fd, "wb") as f:
+                self.client.download_fileobj(self.bucket, key, f)
+        except ClientError as e:
+            os.remove(local_path)
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                raise FileNotFoundError(key)
+            raise
+        return local_path
+
+    def release(self, local_path: str) -> None:
+        try:
+            os.remove(local_path)
+        except FileNotFoundError:
+            pass
+
+_storage: Optional[StorageBackend] = None
+
+def get_storage() -> StorageBackend:
+    """Хранилище из настроек (STORAGE_BACKEND: local или s3)"""
+    global _storage
+    if _storage is None:
+        if settings.STORAGE_BACKEND == "s3":
+            _storage = S3Storage(
+                bucket=settings.AWS_BUCKET_NAME,
+                endpoint_url=settings.AWS_ENDPOINT_URL,
+                region=settings.AWS_REGION,
+                access_key_id=settings.AWS_ACCESS_KEY_ID,
+                secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                url_expire_seconds=settings.PRESIGNED_URL_EXPIRE_SECONDS,
+            )
+        else:
+            _storage = LocalStorage()
+    return _storage
@@ -0,0 +1,183 @@
+"""
+Миниатюры аватаров
+Фиксированные размеры в WebP и JPEG, генерируются при загрузке и по запросу.
+Каталог миниатюр работает как дисковый LRU-кеш с ограничением по объему
+"""
+
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    logger.warning("Pillow не установлен, миниатюры аватаров отключены")
+
+THUMBNAIL_SIZES = (64, 128, 256)
+
+# Формат -> (формат Pillow, MIME тип, параметры сохранения)
+THUMBNAIL_FORMATS: Dict[str, Tuple[str, str, dict]] = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+AVATAR_DIRECTORY = os.path.join(settings.UPLOAD_DIRECTORY, "avatars")
+THUMBNAIL_DIRECTORY = os.path.join(AVATAR_DIRECTORY, "thumbs")
+
+def is_enabled() -> bool:
+    return Image is not None
+
+def thumbnail_path(avatar_filename: str, size: int, fmt: str) -> str:
+    """Путь миниатюры: uploads/avatars/thumbs/<имя аватара>_<размер>.<формат>"""
+    stem = os.path.splitext(avatar_filename)[0]
+    return os.path.join(THUMBNAIL_DIRECTORY, f"{stem}_{size}.{fmt}")
+
+def avatar_thumbnail_url(avatar_url: Optional[str], size: int = THUMBNAIL_SIZES[0]) -> Optional[str]:
+    """URL миниатюры аватара для ответов API (без Pillow - URL оригинала)"""
+    if not avatar_url:
+        return None
+    filename = os.path.basename(avatar_url)
+    if not is_enabled():
+        return f"/uploads/avatars/{filename}"
+    return f"/api/users/avatars/{filename}/thumbnail?size={size}"
+
+# ========== ГЕНЕРАЦИЯ ==========
+
+def _render(source_path: str, filename: str, variants: Iterable[Tuple[int, str]]) -> List[str]:
+    """Генерация миниатюр из одного открытия исходного файла"""
+    os.makedirs(THUMBNAIL_DIRECTORY, exist_ok=True)
+    created = []
+
+    with Image.open(source_path) as image:
+        image.seek(0)  # Первый кадр для анимированных GIF
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+        for size, fmt in sorted(variants, reverse=True):
+            pil_format, _, options = THUMBNAIL_FORMATS[fmt]
+            thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            if pil_format == "JPEG" and thumbnail.mode == "RGBA":
+                background = Image.new("RGB", thumbnail.size, (255, 255, 255))
+                background.paste(thumbnail, mask=thumbnail.getchannel("A"))
+                thumbnail = background
+
+            path = thumbnail_path(filename, size, fmt)
+            fd, temp_path = tempfile.mkstemp(dir=THUMBNAIL_DIRECTORY, prefix=".thumb-", suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    thumbnail.save(f, pil_format, **options)
+                os.replace(temp_path, path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            created.append(path)
+
+    thumbnail_cache.add(created)
+    return created
+
+def generate_thumbnails(avatar_key: str) -> List[str]:
+    """
+    Генерация всех размеров и форматов для загруженного аватара
+
+    Выполняется в фоне после загрузки, ошибки только логируются.
+    Миниатюры всегда хранятся на локальном диске как кеш.
+    """
+    if not is_enabled():
+        return []
+    variants = [(size, fmt) for size in THUMBNAIL_SIZES for fmt in THUMBNAIL_FORMATS]
+    try:
+        with get_storage().local_copy(avatar_key) as source_path:
+            return _render(source_path, os.path.basename(avatar_key), variants)
+    except Exception as e:
+        logger.warning(f"Не удалось создать миниатюры для {avatar_key}: {e}")
+        return []
+
+def get_thumbnail(avatar_filename: str, size: int, fmt: str) -> Optional[str]:
+    """
+    Путь к миниатюре (создается по запросу, если ее нет в кеше)
+
+    Returns:
+        Путь к файлу или None, если исходного аватара нет или Pillow не установлен
+    """
+    path = thumbnail_path(avatar_filename, size, fmt)
+    if os.path.exists(path):
+        thumbnail_cache.touch(path)
+        return path
+
+    if not is_enabled():
+        return None
+    try:
+        with get_storage().local_copy(os.path.join(AVATAR_DIRECTORY, avatar_filename)) as source_path:
+            _render(source_path, avatar_filename, [(size, fmt)])
+    except FileNotFoundError:
+        return None
+    return path
+
+# ========== LRU-КЕШ НА ДИСКЕ ==========
+
+class ThumbnailCache:
+    """
+    Ограничение объема каталога миниатюр
+
+    Время последнего обращения хранится в mtime файла, при превышении
+    лимита удаляются давно не запрашиваемые миниатюры (до 90% лимита).
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.startswith("."):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def touch(self, path: str) -> None:
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    def add(self, paths: Iterable[str]) -> None:
+        """Учет новых файлов и вытеснение старых при превышении лимита"""
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._scan())
+            else:
+                self._total_bytes += sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                total -= size
+        self._total_bytes = total
+
+thumbnail_cache = ThumbnailCache(THUMBNAIL_DIRECTORY, settings.THUMBNAIL_CACHE_MAX_BYTES)
@@ -0,0 +1,160 @@
+"""
+Подсчет ссылок на загруженные файлы и сборка мусора
+Счетчики stored_files обновляются в той же транзакции, что и cv_url/avatar_url
+"""
+
+import os
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from sqlalchemy import event, func, inspect, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.core.static_files import PRECOMPRESSED_SUFFIX
+from app.models.upload import StoredFile
+from app.models.user import CandidateProfile, User
+from app.services.storage import get_storage
+
+# Подкаталоги хранилища и поля моделей, которые на них ссылаются
+UPLOAD_SUBDIRECTORIES = ("cv", "avatars")
+REFERENCES = (
+    (CandidateProfile, "cv_url"),
+    (User, "avatar_url"),
+)
+
+# Файлы моложе этого срока не удаляются (загрузка могла еще не закоммитить ссылку)
+DEFAULT_GRACE_SECONDS = 60 * 60
+
+def _is_local_upload(path: Optional[str]) -> bool:
+    return bool(path) and os.path.normpath(path).startswith(os.path.normpath(settings.UPLOAD_DIRECTORY) + os.sep)
+
+def _adjust_refs(connection, deltas: Dict[str, int]) -> None:
+    """Изменение счетчиков ссылок (строка создается при первой ссылке)"""
+    table = StoredFile.__table__
+    for path, delta in deltas.items():
+        if not delta:
+            continue
+        stmt = dialect_insert(connection, table)
+        if stmt is not None:
+            connection.execute(
+                stmt.values(path=path, ref_count=max(delta, 0), updated_at=func.now())
+                .on_conflict_do_update(
+                    index_elements=["path"],
+                    set_={"ref_count": table.c.ref_count + delta, "updated_at": func.now()}
+                )
+            )
+            continue
+        result = connection.execute(
+            update(table).where(table.c.path == path)
+            .values(ref_count=table.c.ref_count + delta, updated_at=func.now())
+        )
+        if not result.rowcount:
+            connection.execute(table.insert().values(path=path, ref_count=max(delta, 0)))
+
+def _reference_listener(attribute: str, on_delete: bool = False):
+    def handler(mapper, connection, target):
+        history = inspect(target).attrs[attribute].history
+        deltas: Counter = Counter()
+        if on_delete:
+            removed, added = list(history.unchanged) + list(history.deleted), []
+        else:
+            removed, added = history.deleted, history.added
+        for path in removed:
+            if _is_local_upload(path):
+                deltas[path] -= 1
+        for path in added:
+            if _is_local_upload(path):
+                deltas[path] += 1
+        _adjust_refs(connection, deltas)
+    return handler
+
+for _model, _attribute in REFERENCES:
+    event.listen(_model, "after_insert", _reference_listener(_attribute))
+    event.listen(_model, "after_update", _reference_listener(_attribute))
+    event.listen(_model, "after_delete", _reference_listener(_attribute, on_delete=True))
+
+# ========== ОБСЛУЖИВАНИЕ ==========
+
+def rebuild_refs(db: Session) -> int:
+    """Пересчет всех счетчиков по текущим cv_url/avatar_url"""
+    counts: Counter = Counter()
+    for model, attribute in REFERENCES:
+        column = getattr(model, attribute)
+        for path, count in db.query(column, func.count()).filter(column.isnot(None)).group_by(column):
+            if _is_local_upload(path):
+                counts[path] += count
+
+    db.query(StoredFile).delete(synchronize_session=False)
+    db.bulk_insert_mappings(StoredFile, [{"path": path, "ref_count": count} for path, count in counts.items()])
+    db.commit()
+    return len(counts)
+
+def collect_garbage(
+    db: Session,
+    grace_seconds: int = DEFAULT_GRACE_SECONDS,
+    dry_run: bool = False
+) -> Dict[str, int]:
+    """
+    Удаление файлов, на которые не ссылается ни одна запись
+
+    Удаляются файлы с нулевым счетчиком и файлы без строки в stored_files
+    (незавершенные загрузки, файлы из старой схемы хранения). Недавно
+    измененные файлы пропускаются. Предсжатые варианты (.gz) удаляются
+    вместе с исходным файлом.
+    """
+    cutoff = time.time() - grace_seconds
+    stats = {"scanned": 0, "deleted": 0, "freed_bytes": 0}
+
+    directories = [os.path.join(settings.UPLOAD_DIRECTORY, name) for name in UPLOAD_SUBDIRECTORIES]
+    referenced = {
+        path for (path,) in db.query(StoredFile.path).filter(StoredFile.ref_count > 0)
+    }
+
+    storage = get_storage()
+    objects = [item for directory in directories for item in storage.list(directory)]
+    keys = {item.key for item in objects}
+
+    for item in objects:
+        stats["scanned"] += 1
+        path = item.key
+        if path in referenced:
+            continue
+        if path.endswith(PRECOMPRESSED_SUFFIX) and path[:-len(PRECOMPRESSED_SUFFIX)] in keys:
+            # Предсжатый вариант удаляется вместе с исходным файлом
+            continue
+        if item.modified > cutoff:
+            continue
+
+        if not dry_run:
+            # Строка удаляется, только если счетчик все еще нулевой
+            deleted = db.execute(
+                StoredFile.__table__.delete()
+                .where(StoredFile.path == path, StoredFile.ref_count <= 0)
+            ).rowcount
+            if not deleted and db.get(StoredFile, path) is not None:
+                db.rollback()
+                continue
+            storage.delete(path)
+            if path + PRECOMPRESSED_SUFFIX in keys:
+                storage.delete(path + PRECOMPRESSED_SUFFIX)
+            db.commit()
+
+        stats["deleted"] += 1
+        stats["freed_bytes"] += item.size
+
+    # Строки без ссылок, файлы которых уже удалены
+    if not dry_run:
+        stale = [
+            path for (path,) in db.query(StoredFile.path).filter(StoredFile.ref_count <= 0)
+            if path not in keys
+        ]
+        if stale:
+            db.query(StoredFile).filter(
+                StoredFile.path.in_(stale), StoredFile.ref_count <= 0
+            ).delete(synchronize_session=False)
+            db.commit()
+
+    return stats
@@ -0,0 +1,144 @@
+"""
+Сохранение загружаемых файлов
+Потоковая запись в хранилище с проверкой размера и сигнатуры на лету.
+Файлы хранятся под именем из SHA-256 содержимого, одинаковые файлы хранятся один раз
+"""
+
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.exceptions import ValidationError
+from app.core.static_files import PRECOMPRESSED_SUFFIX
+from app.services.storage import get_storage
+
+# Размер чанка при чтении загрузки
+CHUNK_SIZE = 64 * 1024
+
+# Сигнатуры (magic bytes) допустимых форматов по расширению
+FILE_SIGNATURES: Dict[str, Tuple[bytes, ...]] = {
+    ".pdf": (b"%PDF-",),
+    ".docx": (b"PK\x03\x04",),
+    ".doc": (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",),
+    ".jpg": (b"\xff\xd8\xff",),
+    ".jpeg": (b"\xff\xd8\xff",),
+    ".png": (b"\x89PNG\r\n\x1a\n",),
+    ".gif": (b"GIF87a", b"GIF89a"),
+}
+
+# Предсжатый вариант хранится, только если он меньше исходного хотя бы на 10%
+PRECOMPRESS_MAX_RATIO = 0.9
+
+# Сколько байт нужно для проверки сигнатуры
+_SIGNATURE_LENGTH = max(len(s) for signatures in FILE_SIGNATURES.values() for s in signatures)
+
+class SavedUpload(NamedTuple):
+    """Сохраненный файл"""
+    path: str
+    sha256: str  # Хеш содержимого, считается во время записи
+    size: int
+
+def _too_large_error(max_size: int) -> ValidationError:
+    return ValidationError(f"Файл слишком большой. Максимальный размер: {max_size // (1024 * 1024)} МБ")
+
+def _check_signature(extension: str, head: bytes) -> None:
+    """Проверка, что содержимое соответствует расширению файла"""
+    signatures = FILE_SIGNATURES.get(extension)
+    if signatures and not head.startswith(signatures):
+        raise ValidationError("Содержимое файла не соответствует его типу")
+
+async def save_upload(
+    file: UploadFile,
+    directory: str,
+    max_size: int,
+    extension: Optional[str] = None
+) -> SavedUpload:
+    """
+    Потоковое сохранение загруженного файла
+
+    Файл читается чанками и пишется в хранилище (get_storage) в пуле потоков,
+    размер, сигнатура и SHA-256 считаются по мере поступления данных. После
+    успешной записи файл публикуется под ключом <каталог>/<sha256><расширение>;
+    если такой файл уже есть, запись отбрасывается и возвращается существующий.
+
+    Тело запроса к этому моменту уже разобрано Starlette (файл во временном
+    spooled-файле), поэтому max_size здесь - лимит конкретного поля; ранний
+    отказ для слишком больших запросов делает BodySizeLimitMiddleware.
+    """
+    extension = (extension or os.path.splitext(file.filename or "")[1]).lower()
+
+    # Размер части уже известен после разбора - отказываем без копирования в хранилище
+    if file.size is not None and file.size > max_size:
+        raise _too_large_error(max_size)
+
+    writer = await run_in_threadpool(get_storage().writer, directory)
+    try:
+        written = 0
+        head = b""
+        digest = hashlib.sha256()
+        while True:
+            chunk = await file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+
+            written += len(chunk)
+            if written > max_size:
+                raise _too_large_error(max_size)
+
+            if len(head) < _SIGNATURE_LENGTH:
+                head += chunk[:_SIGNATURE_LENGTH - len(head)]
+                if len(head) >= _SIGNATURE_LENGTH:
+                    _check_signature(extension, head)
+
+            digest.update(chunk)
+            await run_in_threadpool(writer.write, chunk)
+
+        if not written:
+            raise ValidationError("Файл пустой")
+        if len(head) < _SIGNATURE_LENGTH:
+            _check_signature(extension, head)
+
+        sha256 = digest.hexdigest()
+        key = os.path.join(directory, f"{sha256}{extension}")
+        await run_in_threadpool(writer.publish, key)
+        return SavedUpload(key, sha256, written)
+    except BaseException:
+        await run_in_threadpool(writer.abort)
+        raise
+
+def precompress(path: str) -> bool:
+    """
+    Создание gzip-варианта файла для раздачи с Content-Encoding
+
+    Вариант сохраняется рядом с файлом (<путь>.gz), только если сжатие
+    заметно уменьшает размер (например, .doc; PDF и картинки обычно уже сжаты).
+    Только для локального хранилища: из S3 файлы отдаются по presigned URL.
+    """
+    if not get_storage().is_local:
+        return False
+
+    compressed_path = path + PRECOMPRESSED_SUFFIX
+    if os.path.exists(compressed_path):
+        return True
+
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".gzip-", suffix=".part")
+    try:
+        with open(path, "rb") as source, os.fdopen(fd, "wb") as target:
+            with gzip.GzipFile(fileobj=target, mode="wb", compresslevel=9, mtime=0) as compressed:
+                shutil.copyfileobj(source, compressed, CHUNK_SIZE)
+        if os.path.getsize(temp_path) > os.path.getsize(path) * PRECOMPRESS_MAX_RATIO:
+            os.remove(temp_path)
+            return False
+        os.replace(temp_path, compressed_path)
+        return True
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Сборка мусора в хранилище загруженных файлов
+Удаляет файлы резюме и аватаров, на которые не ссылается ни одна запись
+"""
+
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.services.upload_refs import DEFAULT_GRACE_SECONDS, collect_garbage, rebuild_refs
+
+def main():
+    parser = argparse.ArgumentParser(description="Удаление загруженных файлов без ссылок")
+    parser.add_argument("--grace", type=int, default=DEFAULT_GRACE_SECONDS,
+                        help="Не удалять файлы моложе N секунд")
+    parser.add_argument("--rebuild", action="store_true", help="Пересчитать счетчики ссылок перед очисткой")
+    parser.add_argument("--dry-run", action="store_true", help="Только показать, что будет удалено")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        if args.rebuild:
+            print(f"✅ Счетчики пересчитаны, файлов со ссылками: {rebuild_refs(db)}")
+        
+        stats = collect_garbage(db, grace_seconds=args.grace, dry_run=args.dry_run)
+        action = "Будет удалено" if args.dry_run else "Удалено"
+        print(f"✅ Проверено файлов: {stats['scanned']}")
+        print(f"✅ {action}: {stats['deleted']} ({stats['freed_bytes'] / (1024 * 1024):.1f} МБ)")
+    except Exception as e:
+        print(f"❌ Ошибка при очистке: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+    
+    return True
+
+if __name__ == "__main__":
+    if not main():
+        sys.exit(1)
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Пакетное извлечение текста из загруженных резюме
+Файлы обрабатываются параллельно в пуле процессов, уже разобранные пропускаются
+"""
+
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.services.cv_extraction import backfill_extractions
+
+def main():
+    parser = argparse.ArgumentParser(description="Извлечение текста из загруженных резюме")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Количество процессов")
+    parser.add_argument("--force", action="store_true", help="Повторно разобрать уже обработанные файлы")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        print(f"Обработка резюме ({args.workers} процессов)...")
+        stats = backfill_extractions(db, workers=args.workers, force=args.force)
+        print(f"✅ Профилей с резюме: {stats['profiles']} (файлов не найдено: {stats['missing_files']})")
+        print(f"✅ Уникальных файлов: {stats['unique_files']}, из кеша: {stats['cached']}")
+        print(f"✅ Обработано: {stats['extracted']}, с ошибкой: {stats['failed']}")
+    except Exception as e:
+        print(f"❌ Ошибка при обработке резюме: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+    
+    return True
+
+if __name__ == "__main__":
+    if not main():
+        sys.exit(1)
@@ -11,14 +11,18 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, RedirectResponse
 from dotenv import load_dotenv
 
 # Local imports
 from app.core.config import settings
 from app.core.database import engine, Base
+from app.core.body_limit import BodySizeLimitMiddleware
 from app.core.exceptions import setup_exception_handlers
+from app.core.static_files import UploadStaticFiles
 from app.api.routes import auth, users, companies, jobs, interviews, reports, streams, analytics, integrations
+from app.services import analytics_rollups, cv_extraction, http_client, integration_sync
+from app.services.storage import get_storage
 
 # Загрузка переменных окружения с обработкой ошибок
 try:
@@ -43,10 +47,23 @@ async def lifespan(app: FastAPI):
     # Создание таблиц базы данных
     Base.metadata.create_all(bind=engine)
     
+    # Периодический пересчет дневных агрегатов аналитики
+    analytics_rollups.start_scheduler()
+    
+    # Общая HTTP сессия для внешних платформ
+    await http_client.start_session()
+    
+    # Автоматическая синхронизация интеграций по next_sync_at
+    integration_sync.start_scheduler()
+    
     yield
     
     # Shutdown
     print("🔴 Остановка Recruit.ai...")
+    await integration_sync.stop_scheduler()
+    await analytics_rollups.stop_scheduler()
+    cv_extraction.shutdown_executor()
+    await http_client.close_session()
 
 app = FastAPI(
     title="Recruit.ai API",
@@ -57,6 +74,14 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Лимит размера тела загрузок до разбора multipart. Добавляется раньше CORS,
+# чтобы CORS оставался внешним и ответ 413 получал заголовки Access-Control-*
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body_size=settings.MAX_REQUEST_BODY_SIZE,
+    paths=("/api/users/upload/cv", "/api/users/upload/avatar"),
+)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -82,7 +107,15 @@ app.include_router(integrations.router, prefix="/api/integrations", tags=["integ
 
 # Static files mounting (создаем папку если её нет)
 os.makedirs(UPLOADS_DIR, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=UPLOADS_DIR), name="uploads")
+if get_storage().is_local:
+    app.mount("/uploads", UploadStaticFiles(directory=UPLOADS_DIR), name="uploads")
+else:
+    @app.get("/uploads/{key:path}", include_in_schema=False)
+    async def uploads_redirect(key: str):
+        """Файлы из S3 скачиваются по presigned URL, минуя приложение"""
+        if ".." in key.split("/"):
+            raise HTTPException(status_code=404, detail="Not found")
+        return RedirectResponse(get_storage().url(f"{settings.UPLOAD_DIRECTORY}/{key}"))
 
 # Frontend static files (React build)
 if os.path.exists(FRONTEND_BUILD_DIR):
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Миграция для добавления дневных агрегатов аналитики
+Создает таблицу analytics_daily_rollups и заполняет ее за последний год
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import engine, Base, SessionLocal
+from app.models.analytics import AnalyticsDailyRollup
+from app.services.analytics_rollups import backfill
+
+BACKFILL_DAYS = 365
+
+def migrate_database():
+    """Создание таблицы analytics_daily_rollups и заполнение истории"""
+    db = SessionLocal()
+    try:
+        print("Создание таблицы analytics_daily_rollups...")
+        Base.metadata.create_all(bind=engine, tables=[AnalyticsDailyRollup.__table__])
+        print("✅ Таблица analytics_daily_rollups создана")
+        
+        print(f"Заполнение агрегатов за {BACKFILL_DAYS} дней...")
+        stats = backfill(db, BACKFILL_DAYS)
+        print(f"✅ Записано строк: {stats['rows']}")
+        print("✅ Миграция успешно завершена! Для более длинной истории запустите rollup_analytics.py --days N")
+        
+    except Exception as e:
+        print(f"❌ Ошибка при миграции: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+    
+    return True
+
+if __name__ == "__main__":
+    if not migrate_database():
+        print("❌ Миграция не удалась")
+        sys.exit(1)
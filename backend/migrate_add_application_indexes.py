@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Миграция для добавления индекса откликов
+Создает индекс job_applications(job_id, applied_at) для списков кандидатов компании
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from app.core.database import SessionLocal
+
+def migrate_database():
+    """Создание индекса job_applications(job_id, applied_at)"""
+    db = SessionLocal()
+    try:
+        print("Создание индекса ix_job_applications_job_id_applied_at...")
+        db.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_job_applications_job_id_applied_at "
+            "ON job_applications(job_id, applied_at)"
+        ))
+        db.commit()
+        print("✅ Индекс создан")
+        
+    except Exception as e:
+        print(f"❌ Ошибка при миграции: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+    
+    return True
+
+if __name__ == "__main__":
+    if not migrate_database():
+        print("❌ Миграция не удалась")
+        sys.exit(1)
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Миграция для добавления счетчиков dashboard компаний
+Создает таблицу company_stats и заполняет ее по текущим вакансиям и откликам
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import engine, Base, SessionLocal
+from app.models.company_stats import CompanyStats
+from app.services.company_stats import rebuild_company_stats
+
+def migrate_database():
+    """Создание таблицы company_stats и пересчет счетчиков"""
+    db = SessionLocal()
+    try:
+        print("Создание таблицы company_stats...")
+        Base.metadata.create_all(bind=engine, tables=[CompanyStats.__table__])
+        print("✅ Таблица company_stats создана")
+        
+        print("Подсчет вакансий и откликов компаний...")
+        count = rebuild_company_stats(db)
+        print(f"✅ Компаний с вакансиями: {count}")
+        
+    except Exception as e:
+        print(f"❌ Ошибка при миграции: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+    
+    return True
+
+if __name__ == "__main__":
+    if not migrate_database():
+        print("❌ Миграция не удалась")
+        sys.exit(1)
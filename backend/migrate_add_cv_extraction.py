@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Миграция для добавления извлечения текста из резюме
+Создает таблицу cv_extractions и столбец cv_sha256 в candidate_profiles
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from app.core.database import engine, Base, SessionLocal
+from app.models.cv import CVExtraction
+
+def migrate_database():
+    """Создание таблицы cv_extractions и столбца cv_sha256"""
+    db = SessionLocal()
+    try:
+        print("Создание таблицы cv_extractions...")
+        Base.metadata.create_all(bind=engine, tables=[CVExtraction.__table__])
+        print("✅ Таблица cv_extractions создана")
+        
+        print("Добавление столбца cv_sha256 в таблицу candidate_profiles...")
+        try:
+            db.execute(text("ALTER TABLE candidate_profiles ADD COLUMN cv_sha256 VARCHAR(64)"))
+            print("✅ Столбец cv_sha256 добавлен")
+        except Exception as e:
+            if "duplicate column" in str(e).lower() or "already exists" in str(e).lower():
+                db.rollback()
+                print("✅ Столбец cv_sha256 уже существует")
+            else:
+                raise e
+        
+        db.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_candidate_profiles_cv_sha256 ON candidate_profiles(cv_sha256)"
+        ))
+        db.commit()
+        print("✅ Миграция успешно завершена! Для обработки загруженных резюме запустите extract_cvs.py")
+        
+    except Exception as e:
+        print(f"❌ Ошибка при миграции: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+    
+    return True
+
+if __name__ == "__main__":
+    if not migrate_database():
+        print("❌ Миграция не удалась")
+        sys.exit(1)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Миграция для добавления уникального индекса внешних кандидатов
+Объединяет дубликаты (platform, external_id) и создает индекс
+external_candidates(platform, external_id), по которому синхронизация делает upsert
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from app.core.database import SessionLocal
+
+def migrate_database():
+    """Удаление дубликатов и создание индекса uq_external_candidates_platform_external_id"""
+    db = SessionLocal()
+    try:
+        print("Поиск дубликатов внешних кандидатов...")
+        rows = db.execute(text(
+            "SELECT id, platform, external_id FROM external_candidates "
+            "ORDER BY platform, external_id, is_imported DESC, id"
+        )).all()
+        
+        kept = {}
+        duplicates = []
+        for candidate_id, platform, external_id in rows:
+            key = (platform, external_id)
+            if key in kept:
+                duplicates.append((candidate_id, kept[key]))
+            else:
+                # Остается импортированная запись, иначе самая ранняя
+                kept[key] = candidate_id
+        
+        for duplicate_id, kept_id in duplicates:
+            db.execute(
+                text("UPDATE candidate_imports SET external_candidate_id = :kept WHERE external_candidate_id = :duplicate"),
+                {"kept": kept_id, "duplicate": duplicate_id}
+            )
+            db.execute(
+                text("DELETE FROM external_candidate_skills WHERE external_candidate_id = :duplicate"),
+                {"duplicate": duplicate_id}
+            )
+            db.execute(text("DELETE FROM external_candidates WHERE id = :duplicate"), {"duplicate": duplicate_id})
+        print(f"✅ Удалено дубликатов: {len(duplicates)}")
+        
+        print("Создание индекса uq_external_candidates_platform_external_id...")
+        db.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_external_candidates_platform_external_id "
+            "ON external_candidates(platform, external_id)"
+        ))
+        db.commit()
+        print("✅ Индекс создан")
+        
+    except Exception as e:
+        print(f"❌ Ошибка при миграции: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+    
+    return True
+
+if __name__ == "__main__":
+    if not migrate_database():
+        print("❌ Миграция не удалась")
+        sys.exit(1)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Миграция для автоматической синхронизации интеграций
+Добавляет столбцы аренды синхронизации в platform_integrations и индекс
+(auto_sync, next_sync_at) для выборки интеграций, которым пора синхронизироваться
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from app.core.database import SessionLocal
+
+def migrate_database():
+    """Добавление столбцов sync_lease_owner, sync_lease_expires_at и индекса"""
+    db = SessionLocal()
+    try:
+        columns = [
+            ("sync_lease_owner", "VARCHAR"),
+            ("sync_lease_expires_at", "DATETIME"),
+        ]
+        
+        for column_name, column_type in columns:
+            print(f"Добавление столбца {column_name} в таблицу platform_integrations...")
+            try:
+                db.execute(text(f"ALTER TABLE platform_integrations ADD COLUMN {column_name} {column_type}"))
+                db.commit()
+                print(f"✅ Столбец {column_name} добавлен")
+            except Exception as e:
+                if "duplicate column" in str(e).lower() or "already exists" in str(e).lower():
+                    db.rollback()
+                    print(f"✅ Столбец {column_name} уже существует")
+                else:
+                    raise e
+        
+        print("Создание индекса ix_platform_integrations_auto_sync_next_sync_at...")
+        db.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_platform_integrations_auto_sync_next_sync_at "
+            "ON platform_integrations(auto_sync, next_sync_at)"
+        ))
+        db.commit()
+        print("✅ Миграция успешно завершена!")
+        
+    except Exception as e:
+        print(f"❌ Ошибка при миграции: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+    
+    return True
+
+if __name__ == "__main__":
+    if not migrate_database():
+        print("❌ Миграция не удалась")
+        sys.exit(1)
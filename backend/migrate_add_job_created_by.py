@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Миграция для атрибуции вакансий
+Добавляет столбец jobs.created_by (автор вакансии: рекрутер или владелец
+компании) с индексом. Существующие вакансии приписываются владельцу профиля
+компании; аналитика рекрутеров и дневные агрегаты считаются по автору
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from app.core.database import SessionLocal
+
+def migrate_database():
+    """Добавление столбца created_by, индекса и заполнение для существующих вакансий"""
+    db = SessionLocal()
+    try:
+        print("Добавление столбца created_by в таблицу jobs...")
+        try:
+            db.execute(text("ALTER TABLE jobs ADD COLUMN created_by INTEGER REFERENCES users(id)"))
+            db.commit()
+            print("✅ Столбец created_by добавлен")
+        except Exception as e:
+            if "duplicate column" in str(e).lower() or "already exists" in str(e).lower():
+                db.rollback()
+                print("✅ Столбец created_by уже существует")
+            else:
+                raise e
+        
+        print("Создание индекса ix_jobs_created_by...")
+        db.execute(text("CREATE INDEX IF NOT EXISTS ix_jobs_created_by ON jobs(created_by)"))
+        db.commit()
+        
+        print("Заполнение created_by для существующих вакансий...")
+        result = db.execute(text(
+            "UPDATE jobs SET created_by = ("
+            "SELECT company_profiles.user_id FROM company_profiles "
+            "WHERE company_profiles.id = jobs.company_id"
+            ") WHERE created_by IS NULL"
+        ))
+        db.commit()
+        print(f"✅ Обновлено вакансий: {result.rowcount}")
+        
+        print("✅ Миграция успешно завершена!")
+        print("Пересчитайте агрегаты аналитики: python rollup_analytics.py")
+        
+    except Exception as e:
+        print(f"❌ Ошибка при миграции: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+    
+    return True
+
+if __name__ == "__main__":
+    if not migrate_database():
+        print("❌ Миграция не удалась")
+        sys.exit(1)
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Миграция для добавления нормализованных таблиц навыков
+Создает справочник skills и таблицы связей, заполняет их из JSON-полей
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import engine, Base, SessionLocal
+from app.models.skill import Skill, candidate_skills, external_candidate_skills, job_skills
+from app.services.skills import backfill_skills
+
+def migrate_database():
+    """Создание таблиц навыков и перенос существующих данных"""
+    db = SessionLocal()
+    try:
+        print("Создание таблиц навыков...")
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[Skill.__table__, candidate_skills, external_candidate_skills, job_skills]
+        )
+        print("✅ Таблицы навыков созданы")
+        
+        print("Заполнение связей навыков...")
+        totals = backfill_skills(db)
+        for name, count in totals.items():
+            print(f"✅ {name}: {count} связей")
+        
+        print(f"✅ Навыков в справочнике: {db.query(Skill).count()}")
+        
+    except Exception as e:
+        print(f"❌ Ошибка при миграции: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+    
+    return True
+
+if __name__ == "__main__":
+    if not migrate_database():
+        print("❌ Миграция не удалась")
+        sys.exit(1)
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Миграция для добавления счетчиков ссылок на загруженные файлы
+Создает таблицу stored_files и заполняет ее по cv_url/avatar_url
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import engine, Base, SessionLocal
+from app.models.upload import StoredFile
+from app.services.upload_refs import rebuild_refs
+
+def migrate_database():
+    """Создание таблицы stored_files и пересчет ссылок"""
+    db = SessionLocal()
+    try:
+        print("Создание таблицы stored_files...")
+        Base.metadata.create_all(bind=engine, tables=[StoredFile.__table__])
+        print("✅ Таблица stored_files создана")
+        
+        print("Подсчет ссылок на загруженные файлы...")
+        count = rebuild_refs(db)
+        print(f"✅ Файлов со ссылками: {count}")
+        
+    except Exception as e:
+        print(f"❌ Ошибка при миграции: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+    
+    return True
+
+if __name__ == "__main__":
+    if not migrate_database():
+        print("❌ Миграция не удалась")
+        sys.exit(1)
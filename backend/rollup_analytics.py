@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Пересчет дневных агрегатов аналитики
+Заполнение истории (backfill) и исправление запоздавших данных за последние дни
+"""
+
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.services.analytics_rollups import backfill
+
+def main():
+    parser = argparse.ArgumentParser(description="Пересчет дневных агрегатов аналитики")
+    parser.add_argument("--days", type=int, default=365, help="Сколько последних дней пересчитать")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        print(f"Пересчет агрегатов за {args.days} дней...")
+        stats = backfill(db, args.days)
+        print(f"✅ Записано строк: {stats['rows']}, удалено строк удаленных вакансий: {stats['removed']}")
+    except Exception as e:
+        print(f"❌ Ошибка при пересчете агрегатов: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+    
+    return True
+
+if __name__ == "__main__":
+    if not main():
+        sys.exit(1)
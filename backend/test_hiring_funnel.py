@@ -0,0 +1,99 @@
+"""
+Тестирование расчета воронки найма на столбцах NumPy (без базы данных)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import datetime
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.models.job import JobApplicationStatus
+from app.services.hiring_funnel import FunnelColumns, _DECIDED_STATUSES, _STATUS_STAGE, compute_funnel
+
+def _columns(applications):
+    """FunnelColumns одной вакансии из списка (статус, метки времени)"""
+    statuses = [status for status, _ in applications]
+    timestamps = {
+        name: np.array([stamps.get(name) for _, stamps in applications], dtype="datetime64[s]")
+        for name in ("applied_at", "reviewed_at", "interview_scheduled_at", "interview_completed_at", "decision_at")
+    }
+    count = len(applications)
+    return FunnelColumns(
+        job_id=np.ones(count, dtype=np.int64),
+        company_id=np.ones(count, dtype=np.int64),
+        stream_id=np.full(count, -1, dtype=np.int64),
+        stage=np.array([_STATUS_STAGE.get(status, 0) for status in statuses], dtype=np.int8),
+        decided=np.array([status in _DECIDED_STATUSES for status in statuses], dtype=bool),
+        rejected=np.array([status == JobApplicationStatus.REJECTED for status in statuses], dtype=bool),
+        accepted=np.array([status == JobApplicationStatus.ACCEPTED for status in statuses], dtype=bool),
+        timestamps=timestamps,
+        names={},
+    )
+
+def test_rejected_application_is_decided_only():
+    """Отклик, отклоненный сразу после подачи, не считается просмотренным и приглашенным"""
+    applied_at = datetime(2026, 1, 1)
+    columns = _columns([
+        (JobApplicationStatus.REJECTED, {"applied_at": applied_at, "decision_at": datetime(2026, 1, 3)}),
+        (JobApplicationStatus.APPLIED, {"applied_at": applied_at}),
+    ])
+
+    funnel = compute_funnel(columns)[0]["funnel"]
+
+    assert funnel == {
+        "applied": 2,
+        "reviewed": 0,
+        "interview_scheduled": 0,
+        "interview_completed": 0,
+        "decided": 1,
+        "accepted": 0,
+        "rejected": 1,
+    }
+
+def test_intermediate_stages_from_timestamps_and_status():
+    """Этапы до отказа берутся из меток времени, незавершенный статус засчитывает предыдущие этапы"""
+    columns = _columns([
+        (JobApplicationStatus.REJECTED, {
+            "applied_at": datetime(2026, 1, 1),
+            "reviewed_at": datetime(2026, 1, 2),
+            "interview_scheduled_at": datetime(2026, 1, 3),
+            "decision_at": datetime(2026, 1, 5),
+        }),
+        (JobApplicationStatus.INTERVIEW_SCHEDULED, {"applied_at": datetime(2026, 1, 1)}),
+        (JobApplicationStatus.WITHDRAWN, {"applied_at": datetime(2026, 1, 1)}),
+    ])
+
+    result = compute_funnel(columns)[0]
+
+    assert result["funnel"]["reviewed"] == 2
+    assert result["funnel"]["interview_scheduled"] == 2
+    assert result["funnel"]["interview_completed"] == 0
+    assert result["funnel"]["decided"] == 2
+    assert result["funnel"]["rejected"] == 1
+    assert result["durations"]["time_to_decision"]["count"] == 1
+
+def test_conversion_rates_do_not_exceed_100():
+    """Конверсия этапа считается по откликам, прошедшим оба этапа"""
+    applied_at = datetime(2026, 1, 1)
+    columns = _columns([
+        (JobApplicationStatus.INTERVIEW_COMPLETED, {"applied_at": applied_at}),
+        (JobApplicationStatus.REJECTED, {"applied_at": applied_at, "decision_at": datetime(2026, 1, 2)}),
+        (JobApplicationStatus.REJECTED, {"applied_at": applied_at, "decision_at": datetime(2026, 1, 2)}),
+        (JobApplicationStatus.ACCEPTED, {
+            "applied_at": applied_at,
+            "interview_scheduled_at": datetime(2026, 1, 3),
+            "decision_at": datetime(2026, 1, 6),
+        }),
+    ])
+
+    result = compute_funnel(columns)[0]
+
+    assert all(0 <= rate <= 100 for rate in result["conversion"].values())
+    assert result["conversion"]["interview_completed_to_decided"] == 0
+    assert result["conversion"]["reviewed_to_interview_scheduled"] == 100.0
+    assert result["conversion"]["decided_to_accepted"] == round(1 / 3 * 100, 2)
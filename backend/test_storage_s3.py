@@ -0,0 +1,93 @@
+"""
+Тестирование S3-хранилища загрузок на moto (эмуляция S3 в памяти)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from app.services.storage import S3Storage
+
+BUCKET = "recruit-ai-test"
+PART_SIZE = 5 * 1024 * 1024
+
+@pytest.fixture
+def storage():
+    """S3Storage с пустым бакетом в moto"""
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    with moto.mock_aws():
+        s3 = S3Storage(bucket=BUCKET, region="us-east-1", part_size=PART_SIZE)
+        s3.client.create_bucket(Bucket=BUCKET)
+        yield s3
+
+def _keys(storage: S3Storage):
+    return sorted(item["Key"] for item in storage.client.list_objects_v2(Bucket=BUCKET).get("Contents", []))
+
+def test_multipart_write_publish_fetch_delete(storage):
+    """Файл больше части: multipart во временный объект, копия под итоговым ключом"""
+    chunk = os.urandom(1024 * 1024)
+    content = chunk * 12  # 12 МБ - три части по 5 МБ (последняя меньше)
+
+    writer = storage.writer("uploads/cv")
+    for start in range(0, len(content), len(chunk)):
+        writer.write(content[start:start + len(chunk)])
+    assert len(writer.parts) == 2
+
+    writer.publish("uploads/cv/abc.pdf")
+
+    # Временный объект удален, незавершенных multipart-загрузок нет
+    assert _keys(storage) == ["uploads/cv/abc.pdf"]
+    assert not storage.client.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
+    head = storage.client.head_object(Bucket=BUCKET, Key="uploads/cv/abc.pdf")
+    assert head["ContentLength"] == len(content)
+    assert head["ContentType"] == "application/pdf"
+
+    local_path = storage.fetch("uploads/cv/abc.pdf")
+    try:
+        with open(local_path, "rb") as f:
+            assert f.read() == content
+    finally:
+        storage.release(local_path)
+    assert not os.path.exists(local_path)
+
+    storage.delete("uploads/cv/abc.pdf")
+    assert not storage.exists("uploads/cv/abc.pdf")
+    with pytest.raises(FileNotFoundError):
+        storage.fetch("uploads/cv/abc.pdf")
+
+def test_small_file_single_put(storage):
+    """Файл меньше части отправляется одним put_object"""
+    writer = storage.writer("uploads/avatars")
+    writer.write(b"\x89PNG\r\n\x1a\n" + b"0" * 100)
+    writer.publish("uploads/avatars/img.png")
+
+    assert writer.upload_id is None
+    assert _keys(storage) == ["uploads/avatars/img.png"]
+    assert [item.key for item in storage.list("uploads/avatars")] == ["uploads/avatars/img.png"]
+
+def test_publish_existing_key_keeps_one_copy(storage):
+    """Повторная загрузка того же содержимого не создает второй объект"""
+    for _ in range(2):
+        writer = storage.writer("uploads/cv")
+        writer.write(os.urandom(PART_SIZE + 1))
+        writer.publish("uploads/cv/same.pdf")
+
+    assert _keys(storage) == ["uploads/cv/same.pdf"]
+    assert not storage.client.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
+
+def test_abort_removes_multipart_upload(storage):
+    """Отмена загрузки (ошибка проверки) не оставляет частей и объектов"""
+    writer = storage.writer("uploads/cv")
+    writer.write(os.urandom(PART_SIZE))
+    assert writer.upload_id is not None
+
+    writer.abort()
+
+    assert _keys(storage) == []
+    assert not storage.client.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
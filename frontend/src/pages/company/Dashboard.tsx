@@ -77,7 +77,7 @@ const CompanyDashboard: React.FC = () => {
       setLoading(true);
       
       // Загружаем реальные данные кандидатов
-      const candidatesResponse = await authAPI.getCompanyCandidates();
+      const candidatesResponse = await authAPI.getCompanyCandidates({ limit: 500 });
       const candidatesData = candidatesResponse.data;
       
       // Преобразуем данные в формат, ожидаемый компонентом
@@ -137,8 +137,14 @@ class APIService {
     return this.client.get('/companies/dashboard');
   }
 
-  async getCompanyCandidates(): Promise<AxiosResponse> {
-    return this.client.get('/companies/candidates');
+  async getCompanyCandidates(params?: {
+    skip?: number;
+    limit?: number;
+    status?: string;
+    job_id?: number;
+    order?: 'asc' | 'desc';
+  }): Promise<AxiosResponse> {
+    return this.client.get('/companies/candidates', { params });
   }
 
   // Reports endpoints